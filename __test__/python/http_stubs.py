@@ -0,0 +1,65 @@
+# __test__/python/http_stubs.py
+# 檔案用途：newsScraper 測試共用的 requests 替身，不發出任何網路請求
+import threading
+import time
+
+from requests.structures import CaseInsensitiveDict
+
+
+class FakeResponse:
+    """只實作 HttpCache 與 ForagerStrategy 會用到的 requests.Response 介面。"""
+
+    def __init__(self, status_code=200, content=b"", headers=None, encoding="utf-8"):
+        self.status_code = status_code
+        self.content = content.encode("utf-8") if isinstance(content, str) else content
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.encoding = encoding
+        self.apparent_encoding = "utf-8"
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class FakeSession:
+    """依 URL 回傳預先排好的回應（最後一筆重複使用），並記錄每次請求帶的標頭；可在執行緒池中並行呼叫。
+
+    delays 可指定各 URL 的回應延遲秒數，模擬回應時間不同的網站；timeouts 與 max_in_flight 記錄請求的逾時與最大並行數。
+    """
+
+    def __init__(self):
+        self.headers = {}
+        self.responses = {}
+        self.delays = {}
+        self.requests = []
+        self.timeouts = {}
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def queue(self, url, *responses):
+        self.responses.setdefault(url, []).extend(responses)
+
+    def get(self, url, headers=None, timeout=None):
+        with self._lock:
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        try:
+            time.sleep(self.delays.get(url, 0.0))
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        with self._lock:
+            self.requests.append((url, dict(headers or {})))
+            self.timeouts[url] = timeout
+            responses = self.responses.get(url)
+            if not responses:
+                return FakeResponse(status_code=404)
+            return responses.pop(0) if len(responses) > 1 else responses[0]
+
+    def requested_urls(self):
+        with self._lock:
+            return [url for url, _ in self.requests]
+
+    def close(self):
+        pass
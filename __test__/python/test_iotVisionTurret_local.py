@@ -0,0 +1,625 @@
+# __test__/python/test_iotVisionTurret_local.py
+# 檔案用途：直接呼叫 iotVisionTurret Python runner 的 dispatch_request，驗證常駐模式各 op 的行為與回應格式
+# 執行方式：python -m unittest discover -s __test__/python
+import importlib
+import importlib.util
+import io
+import json
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+import types
+import unittest
+from unittest import mock
+
+STRATEGY_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "src", "plugins", "iotVisionTurret", "strategies", "local")
+)
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - 依環境略過
+    numpy = None
+
+try:
+    import cv2
+except ImportError:  # pragma: no cover - 依環境略過
+    cv2 = None
+
+
+def load_runner():
+    """以獨立模組名稱載入 runner，避免與其他外掛的 index 模組衝突。"""
+    if STRATEGY_DIR not in sys.path:
+        sys.path.insert(0, STRATEGY_DIR)
+    spec = importlib.util.spec_from_file_location("iot_vision_turret_runner", os.path.join(STRATEGY_DIR, "index.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_yolo_module(name):
+    """匯入不依賴 numpy 的 YOLOv11 子模組（例如 pipeline、sweep）。"""
+    if STRATEGY_DIR not in sys.path:
+        sys.path.insert(0, STRATEGY_DIR)
+    return importlib.import_module(f"YOLOv11.{name}")
+
+
+def fake_detection(center_x=50.0, center_y=40.0):
+    """以 infer 實際使用的 build_candidate / build_found_response 組出命中結果，再補上 infer 附加的欄位。"""
+    infer_module = sys.modules["YOLOv11.infer"]
+    best = infer_module.build_candidate(
+        "person", 0.9, [center_x - 10, center_y - 10, center_x + 10, center_y + 10]
+    )
+    response = infer_module.build_found_response(best, (100, 80))
+    response.update({"model_cached": True, "backend": "pytorch", "timing_ms": {"predict": 1.0, "total": 1.0}})
+    return response
+
+
+@unittest.skipIf(numpy is None, "需要 numpy")
+class RunnerTestCase(unittest.TestCase):
+    """建立暫存權重與影像檔，並在每個測試後還原模組層級狀態。"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.runner = load_runner()
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.weights_path = os.path.join(self.temp_dir.name, "best.pt")
+        self.image_path = os.path.join(self.temp_dir.name, "a.jpg")
+        with open(self.weights_path, "wb") as handle:
+            handle.write(b"weights")
+        with open(self.image_path, "wb") as handle:
+            handle.write(b"image-bytes")
+        self.runner.TRACK_FILTERS.reset(None)
+        self.addCleanup(self.runner.TRACK_FILTERS.reset, None)
+
+    def infer_payload(self, **extra):
+        payload = {
+            "op": "infer",
+            "image_path": self.image_path,
+            "weights_path": self.weights_path,
+            "conf": 0.5,
+            "target": "person",
+        }
+        payload.update(extra)
+        return payload
+
+
+class ResultCacheOpsTest(RunnerTestCase):
+    def test_result_cache_is_disabled_by_default(self):
+        if "YOLO_RESULT_CACHE_SIZE" not in os.environ:
+            self.assertFalse(self.runner.RESULT_CACHE.enabled)
+        with mock.patch.object(self.runner, "RESULT_CACHE", self._cache(0)), \
+                mock.patch.object(self.runner, "infer", return_value=fake_detection()) as infer:
+            self.runner.dispatch_request(self.infer_payload())
+            self.runner.dispatch_request(self.infer_payload())
+            stats = self.runner.dispatch_request({"op": "cache_stats"})
+        self.assertEqual(infer.call_count, 2)
+        self.assertEqual(stats, {"ok": True, "hits": 0, "misses": 0, "hit_rate": 0.0, "size": 0, "capacity": 0})
+
+    def test_cache_stats_and_clear_cache(self):
+        with mock.patch.object(self.runner, "RESULT_CACHE", self._cache(8)), \
+                mock.patch.object(self.runner, "infer", return_value=fake_detection()) as infer:
+            first = self.runner.dispatch_request(self.infer_payload())
+            second = self.runner.dispatch_request(self.infer_payload())
+            stats = self.runner.dispatch_request({"op": "cache_stats"})
+            cleared = self.runner.dispatch_request({"op": "clear_cache"})
+            after_clear = self.runner.dispatch_request({"op": "cache_stats"})
+            bypass = self.runner.dispatch_request(self.infer_payload(result_cache=False))
+
+        self.assertEqual(infer.call_count, 2)
+        self.assertNotIn("cached", first)
+        self.assertTrue(second["cached"])
+        self.assertEqual(second["cache_source"], "result")
+        self.assertEqual(set(second["timing_ms"]), {"cache_lookup"})
+        self.assertEqual(second["center"], first["center"])
+        for key in ("label", "conf", "bbox", "image_size"):
+            self.assertEqual(second[key], first[key])
+        self.assertEqual(second["image_size"], {"w": 100, "h": 80})
+        self.assertEqual(stats, {"ok": True, "hits": 1, "misses": 1, "hit_rate": 0.5, "size": 1, "capacity": 8})
+        self.assertEqual(cleared, {"ok": True})
+        self.assertEqual(after_clear["hits"], 0)
+        self.assertEqual(after_clear["misses"], 0)
+        self.assertEqual(after_clear["size"], 0)
+        self.assertNotIn("cached", bypass)
+
+    def test_frame_input_skips_result_cache(self):
+        cache = self._cache(8)
+        frame = {"shape": [4, 4, 3], "dtype": "uint8"}
+        with mock.patch.object(self.runner, "RESULT_CACHE", cache), \
+                mock.patch.object(self.runner, "infer_image", return_value=fake_detection()) as infer_image:
+            for _ in range(2):
+                self.runner.dispatch_request(
+                    {"op": "infer", "frame": frame, "weights_path": self.weights_path, "conf": 0.5, "target": "person"},
+                    frame_payload=bytes(48),
+                )
+        self.assertEqual(infer_image.call_count, 2)
+        self.assertEqual(cache.stats()["misses"], 0)
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def _cache(self, capacity):
+        result_cache = sys.modules["YOLOv11.result_cache"]
+        return result_cache.ResultCache(capacity)
+
+
+class HashFileTest(unittest.TestCase):
+    def setUp(self):
+        self.result_cache = load_yolo_module("result_cache")
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = os.path.join(temp_dir.name, "frame.jpg")
+        self.write(b"first-frame")
+        self.result_cache._FILE_DIGESTS.clear()
+        self.addCleanup(self.result_cache._FILE_DIGESTS.clear)
+
+    def write(self, content, path=None):
+        with open(path or self.path, "wb") as handle:
+            handle.write(content)
+
+    def test_recently_written_file_is_not_memoized(self):
+        digest = self.result_cache.hash_file(self.path)
+        self.assertEqual(self.result_cache.hash_file(self.path), digest)
+        self.assertEqual(len(self.result_cache._FILE_DIGESTS), 0)
+
+    def test_settled_file_is_memoized(self):
+        with mock.patch.object(self.result_cache, "FILE_DIGEST_SETTLE_NS", 0):
+            digest = self.result_cache.hash_file(self.path)
+            with mock.patch("builtins.open", side_effect=AssertionError("不應重讀檔案")):
+                self.assertEqual(self.result_cache.hash_file(self.path), digest)
+
+    def test_same_size_rewrite_with_restored_mtime_is_rehashed(self):
+        with mock.patch.object(self.result_cache, "FILE_DIGEST_SETTLE_NS", 0):
+            first = self.result_cache.hash_file(self.path)
+            stat = os.stat(self.path)
+            # 核心時間戳記以粗粒度時鐘更新，稍候確保 ctime 前進
+            time.sleep(0.05)
+            self.write(b"other-frame")
+            os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            self.assertEqual(os.stat(self.path).st_mtime_ns, stat.st_mtime_ns)
+            self.assertNotEqual(self.result_cache.hash_file(self.path), first)
+
+    def test_file_replaced_by_rename_is_rehashed(self):
+        with mock.patch.object(self.result_cache, "FILE_DIGEST_SETTLE_NS", 0):
+            first = self.result_cache.hash_file(self.path)
+            stat = os.stat(self.path)
+            replacement = self.path + ".tmp"
+            self.write(b"other-frame", replacement)
+            os.utime(replacement, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            os.replace(replacement, self.path)
+            self.assertNotEqual(self.result_cache.hash_file(self.path), first)
+
+
+class StubBoxes:
+    """模擬 ultralytics Boxes：cls/conf/xyxy/id 皆為 numpy 陣列。"""
+
+    def __init__(self, xyxy, track_id):
+        self.xyxy = numpy.array(xyxy, dtype=float).reshape(-1, 4)
+        self.cls = numpy.zeros(len(self.xyxy))
+        self.conf = numpy.full(len(self.xyxy), 0.9)
+        self.id = numpy.full(len(self.xyxy), float(track_id)) if len(self.xyxy) else None
+
+    def __len__(self):
+        return len(self.xyxy)
+
+
+class StubTracker:
+    """以像素門檻找出畫面中的亮色方塊，回傳與 model.track 相同形狀的結果。"""
+
+    names = {0: "person", 1: "cat"}
+
+    def __init__(self):
+        self.calls = []
+
+    def track(self, source, **kwargs):
+        self.calls.append(kwargs)
+        ys, xs = numpy.nonzero(source.max(axis=2) > 127)
+        xyxy = [[xs.min(), ys.min(), xs.max() + 1, ys.max() + 1]] if xs.size else []
+        return [types.SimpleNamespace(names=None, boxes=StubBoxes(xyxy, track_id=7))]
+
+
+def render_clip_frames(count, width=96, height=64, size=16, step=4):
+    """產生方塊由左往右移動的影格；最後一格留白，模擬目標離開畫面。"""
+    frames = []
+    for index in range(count):
+        frame = numpy.zeros((height, width, 3), dtype=numpy.uint8)
+        if index < count - 1:
+            left = 8 + index * step
+            frame[24:24 + size, left:left + size] = 255
+        frames.append(frame)
+    return frames
+
+
+class TrackOpsTest(RunnerTestCase):
+    SUMMARY_KEYS = {"ok", "done", "frames", "found_frames", "last_track_id", "backend", "elapsed_ms", "fps"}
+    RECORD_KEYS = {"ok", "frame", "timestamp_ms", "found", "image_size", "timing_ms"}
+    FOUND_KEYS = RECORD_KEYS | {"label", "conf", "bbox", "center", "track_id"}
+
+    def run_track(self, model, **parameters):
+        records = []
+        payload = {"op": "track", "weights_path": self.weights_path, "conf": 0.5, "target": "person", **parameters}
+        with mock.patch.object(sys.modules["YOLOv11.track"], "load_model", return_value=model):
+            summary = self.runner.dispatch_request(payload, emit=records.append)
+        return summary, records
+
+    def assert_tracked(self, summary, records, frame_count):
+        self.assertEqual(set(summary), self.SUMMARY_KEYS)
+        self.assertTrue(summary["done"])
+        self.assertEqual(summary["frames"], frame_count)
+        self.assertEqual(summary["found_frames"], frame_count - 1)
+        self.assertEqual(summary["last_track_id"], 7)
+        self.assertEqual([record["frame"] for record in records], list(range(frame_count)))
+
+        found = [record for record in records if record["found"]]
+        for record in found:
+            self.assertEqual(set(record), self.FOUND_KEYS)
+            self.assertEqual(record["label"], "person")
+            self.assertEqual(record["track_id"], 7)
+            self.assertEqual(record["image_size"], {"w": 96, "h": 64})
+            self.assertEqual(set(record["timing_ms"]), {"queue_wait", "track"})
+        self.assertEqual(set(records[-1]), self.RECORD_KEYS)
+        self.assertFalse(records[-1]["found"])
+
+        # 方塊每格右移 4 px，中心應單調右移且 y 維持不變
+        centers = [record["center"] for record in found]
+        self.assertTrue(all(later["x"] > earlier["x"] for earlier, later in zip(centers, centers[1:])))
+        self.assertTrue(all(abs(center["y"] - 32) <= 1 for center in centers))
+
+    def test_track_frame_sequence(self):
+        frame_paths = []
+        for index, frame in enumerate(render_clip_frames(6)):
+            frame_path = os.path.join(self.temp_dir.name, f"{index:03d}.npy")
+            numpy.save(frame_path, frame)
+            frame_paths.append(frame_path)
+
+        model = StubTracker()
+        with mock.patch.object(sys.modules["YOLOv11.track"], "load_image", numpy.load):
+            summary, records = self.run_track(model, frames=frame_paths)
+        self.assert_tracked(summary, records, 6)
+        self.assertTrue(all(call["persist"] and call["classes"] == [0] for call in model.calls))
+
+        with mock.patch.object(sys.modules["YOLOv11.track"], "load_image", numpy.load):
+            summary, records = self.run_track(StubTracker(), frames=frame_paths, max_frames=3)
+        self.assertEqual(summary["frames"], 3)
+        self.assertEqual(len(records), 3)
+
+    def test_track_rejects_unknown_target_class(self):
+        with self.assertRaises(self.runner.RunnerError) as raised:
+            self.run_track(StubTracker(), frames=[self.image_path], target="dog")
+        self.assertEqual(raised.exception.code, "INFER_FAILED")
+
+    @unittest.skipIf(cv2 is None, "需要 opencv-python")
+    def test_track_video_clip(self):
+        clip_path = os.path.join(self.temp_dir.name, "clip.avi")
+        frames = render_clip_frames(12)
+        writer = cv2.VideoWriter(clip_path, cv2.VideoWriter_fourcc(*"MJPG"), 10.0, (96, 64))
+        self.assertTrue(writer.isOpened())
+        for frame in frames:
+            writer.write(frame)
+        writer.release()
+
+        summary, records = self.run_track(StubTracker(), source=clip_path)
+        self.assert_tracked(summary, records, len(frames))
+        # 影片來源使用影片本身的時間戳（10 fps）
+        timestamps = [record["timestamp_ms"] for record in records]
+        self.assertTrue(all(later > earlier for earlier, later in zip(timestamps, timestamps[1:])))
+
+    @unittest.skipUnless(
+        cv2 is not None and all(os.environ.get(name) for name in ("YOLO_TEST_CLIP", "YOLO_TEST_WEIGHTS", "YOLO_TEST_TARGET")),
+        "需設定 YOLO_TEST_CLIP / YOLO_TEST_WEIGHTS / YOLO_TEST_TARGET 並安裝 ultralytics",
+    )
+    def test_track_real_recording_with_model(self):
+        """以實際錄影與權重執行完整追蹤（不替換模型），目標應在多數影格被找到且 track id 保持穩定。"""
+        records = []
+        summary = self.runner.dispatch_request(
+            {
+                "op": "track",
+                "source": os.environ["YOLO_TEST_CLIP"],
+                "weights_path": os.environ["YOLO_TEST_WEIGHTS"],
+                "target": os.environ["YOLO_TEST_TARGET"],
+                "conf": 0.25,
+            },
+            emit=records.append,
+        )
+        self.assertEqual(summary["frames"], len(records))
+        self.assertGreater(summary["found_frames"], summary["frames"] // 2)
+        track_ids = [record["track_id"] for record in records if record["found"]]
+        self.assertGreaterEqual(track_ids.count(summary["last_track_id"]), len(track_ids) // 2)
+
+
+class FilterOpsTest(RunnerTestCase):
+    FILTERED_KEYS = {"center", "velocity", "position_std", "age_ms", "stale", "updates"}
+
+    def infer_at(self, center_x, timestamp_ms, **filter_options):
+        with mock.patch.object(self.runner, "infer", return_value=fake_detection(center_x=center_x)):
+            return self.runner.dispatch_request(
+                self.infer_payload(filter={"key": "cam0", **filter_options}, timestamp_ms=timestamp_ms)
+            )
+
+    def test_filter_predict_and_reset_filter(self):
+        self.infer_at(50.0, 1000.0)
+        response = self.infer_at(60.0, 1100.0)
+        self.assertEqual(set(response["filtered"]), self.FILTERED_KEYS)
+        self.assertEqual(response["filtered"]["updates"], 2)
+        self.assertEqual((response["label"], response["image_size"]), ("person", {"w": 100, "h": 80}))
+        self.assertGreater(response["filtered"]["velocity"]["x"], 0)
+
+        predicted = self.runner.dispatch_request({"op": "predict", "key": "cam0", "timestamp_ms": 1200.0})
+        self.assertTrue(predicted["ok"])
+        self.assertEqual(predicted["key"], "cam0")
+        self.assertEqual(set(predicted) - {"ok", "key"}, self.FILTERED_KEYS)
+        self.assertGreater(predicted["center"]["x"], response["filtered"]["center"]["x"])
+
+        self.assertEqual(self.runner.dispatch_request({"op": "reset_filter", "key": "cam0"}), {"ok": True})
+        with self.assertRaises(self.runner.RunnerError) as raised:
+            self.runner.dispatch_request({"op": "predict", "key": "cam0", "timestamp_ms": 1200.0})
+        self.assertEqual(raised.exception.code, "NO_TRACK")
+
+    def test_reset_filter_without_key_clears_every_filter(self):
+        self.infer_at(50.0, 1000.0)
+        with mock.patch.object(self.runner, "infer", return_value=fake_detection()):
+            self.runner.dispatch_request(self.infer_payload(filter={"key": "cam1"}, timestamp_ms=1000.0))
+        self.assertEqual(self.runner.dispatch_request({"op": "reset_filter"}), {"ok": True})
+        for key in ("cam0", "cam1"):
+            with self.assertRaises(self.runner.RunnerError):
+                self.runner.dispatch_request({"op": "predict", "key": key, "timestamp_ms": 1100.0})
+
+    def test_changed_noise_options_apply_to_existing_filter(self):
+        self.infer_at(50.0, 1000.0)
+        smoothed = self.infer_at(90.0, 1100.0)
+        self.assertLess(smoothed["filtered"]["center"]["x"], 90)
+
+        # 等速外插約為 130；量測雜訊調大後應幾乎忽略偏離的量測，代表新設定已套用到既有濾波器
+        distrusted = self.infer_at(60.0, 1200.0, measurement_noise=1000.0)
+        self.assertGreater(distrusted["filtered"]["center"]["x"], 110)
+        self.assertEqual(distrusted["filtered"]["updates"], 3)
+
+
+class OrderedPipelineTest(unittest.TestCase):
+    """prepare 平行、process 依序、emit 依提交順序；有界佇列在推論卡住時讓 submit 阻塞。"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pipeline = load_yolo_module("pipeline")
+
+    def setUp(self):
+        self.records = []
+        self.prepared = []
+
+    def make_pipeline(self, prepare, process=None, depth=2, workers=4):
+        def default_process(item, prepared, emit):
+            emit({"item": item, "prepared": prepared})
+
+        pipeline = self.pipeline.OrderedPipeline(prepare, process or default_process, self.records.append, depth, workers)
+        self.addCleanup(self.assert_stopped)
+        return pipeline
+
+    def assert_stopped(self):
+        names = {thread.name for thread in threading.enumerate()}
+        self.assertFalse({"yolo-process", "yolo-emit"} & names)
+        self.assertFalse(any(name.startswith("yolo-prepare") for name in names))
+
+    def test_output_follows_submission_order(self):
+        def prepare(item):
+            # 越早提交的請求解碼越久，完成順序與提交順序相反
+            time.sleep(0.02 * (6 - item))
+            self.prepared.append(item)
+            return item * 10
+
+        pipeline = self.make_pipeline(prepare)
+        for item in range(6):
+            pipeline.submit(item)
+            if item == 2:
+                pipeline.emit({"protocol_error": True})
+        pipeline.close()
+
+        self.assertNotEqual(self.prepared, sorted(self.prepared))
+        self.assertEqual(
+            self.records,
+            [{"item": item, "prepared": item * 10} for item in range(3)]
+            + [{"protocol_error": True}]
+            + [{"item": item, "prepared": item * 10} for item in range(3, 6)],
+        )
+
+    def test_prepare_failure_falls_back_to_process(self):
+        def prepare(item):
+            if item == 1:
+                raise OSError("decode failed")
+            return "decoded"
+
+        pipeline = self.make_pipeline(prepare)
+        with mock.patch.object(sys, "stderr", io.StringIO()) as stderr:
+            for item in range(3):
+                pipeline.submit(item)
+            pipeline.close()
+
+        self.assertEqual([record["prepared"] for record in self.records], ["decoded", None, "decoded"])
+        self.assertIn("decode failed", stderr.getvalue())
+
+    def test_process_and_emit_failures_do_not_stall_the_pipeline(self):
+        def process(item, prepared, emit):
+            if item == 0:
+                raise RuntimeError("process failed")
+            emit({"item": item})
+
+        def emit(record):
+            if record["item"] == 1:
+                raise BrokenPipeError("stdout closed")
+            delivered.append(record)
+
+        delivered = []
+        pipeline = self.pipeline.OrderedPipeline(lambda item: item, process, emit, 1, 1)
+        self.addCleanup(self.assert_stopped)
+        with mock.patch.object(sys, "stderr", io.StringIO()):
+            for item in range(4):
+                pipeline.submit(item)
+            pipeline.close()
+        self.assertEqual(delivered, [{"item": 2}, {"item": 3}])
+
+    def test_bounded_queue_blocks_submit_while_process_is_stalled(self):
+        gate = threading.Event()
+        submitted = []
+
+        def process(item, prepared, emit):
+            gate.wait(5)
+            emit({"item": item})
+
+        pipeline = self.make_pipeline(lambda item: item, process, depth=1, workers=1)
+
+        def producer():
+            for item in range(6):
+                pipeline.submit(item)
+                submitted.append(item)
+
+        thread = threading.Thread(target=producer)
+        thread.start()
+        time.sleep(0.2)
+        # process 持有 1 筆、推論佇列 1 筆，其餘 submit 應阻塞
+        self.assertLessEqual(len(submitted), 3)
+        gate.set()
+        thread.join(5)
+        pipeline.close()
+        self.assertEqual([record["item"] for record in self.records], list(range(6)))
+
+
+class ServePipelineTest(RunnerTestCase):
+    """常駐模式啟用管線時，stdin EOF 應輸出所有已提交的請求並結束所有管線執行緒。"""
+
+    def assert_pipeline_threads_stopped(self):
+        names = [thread.name for thread in threading.enumerate()]
+        self.assertFalse([name for name in names if name.startswith("yolo-")])
+
+    def test_json_serve_flushes_pending_requests_on_eof(self):
+        requests = [
+            {"id": 1, "op": "cache_stats"},
+            {"id": 2, "op": "infer", "image_path": os.path.join(self.temp_dir.name, "missing.jpg")},
+            {"id": 3, "op": "predict", "key": "none", "timestamp_ms": 0},
+            {"id": 4, "op": "cache_stats"},
+        ]
+        stdin = io.StringIO("".join(json.dumps(request) + "\n" for request in requests) + "not json\n")
+        stdout = io.StringIO()
+        with mock.patch.object(sys, "stdin", stdin), mock.patch.object(sys, "stdout", sys.stdout), \
+                mock.patch.object(sys, "stderr", io.StringIO()), mock.patch.object(self.runner, "PROTOCOL_STDOUT", stdout):
+            self.runner.serve(pipeline_depth=2, decode_workers=2)
+
+        responses = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual([response["id"] for response in responses], [1, 2, 3, 4, None])
+        self.assertEqual([response["ok"] for response in responses], [True, False, False, True, False])
+        self.assert_pipeline_threads_stopped()
+
+    def test_binary_serve_stops_cleanly_on_truncated_stream(self):
+        stream = io.BytesIO()
+        for request in ({"id": 1, "op": "cache_stats"}, {"id": 2, "op": "reset_filter"}):
+            header = json.dumps(request).encode("utf-8")
+            stream.write(struct.pack(">I", len(header)) + header)
+        # 只寫了一半的長度前綴，視為 EOF
+        stream.write(b"\x00\x00")
+        stream.seek(0)
+
+        records = []
+        pipeline = self.runner.OrderedPipeline(
+            self.runner.prepare_serve_request, self.runner.process_serve_request, records.append, 2, 2
+        )
+        self.runner.serve_binary_stream(stream, pipeline)
+        pipeline.close()
+
+        self.assertEqual([record["id"] for record in records], [1, 2])
+        self.assertTrue(all(record["ok"] for record in records))
+        self.assert_pipeline_threads_stopped()
+
+
+def open_fd_count():
+    return len(os.listdir("/proc/self/fd"))
+
+
+@unittest.skipUnless(numpy is not None and os.path.isdir("/proc/self/fd"), "需要 numpy 與 /proc/self/fd")
+class SharedFrameTest(unittest.TestCase):
+    """影格仍被外部引用時（ultralytics 會保留 orig_img），重複附掛同一段 shared memory 不可累積 fd。"""
+
+    @classmethod
+    def setUpClass(cls):
+        load_runner()
+        cls.frame_input = sys.modules["YOLOv11.frame_input"]
+
+    def setUp(self):
+        self.addCleanup(self.frame_input.close_shared_frames)
+        self.unlinked = []
+        self.segment = self.create_segment(bytes(range(48)))
+        self.spec = {"shm_name": self.segment.name, "shape": [4, 4, 3]}
+        self.unraisable = []
+        hook = mock.patch.object(sys, "unraisablehook", self.unraisable.append)
+        hook.start()
+        self.addCleanup(hook.stop)
+
+    def create_segment(self, content, name=None):
+        shared_memory = importlib.import_module("multiprocessing.shared_memory")
+        segment = shared_memory.SharedMemory(name=name, create=True, size=len(content))
+        segment.buf[:len(content)] = content
+        self.addCleanup(self.unlink_segment, segment)
+        return segment
+
+    def unlink_segment(self, segment):
+        if segment in self.unlinked:
+            return
+        self.unlinked.append(segment)
+        if sys.version_info < (3, 13):
+            # 同一行程附掛時 runner 會取消 resource_tracker 登記，unlink 前補回以免 tracker 回報 KeyError
+            resource_tracker = importlib.import_module("multiprocessing.resource_tracker")
+            resource_tracker.register(segment._name, "shared_memory")
+        segment.close()
+        segment.unlink()
+
+    def open_held_frames(self, count):
+        held = []
+        for _ in range(count):
+            with self.frame_input.open_frame(self.spec) as frame:
+                held.append(frame)
+        return held
+
+    def test_repeated_attach_keeps_fd_count_flat(self):
+        if not self.frame_input.REUSE_SHARED_ATTACHMENTS:
+            self.skipTest("此平台不沿用 shared memory 附掛")
+        baseline = open_fd_count()
+        held = self.open_held_frames(50)
+        # 附掛本身佔用 shm fd 與 mmap 複製的 fd 各一個
+        self.assertLessEqual(open_fd_count(), baseline + 2)
+        self.assertEqual(held[-1][0, 0].tolist(), [0, 1, 2])
+        self.assertEqual(held[0][3, 3].tolist(), [45, 46, 47])
+
+        held.clear()
+        self.open_held_frames(50)
+        self.assertLessEqual(open_fd_count(), baseline + 2)
+        self.frame_input.close_shared_frames()
+        self.assertEqual(open_fd_count(), baseline)
+        self.assertEqual(self.unraisable, [])
+
+    def test_recreated_segment_is_attached_again(self):
+        if not self.frame_input.REUSE_SHARED_ATTACHMENTS:
+            self.skipTest("此平台不沿用 shared memory 附掛")
+        held = self.open_held_frames(1)
+        name = self.segment.name
+        self.unlink_segment(self.segment)
+        self.create_segment(bytes([200] * 48), name=name)
+
+        with self.frame_input.open_frame(self.spec) as frame:
+            self.assertEqual(frame[0, 0].tolist(), [200, 200, 200])
+        # 舊區段的影格仍可讀取
+        self.assertEqual(held[0][0, 0].tolist(), [0, 1, 2])
+        self.assertEqual(self.unraisable, [])
+
+    def test_fallback_closes_fd_when_frame_is_still_referenced(self):
+        with mock.patch.object(self.frame_input, "REUSE_SHARED_ATTACHMENTS", False):
+            baseline = open_fd_count()
+            held = self.open_held_frames(50)
+            # 仍被引用的對應各自保留 mmap 的 fd，引用消失後必須全部釋放
+            self.assertEqual(held[-1][0, 0].tolist(), [0, 1, 2])
+            held.clear()
+            self.assertEqual(open_fd_count(), baseline)
+        self.assertEqual(self.unraisable, [])
+
+if __name__ == "__main__":
+    unittest.main()
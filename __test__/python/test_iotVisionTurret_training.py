@@ -0,0 +1,370 @@
+# __test__/python/test_iotVisionTurret_training.py
+# 檔案用途：驗證 iotVisionTurret 訓練工具：sweep.py 的排程、淘汰、推廣與子行程回收，以及 prepare_dataset.py 的增量快取與 imread 替換
+# 執行方式：python -m unittest discover -s __test__/python
+import importlib
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+STRATEGY_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "src", "plugins", "iotVisionTurret", "strategies", "local")
+)
+if STRATEGY_DIR not in sys.path:
+    sys.path.insert(0, STRATEGY_DIR)
+
+sweep = importlib.import_module("YOLOv11.sweep")
+prepare_dataset = importlib.import_module("YOLOv11.prepare_dataset")
+
+try:
+    import cv2
+    import numpy
+except ImportError:  # pragma: no cover - 依環境略過
+    cv2 = None
+
+# 忽略 SIGTERM 的子行程，模擬收到中止訊號後仍在收尾的訓練行程
+STUBBORN_CHILD = "import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); print('ready', flush=True); time.sleep(60)"
+
+
+def sweep_config(project, **overrides):
+    """組出測試用的 SweepConfig；未指定的欄位使用 CLI 預設值。"""
+    values = dict(
+        data="data.yaml", models=["yolo11n.pt"], imgsz=[320, 640], batch=[16], epochs=[10], device="cpu",
+        project=project, name="sweep", out_weights=os.path.join(project, "promoted", "best.pt"),
+        cpu_budget=8, ram_budget_gb=0.0, trial_ram_gb=4.0, max_parallel=0, trial_workers=2, patience=100,
+        cache="none", metric="map50-95", grace_epochs=2, min_peers=2, poll_seconds=0.5,
+    )
+    values.update(overrides)
+    return sweep.SweepConfig(**values)
+
+
+def write_results_csv(trial, scores):
+    """以舊版 ultralytics 的格式（欄位名稱前後帶空白）寫入每個 epoch 的指標。"""
+    trial.trial_dir.mkdir(parents=True, exist_ok=True)
+    lines = ["                  epoch,   metrics/mAP50(B),metrics/mAP50-95(B)"]
+    lines += [f"{epoch:>23},{score + 0.2:>19},{score:>20}" for epoch, score in enumerate(scores, 1)]
+    (trial.trial_dir / "results.csv").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def spawn_stubborn_child():
+    process = subprocess.Popen([sys.executable, "-c", STUBBORN_CHILD], stdout=subprocess.PIPE)
+    # 等子行程設定好 SIGTERM 處理後才回傳，避免訊號在設定前送達
+    process.stdout.readline()
+    process.stdout.close()
+    return process
+
+
+class SweepTestCase(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.project = temp_dir.name
+
+    def make_trials(self, count, **overrides):
+        config = sweep_config(self.project, imgsz=[320 + 32 * index for index in range(count)], **overrides)
+        return config, sweep.build_trials(config)
+
+
+class PlanSlotsTest(SweepTestCase):
+    def test_slots_follow_the_tightest_budget(self):
+        config = sweep_config(self.project, cpu_budget=8)
+        self.assertEqual(sweep.plan_slots(config, 12), 8)
+        self.assertEqual(sweep.plan_slots(config, 3), 3)
+
+        config = sweep_config(self.project, cpu_budget=8, ram_budget_gb=10.0, trial_ram_gb=4.0)
+        self.assertEqual(sweep.plan_slots(config, 12), 2)
+
+        config = sweep_config(self.project, cpu_budget=8, ram_budget_gb=64.0, trial_ram_gb=4.0, max_parallel=3)
+        self.assertEqual(sweep.plan_slots(config, 12), 3)
+
+        # 記憶體預算小於單一組合時仍至少執行一個
+        config = sweep_config(self.project, cpu_budget=8, ram_budget_gb=2.0, trial_ram_gb=4.0)
+        self.assertEqual(sweep.plan_slots(config, 12), 1)
+
+
+class MedianPruningTest(SweepTestCase):
+    def test_median_rule_respects_grace_epochs_and_min_peers(self):
+        config, trials = self.make_trials(4, grace_epochs=3, min_peers=2)
+        leader, middle, laggard, newcomer = trials
+        leader.history = [0.2, 0.4, 0.5]
+        middle.history = [0.1, 0.3, 0.45, 0.5]
+        laggard.history = [0.1, 0.2, 0.25]
+        newcomer.history = [0.01]
+
+        # 未過 grace epochs 的組合不淘汰
+        self.assertFalse(sweep.should_prune(newcomer, trials, config))
+        # 以同一 epoch 的最佳指標比較：同伴為 0.5 與 0.45，中位數 0.475
+        self.assertTrue(sweep.should_prune(laggard, trials, config))
+        self.assertFalse(sweep.should_prune(leader, trials, config))
+
+        # 同一 epoch 的同伴不足 min_peers 時不比較
+        config.min_peers = 3
+        self.assertFalse(sweep.should_prune(laggard, trials, config))
+
+    @unittest.skipIf(os.name == "nt", "需要 POSIX 訊號")
+    def test_poll_reads_results_csv_and_prunes_without_blocking(self):
+        config, trials = self.make_trials(3, grace_epochs=2, min_peers=2)
+        for trial, scores in zip(trials, ([0.3, 0.5, 0.6], [0.3, 0.45, 0.5], [0.1, 0.15, 0.2])):
+            write_results_csv(trial, scores)
+            trial.status = "running"
+        trials[0].process = mock.Mock(**{"poll.return_value": None})
+        trials[1].process = mock.Mock(**{"poll.return_value": 0})
+        trials[2].process = spawn_stubborn_child()
+        self.addCleanup(trials[2].process.wait)
+        self.addCleanup(trials[2].process.kill)
+
+        with mock.patch.object(sweep, "TERMINATE_TIMEOUT_S", 0.3), mock.patch("builtins.print"):
+            started = time.monotonic()
+            sweep.poll_trials(trials, config)
+            # 送出 SIGTERM 後立即返回，不等待行程結束
+            self.assertLess(time.monotonic() - started, 0.2)
+
+            self.assertEqual(trials[0].history, [0.3, 0.5, 0.6])
+            self.assertEqual(trials[0].scores, {"map50-95": 0.6, "map50": 0.8})
+            self.assertEqual(trials[1].status, "done")
+            self.assertEqual(trials[2].status, "stopping")
+            self.assertIsNone(trials[2].process.poll())
+
+            # 逾時後改送 SIGKILL，下一次輪詢回收
+            time.sleep(0.35)
+            sweep.poll_trials(trials, config)
+            trials[2].process.wait(5)
+            sweep.poll_trials(trials, config)
+
+        self.assertEqual(trials[2].status, "pruned")
+        self.assertEqual(trials[2].return_code, -signal.SIGKILL)
+        self.assertEqual(trials[0].status, "running")
+
+    def test_stopping_trial_keeps_its_slot_until_reaped(self):
+        config, trials = self.make_trials(3, max_parallel=1, poll_seconds=0.0)
+        started = []
+
+        def start_trial(trial, threads):
+            trial.status = "running"
+            trial.process = mock.Mock(**{"poll.return_value": None})
+            started.append((trial.config.name, trials[0].status))
+
+        def poll_trials(trials, config):
+            for trial in trials:
+                if trial.status == "running" and trial.index == 0:
+                    trial.status = "stopping"
+                elif trial.status == "stopping":
+                    trial.status = "pruned"
+                elif trial.status == "running":
+                    trial.status = "done"
+
+        with mock.patch.object(sweep, "start_trial", side_effect=start_trial), \
+                mock.patch.object(sweep, "poll_trials", side_effect=poll_trials), mock.patch("builtins.print"):
+            sweep.run_sweep(config, trials)
+
+        # trial_00 在 stopping 期間仍佔用唯一的名額，回收後 trial_01 才啟動
+        self.assertEqual(started, [("trial_00", "running"), ("trial_01", "pruned"), ("trial_02", "pruned")])
+        self.assertEqual([trial.status for trial in trials], ["pruned", "done", "done"])
+
+
+@unittest.skipIf(os.name == "nt", "需要 POSIX 訊號")
+class ShutdownTest(SweepTestCase):
+    def test_interrupted_sweep_reaps_every_child(self):
+        config, trials = self.make_trials(2, poll_seconds=0.0)
+        processes = []
+
+        def start_trial(trial, threads):
+            trial.process = spawn_stubborn_child()
+            trial.status = "running"
+            processes.append(trial.process)
+
+        with mock.patch.object(sweep, "start_trial", side_effect=start_trial), \
+                mock.patch.object(sweep, "TERMINATE_TIMEOUT_S", 0.3), \
+                mock.patch.object(sweep, "poll_trials", side_effect=KeyboardInterrupt), \
+                mock.patch("builtins.print"):
+            with self.assertRaises(KeyboardInterrupt):
+                sweep.run_sweep(config, trials)
+
+        self.assertEqual(len(processes), 2)
+        # 忽略 SIGTERM 的子行程在期限後被 SIGKILL，且都已被 wait 回收
+        self.assertEqual([process.returncode for process in processes], [-signal.SIGKILL] * 2)
+        self.assertEqual([trial.status for trial in trials], ["interrupted"] * 2)
+
+
+class PromoteBestTest(SweepTestCase):
+    def test_promotes_highest_finished_trial_and_writes_results(self):
+        config, trials = self.make_trials(4)
+        statuses = ["done", "done", "pruned", "done"]
+        scores = [[0.3, 0.5], [0.4, 0.6], [0.2, 0.9], [0.1, 0.7]]
+        for trial, status, history in zip(trials, statuses, scores):
+            write_results_csv(trial, history)
+            trial.history = sweep.read_metric_history(trial)[config.metric]
+            trial.scores = {name: max(values) for name, values in sweep.read_metric_history(trial).items()}
+            trial.status = status
+        # 指標最高的 trial_03 沒有留下權重，不能被推廣
+        for trial in trials[:3]:
+            Path(trial.config.out_weights).write_bytes(trial.config.name.encode("utf-8"))
+
+        rows = sweep.build_results(trials)
+        csv_path = sweep.write_results(config, rows)
+        best = sweep.promote_best(config, rows)
+
+        self.assertTrue(csv_path.is_file())
+        self.assertEqual(best["trial"], "trial_01")
+        self.assertEqual(Path(config.out_weights).read_bytes(), b"trial_01")
+        self.assertEqual([row["epochs_run"] for row in rows], [2, 2, 2, 2])
+
+    def test_no_finished_trial_promotes_nothing(self):
+        config, trials = self.make_trials(2)
+        for trial in trials:
+            trial.status = "pruned"
+        self.assertIsNone(sweep.promote_best(config, sweep.build_results(trials)))
+        self.assertFalse(os.path.exists(config.out_weights))
+
+
+
+def stub_ultralytics(images_dir):
+    """以替身模組取代 ultralytics：check_det_dataset 指向 images_dir，imread 與 seed_worker 記錄呼叫。"""
+    calls = {"imread": [], "seed_worker": []}
+
+    def imread(filename, flags=None):
+        calls["imread"].append(filename)
+        return "decoded-by-ultralytics"
+
+    data_base = types.ModuleType("ultralytics.data.base")
+    data_base.imread = imread
+    data_build = types.ModuleType("ultralytics.data.build")
+    data_build.seed_worker = calls["seed_worker"].append
+    data_utils = types.ModuleType("ultralytics.data.utils")
+    data_utils.check_det_dataset = lambda data_yaml: {"train": images_dir, "val": images_dir}
+    modules = {
+        "ultralytics": types.ModuleType("ultralytics"),
+        "ultralytics.data": types.ModuleType("ultralytics.data"),
+        "ultralytics.data.base": data_base,
+        "ultralytics.data.build": data_build,
+        "ultralytics.data.utils": data_utils,
+    }
+    return modules, calls
+
+
+@unittest.skipIf(cv2 is None, "需要 numpy 與 opencv-python")
+class DatasetCacheTest(unittest.TestCase):
+    IMGSZ = 64
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.images_dir = os.path.join(temp_dir.name, "images")
+        os.makedirs(self.images_dir)
+        self.cache_dir = os.path.join(temp_dir.name, "cache")
+        self.config = prepare_dataset.PrepareConfig(
+            data=os.path.join(temp_dir.name, "data.yaml"), imgsz=self.IMGSZ, cache_dir=self.cache_dir, workers=2
+        )
+        self.small = self.write_image("small.png", 40, 30, 50)
+        self.large = self.write_image("large.png", 200, 100, 150)
+
+        modules, self.calls = stub_ultralytics(self.images_dir)
+        for patcher in (
+            mock.patch.dict(sys.modules, modules),
+            mock.patch.dict(os.environ),
+            mock.patch.object(prepare_dataset, "_INSTALLED_CACHE", None),
+            mock.patch.object(prepare_dataset, "_ORIGINAL_SEED_WORKER", None),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.data_base = modules["ultralytics.data.base"]
+        self.data_build = modules["ultralytics.data.build"]
+
+    def write_image(self, name, width, height, value):
+        path = os.path.realpath(os.path.join(self.images_dir, name))
+        image = numpy.full((height, width, 3), value, dtype=numpy.uint8)
+        image[:, : width // 2, 0] = 255 - value
+        self.assertTrue(cv2.imwrite(path, image))
+        return path
+
+    def prepare(self):
+        decoded = []
+        original = prepare_dataset.try_load_resized
+
+        def spy(path, imgsz):
+            decoded.append(path)
+            return original(path, imgsz)
+
+        with mock.patch.object(prepare_dataset, "try_load_resized", side_effect=spy):
+            result = prepare_dataset.prepare_cache(self.config)
+        return result, decoded
+
+    def test_only_changed_images_are_reencoded(self):
+        first, decoded = self.prepare()
+        self.assertEqual((first["encoded"], first["reused"]), (2, 0))
+        self.assertEqual(sorted(decoded), sorted([self.small, self.large]))
+
+        unchanged, decoded = self.prepare()
+        self.assertEqual((unchanged["encoded"], unchanged["reused"]), (0, 2))
+        self.assertEqual(decoded, [])
+
+        # 相同尺寸重寫並推進修改時間，只有這張需要重新解碼
+        self.write_image("large.png", 200, 100, 30)
+        stat = os.stat(self.large)
+        os.utime(self.large, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        changed, decoded = self.prepare()
+        self.assertEqual((changed["encoded"], changed["reused"]), (1, 1))
+        self.assertEqual(decoded, [self.large])
+
+        cache = prepare_dataset.DatasetCache(self.cache_dir)
+        numpy.testing.assert_array_equal(cache.get(self.large), prepare_dataset.load_resized(self.large, self.IMGSZ))
+        numpy.testing.assert_array_equal(cache.get(self.small), cv2.imread(self.small, cv2.IMREAD_COLOR))
+
+    def test_patched_imread_serves_cached_arrays(self):
+        self.prepare()
+        original_imread = self.data_base.imread
+        cache = prepare_dataset.install_dataset_cache(self.cache_dir, self.IMGSZ)
+
+        cached = self.data_base.imread(self.large)
+        self.assertEqual(cached.shape, (32, 64, 3))
+        numpy.testing.assert_array_equal(cached, cache.get(self.large))
+        # 快取回傳可寫入的副本，HSV 增強原地修改不會影響下一次讀取
+        cached[:] = 0
+        self.assertGreater(int(self.data_base.imread(self.large).max()), 0)
+        self.assertEqual(self.calls["imread"], [])
+
+        # 非彩色讀取、快取外的檔案與建立快取後被修改的檔案都改走原本的 imread
+        self.assertEqual(self.data_base.imread(self.large, cv2.IMREAD_GRAYSCALE), "decoded-by-ultralytics")
+        self.assertEqual(self.data_base.imread(os.path.join(self.images_dir, "new.png")), "decoded-by-ultralytics")
+        os.utime(self.small, ns=(0, 0))
+        self.assertEqual(self.data_base.imread(self.small), "decoded-by-ultralytics")
+        self.assertEqual(len(self.calls["imread"]), 3)
+        self.assertIsNot(self.data_base.imread, original_imread)
+
+        with self.assertRaises(ValueError):
+            prepare_dataset.install_dataset_cache(self.cache_dir, self.IMGSZ * 2)
+
+    def test_worker_init_reinstalls_cache_in_spawned_workers(self):
+        self.prepare()
+        original_imread = self.data_base.imread
+        prepare_dataset.install_dataset_cache(self.cache_dir, self.IMGSZ)
+        self.assertIs(self.data_build.seed_worker, prepare_dataset.dataset_cache_worker_init)
+        self.assertIn(prepare_dataset.DATASET_CACHE_ENV, os.environ)
+
+        # 模擬 spawn 啟動的 worker：模組重新匯入，imread 與 seed_worker 為原始版本，只繼承環境變數
+        self.data_base.imread = original_imread
+        self.data_build.seed_worker = self.calls["seed_worker"].append
+        with mock.patch.object(prepare_dataset, "_INSTALLED_CACHE", None), \
+                mock.patch.object(prepare_dataset, "_ORIGINAL_SEED_WORKER", None):
+            prepare_dataset.dataset_cache_worker_init(3)
+            self.assertEqual(self.calls["seed_worker"], [3])
+            self.assertEqual(self.data_base.imread(self.large).shape, (32, 64, 3))
+            self.assertEqual(self.calls["imread"], [])
+
+    def test_missing_seed_worker_marks_cache_unsafe_for_spawned_workers(self):
+        self.prepare()
+        del self.data_build.seed_worker
+        with mock.patch.object(prepare_dataset.multiprocessing, "get_start_method", return_value="spawn"):
+            self.assertFalse(prepare_dataset.install_dataset_cache(self.cache_dir, self.IMGSZ).worker_safe)
+        with mock.patch.object(prepare_dataset.multiprocessing, "get_start_method", return_value="fork"):
+            self.assertTrue(prepare_dataset.install_dataset_cache(self.cache_dir, self.IMGSZ).worker_safe)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+# __test__/python/test_newsScraper_host_scheduler.py
+# 檔案用途：驗證 HostScheduler 的懲罰上限、等待逾時與由外部冷卻的主機
+# 執行方式：python -m unittest discover -s __test__/python
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+STRATEGY_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "src", "plugins", "newsScraper", "strategies", "local")
+)
+if STRATEGY_DIR not in sys.path:
+    sys.path.insert(0, STRATEGY_DIR)
+
+try:
+    import host_scheduler
+    import requests
+    from http_stubs import FakeResponse
+except ImportError:  # pragma: no cover - 依環境略過
+    host_scheduler = None
+
+URL = "https://news.example.com/a"
+
+
+@unittest.skipIf(host_scheduler is None, "需要 requests")
+class HostSchedulerTest(unittest.TestCase):
+    def blocked_for(self, scheduler, url=URL):
+        bucket = scheduler._host_state(scheduler._host(url))[0]
+        return bucket.blocked_until - time.monotonic()
+
+    def test_retry_after_is_clamped(self):
+        scheduler = host_scheduler.HostScheduler(penalty_seconds=10)
+        scheduler.observe(URL, 429, "86400")
+        self.assertAlmostEqual(self.blocked_for(scheduler), 40, delta=1)
+
+        scheduler.observe("https://other.example.com/", 503, "5")
+        self.assertAlmostEqual(self.blocked_for(scheduler, "https://other.example.com/"), 5, delta=1)
+
+    def test_token_wait_fails_fast_past_the_deadline(self):
+        scheduler = host_scheduler.HostScheduler(penalty_seconds=10)
+        scheduler.penalize(URL)
+        started = time.monotonic()
+        with self.assertRaises(requests.exceptions.Timeout):
+            with scheduler.slot(URL, timeout=2):
+                self.fail("slot should not be granted while the host is penalized")
+        self.assertLess(time.monotonic() - started, 0.5)
+        # 放棄等待後必須歸還連線名額
+        self.assertTrue(scheduler._host_state("news.example.com")[1].acquire(blocking=False))
+
+    def test_slot_wait_times_out(self):
+        scheduler = host_scheduler.HostScheduler(max_per_host=1)
+        holding = threading.Event()
+        release = threading.Event()
+
+        def hold_slot():
+            with scheduler.slot(URL):
+                holding.set()
+                release.wait(5)
+
+        holder = threading.Thread(target=hold_slot)
+        holder.start()
+        self.addCleanup(holder.join)
+        self.addCleanup(release.set)
+        holding.wait(5)
+
+        started = time.monotonic()
+        with self.assertRaises(host_scheduler.SchedulerTimeout):
+            with scheduler.slot(URL, timeout=0.2):
+                pass
+        self.assertAlmostEqual(time.monotonic() - started, 0.2, delta=0.15)
+
+    def test_externally_penalized_hosts_are_not_penalized_twice(self):
+        scheduler = host_scheduler.HostScheduler(externally_penalized_hosts=["Search.Example.com"])
+        scheduler.observe("https://search.example.com/search?q=x", 429, "30")
+        self.assertLessEqual(self.blocked_for(scheduler, "https://search.example.com/"), 0)
+        scheduler.observe(URL, 429, "30")
+        self.assertGreater(self.blocked_for(scheduler), 0)
+
+    def test_adapter_charges_queueing_against_the_request_timeout(self):
+        scheduler = host_scheduler.HostScheduler()
+        adapter = host_scheduler.build_scheduled_session(scheduler).get_adapter(URL)
+        request = requests.Request("GET", URL).prepare()
+        scheduler.penalize(URL, 0.3)
+        with mock.patch.object(requests.adapters.HTTPAdapter, "send", return_value=FakeResponse()) as send:
+            adapter.send(request, timeout=5)
+        self.assertLess(send.call_args.kwargs["timeout"], 4.8)
+
+        # tuple timeout 以連線 timeout 作為等待上限
+        scheduler.penalize(URL, 10)
+        with mock.patch.object(requests.adapters.HTTPAdapter, "send", return_value=FakeResponse()) as send:
+            with self.assertRaises(requests.exceptions.Timeout):
+                adapter.send(request, timeout=(1, 30))
+        send.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,212 @@
+# __test__/python/test_newsScraper_http_cache.py
+# 檔案用途：驗證 newsScraper HttpCache 的 TTL、條件式重新驗證、容量淘汰與損毀項目的退回行為
+# 執行方式：python -m unittest discover -s __test__/python
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+STRATEGY_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "src", "plugins", "newsScraper", "strategies", "local")
+)
+if STRATEGY_DIR not in sys.path:
+    sys.path.insert(0, STRATEGY_DIR)
+
+try:
+    import http_cache
+    from http_stubs import FakeResponse, FakeSession
+except ImportError:  # pragma: no cover - 依環境略過
+    http_cache = None
+
+
+@unittest.skipIf(http_cache is None, "需要 requests 與 filelock")
+class HttpCacheTest(unittest.TestCase):
+    URL = "https://news.example.com/a"
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.session = FakeSession()
+
+    def make_cache(self, **options):
+        return http_cache.HttpCache(self.temp_dir.name, **options)
+
+    def age_entry(self, cache, url, seconds):
+        def apply(index):
+            index[url]["fetched_at"] -= seconds
+
+        cache._update_index(apply)
+
+    def test_fresh_entry_is_served_without_network(self):
+        cache = self.make_cache(ttl_seconds=300)
+        self.session.queue(self.URL, FakeResponse(content=b"<p>hello</p>", headers={"ETag": '"v1"'}))
+
+        first = cache.fetch(self.session, self.URL, timeout=5)
+        second = cache.fetch(self.session, self.URL, timeout=5)
+
+        self.assertEqual(first.cache_status, "miss")
+        self.assertEqual(second.cache_status, "fresh")
+        self.assertEqual(second.text, "<p>hello</p>")
+        self.assertEqual(len(self.session.requests), 1)
+
+    def test_fresh_hits_defer_index_writes_until_flush(self):
+        cache = self.make_cache(ttl_seconds=300)
+        self.session.queue(self.URL, FakeResponse(content=b"<p>hello</p>"))
+        cache.fetch(self.session, self.URL, timeout=5)
+        stored_access = cache._read_index()[self.URL]["last_access"]
+        index_stat = os.stat(cache.index_path)
+
+        with mock.patch.object(http_cache.json, "loads", wraps=json.loads) as loads, \
+                mock.patch.object(http_cache.json, "dumps", wraps=json.dumps) as dumps:
+            for _ in range(20):
+                self.assertEqual(cache.fetch(self.session, self.URL, timeout=5).cache_status, "fresh")
+        # 命中時不重新解析也不改寫索引
+        self.assertEqual(loads.call_count, 0)
+        self.assertEqual(dumps.call_count, 0)
+        self.assertEqual(os.stat(cache.index_path).st_mtime_ns, index_stat.st_mtime_ns)
+
+        cache.flush()
+        on_disk = json.loads(cache.index_path.read_text(encoding="utf-8"))
+        self.assertGreater(on_disk[self.URL]["last_access"], stored_access)
+
+    def test_index_written_by_another_process_is_reloaded(self):
+        cache = self.make_cache(ttl_seconds=300)
+        other = self.make_cache(ttl_seconds=300)
+        self.session.queue(self.URL, FakeResponse(content=b"<p>shared</p>"))
+        self.assertEqual(cache._read_index(), {})
+
+        other.fetch(self.session, self.URL, timeout=5)
+
+        self.assertEqual(cache.fetch(self.session, self.URL, timeout=5).cache_status, "fresh")
+        self.assertEqual(len(self.session.requests), 1)
+
+    def test_ttl_expiry_triggers_conditional_revalidation(self):
+        cache = self.make_cache(ttl_seconds=300)
+        validators = {"ETag": '"v1"', "Last-Modified": "Wed, 01 Oct 2025 00:00:00 GMT"}
+        self.session.queue(
+            self.URL,
+            FakeResponse(content=b"<p>v1</p>", headers=validators),
+            FakeResponse(content=b"<p>v2</p>", headers={"ETag": '"v2"'}),
+        )
+
+        cache.fetch(self.session, self.URL, timeout=5)
+        self.age_entry(cache, self.URL, 301)
+        refreshed = cache.fetch(self.session, self.URL, timeout=5)
+
+        _, headers = self.session.requests[1]
+        self.assertEqual(headers, {"If-None-Match": '"v1"', "If-Modified-Since": validators["Last-Modified"]})
+        self.assertEqual(refreshed.cache_status, "miss")
+        self.assertEqual(refreshed.content, b"<p>v2</p>")
+        self.assertEqual(cache.fetch(self.session, self.URL, timeout=5).content, b"<p>v2</p>")
+
+    def test_not_modified_reuses_stored_body(self):
+        cache = self.make_cache(ttl_seconds=300)
+        self.session.queue(
+            self.URL,
+            FakeResponse(content="<p>中文內文</p>".encode("utf-8"), headers={"ETag": '"v1"'}),
+            FakeResponse(status_code=304, headers={"ETag": '"v1b"'}),
+            FakeResponse(status_code=304),
+        )
+
+        cache.fetch(self.session, self.URL, timeout=5)
+        self.age_entry(cache, self.URL, 301)
+        revalidated = cache.fetch(self.session, self.URL, timeout=5)
+
+        self.assertEqual(revalidated.cache_status, "revalidated")
+        self.assertEqual(revalidated.text, "<p>中文內文</p>")
+        # 304 重設 fetched_at，TTL 內不再發出請求
+        self.assertEqual(cache.fetch(self.session, self.URL, timeout=5).cache_status, "fresh")
+        self.assertEqual(len(self.session.requests), 2)
+        # 304 帶來的新驗證器用於下一次重新驗證
+        self.age_entry(cache, self.URL, 301)
+        cache.fetch(self.session, self.URL, timeout=5)
+        self.assertEqual(self.session.requests[-1][1]["If-None-Match"], '"v1b"')
+
+    def test_size_cap_evicts_least_recently_used_entries(self):
+        # 隨機位元組無法壓縮，每筆壓縮後約 2 KB
+        bodies = {f"https://news.example.com/{name}": os.urandom(2048) for name in ("a", "b", "c")}
+        cache = self.make_cache(ttl_seconds=300, max_bytes=5000)
+        for url, body in bodies.items():
+            self.session.queue(url, FakeResponse(content=body), FakeResponse(content=body))
+
+        urls = list(bodies)
+        cache.fetch(self.session, urls[0], timeout=5)
+        cache.fetch(self.session, urls[1], timeout=5)
+        # 讀取 a 讓 b 成為最久未使用的項目
+        self.assertEqual(cache.fetch(self.session, urls[0], timeout=5).cache_status, "fresh")
+        cache.fetch(self.session, urls[2], timeout=5)
+
+        index = cache._read_index()
+        self.assertEqual(set(index), {urls[0], urls[2]})
+        self.assertLessEqual(sum(entry["size"] for entry in index.values()), 5000)
+        stored_bodies = [path for _, _, files in os.walk(cache.body_dir) for path in files]
+        self.assertEqual(len(stored_bodies), 2)
+        self.assertEqual(cache.fetch(self.session, urls[1], timeout=5).cache_status, "miss")
+
+    def test_replaced_entry_removes_its_previous_body(self):
+        cache = self.make_cache(ttl_seconds=300, max_bytes=100 * 1024)
+        bodies = [os.urandom(20 * 1024) for _ in range(50)]
+        self.session.queue(self.URL, *[FakeResponse(content=body) for body in bodies])
+        shared_url = "https://mirror.example.com/a"
+        self.session.queue(shared_url, FakeResponse(content=bodies[0]))
+        cache.fetch(self.session, shared_url, timeout=5)
+
+        for _ in bodies:
+            cache.fetch(self.session, self.URL, timeout=5)
+            self.age_entry(cache, self.URL, 301)
+
+        stored_bodies = [
+            os.path.join(root, name) for root, _, files in os.walk(cache.body_dir) for name in files
+        ]
+        # 目前內文與鏡像站仍引用的第一版內文各一份
+        self.assertEqual(len(stored_bodies), 2)
+        self.assertLessEqual(sum(os.path.getsize(path) for path in stored_bodies), cache.max_bytes)
+        self.assertEqual(cache._read_body(cache._read_index()[self.URL]["digest"]), bodies[-1])
+        self.assertEqual(cache.fetch(self.session, shared_url, timeout=5).content, bodies[0])
+
+    def test_corrupt_body_falls_back_to_fresh_fetch(self):
+        cache = self.make_cache(ttl_seconds=300)
+        self.session.queue(
+            self.URL,
+            FakeResponse(content=b"<p>original</p>", headers={"ETag": '"v1"'}),
+            FakeResponse(content=b"<p>refetched</p>", headers={"ETag": '"v2"'}),
+        )
+        cache.fetch(self.session, self.URL, timeout=5)
+        digest = cache._read_index()[self.URL]["digest"]
+        cache._body_path(digest).write_bytes(b"not zlib data")
+
+        refetched = cache.fetch(self.session, self.URL, timeout=5)
+
+        # 本地內文無法使用時不可送出條件式請求，否則 304 會沒有內文可用
+        self.assertEqual(self.session.requests[1][1], {})
+        self.assertEqual(refetched.cache_status, "miss")
+        self.assertEqual(refetched.content, b"<p>refetched</p>")
+        self.assertEqual(cache.fetch(self.session, self.URL, timeout=5).cache_status, "fresh")
+
+    def test_corrupt_index_falls_back_to_fresh_fetch(self):
+        cache = self.make_cache(ttl_seconds=300)
+        self.session.queue(self.URL, FakeResponse(content=b"<p>a</p>"), FakeResponse(content=b"<p>b</p>"))
+        cache.fetch(self.session, self.URL, timeout=5)
+        cache.index_path.write_text("{truncated", encoding="utf-8")
+
+        refetched = cache.fetch(self.session, self.URL, timeout=5)
+
+        self.assertEqual(refetched.cache_status, "miss")
+        self.assertEqual(refetched.content, b"<p>b</p>")
+        self.assertIn(self.URL, json.loads(cache.index_path.read_text(encoding="utf-8")))
+
+    def test_no_store_responses_are_not_cached(self):
+        cache = self.make_cache(ttl_seconds=300)
+        self.session.queue(
+            self.URL,
+            FakeResponse(content=b"<p>a</p>", headers={"Cache-Control": "private, no-store"}),
+            FakeResponse(content=b"<p>b</p>"),
+        )
+        cache.fetch(self.session, self.URL, timeout=5)
+        self.assertEqual(cache.fetch(self.session, self.URL, timeout=5).cache_status, "miss")
+
+
+if __name__ == "__main__":
+    unittest.main()
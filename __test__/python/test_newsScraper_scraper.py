@@ -0,0 +1,341 @@
+# __test__/python/test_newsScraper_scraper.py
+# 檔案用途：以固定的 RSS / HTML 與替身 Session 驗證 ForagerStrategy 的多 RSS 去重與增量輪詢
+# 執行方式：python -m unittest discover -s __test__/python
+import asyncio
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+STRATEGY_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "src", "plugins", "newsScraper", "strategies", "local")
+)
+if STRATEGY_DIR not in sys.path:
+    sys.path.insert(0, STRATEGY_DIR)
+
+try:
+    import requests
+    import scraper
+    from http_stubs import FakeResponse, FakeSession
+except ImportError:  # pragma: no cover - 依環境略過
+    scraper = None
+
+FEED_A = "https://a.example/rss"
+FEED_B = "https://b.example/rss"
+
+
+def rss(*items):
+    """items 為 (link, guid) 配對；guid 為 None 時不輸出 guid 標籤。"""
+    entries = "".join(
+        f"<item><title>t</title><link>{link.replace('&', '&amp;')}</link>"
+        + (f"<guid>{guid}</guid>" if guid else "")
+        + "<pubDate>Wed, 01 Oct 2025 08:00:00 GMT</pubDate></item>"
+        for link, guid in items
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>{entries}</channel></rss>'
+
+
+def article(*paragraphs):
+    body = "".join(f"<p>{paragraph}</p>" for paragraph in paragraphs)
+    return f"<html><body><nav><p>選單</p></nav><article>{body}</article></body></html>"
+
+
+def sources(result):
+    """依輸出順序取出各篇文章的來源連結。"""
+    return [
+        line[len("--- News Source: "):-len(" ---")]
+        for line in result["article_text"].splitlines()
+        if line.startswith("--- News Source: ")
+    ]
+
+
+@unittest.skipIf(scraper is None, "需要 requests、filelock、lxml 與 pydantic")
+class ScraperTestCase(unittest.TestCase):
+    def setUp(self):
+        self.session = FakeSession()
+        self.forager = scraper.ForagerStrategy(max_concurrency=4)
+        self.forager.close()
+        self.forager.session = self.session
+
+    def serve(self, url, body):
+        self.session.queue(url, FakeResponse(content=body))
+
+    def fetch(self, feed_urls, **options):
+        response = asyncio.run(self.forager.fetch_feeds(feed_urls, **options))
+        self.assertTrue(response["success"], response.get("error"))
+        return response["result"]
+
+
+class MultiFeedDedupeTest(ScraperTestCase):
+    STORY_1 = "https://a.example/story-1?id=1&utm_source=rss"
+    STORY_1_ALIAS = "https://a.example/story-1?utm_medium=feed&id=1#comments"
+    SYNDICATED = "https://b.example/syndicated-2"
+
+    def setUp(self):
+        super().setUp()
+        self.serve(FEED_A, rss(
+            (self.STORY_1, "a-1"),
+            ("https://a.example/story-2", "a-2"),
+            ("https://a.example/story-3", "a-3"),
+        ))
+        self.serve(FEED_B, rss(
+            (self.STORY_1_ALIAS, "b-1"),
+            (self.SYNDICATED, "b-2"),
+            ("https://b.example/story-3", "b-3"),
+        ))
+        self.serve(self.STORY_1, article("第一則新聞"))
+        self.serve("https://a.example/story-2", article("轉載的新聞", "第二段"))
+        # 同一篇文章轉載到另一個網站：空白與外層排版不同，正文相同
+        self.serve(self.SYNDICATED, "<html><body><article><p>  轉載的新聞 </p>\n<p>第二段</p></article></body></html>")
+        self.serve("https://a.example/story-3", article("A 站第三則"))
+        self.serve("https://b.example/story-3", article("B 站第三則"))
+
+    def test_per_feed_dedupes_by_normalized_url_and_content_hash(self):
+        result = self.fetch([FEED_A, FEED_B], article_limit=3)
+
+        self.assertEqual(result["source_urls"], [FEED_A, FEED_B])
+        self.assertEqual(result["duplicates"], {"url": 1, "content": 1})
+        self.assertEqual(result["article_count"], 4)
+        self.assertEqual(result["status"], "complete")
+        self.assertEqual(result["errors"], [])
+        self.assertEqual(
+            sources(result),
+            [self.STORY_1, "https://a.example/story-2", "https://a.example/story-3", "https://b.example/story-3"],
+        )
+        # URL 重複的文章不會被抓取；內容重複的文章需抓取後才能判斷
+        requested = self.session.requested_urls()
+        self.assertNotIn(self.STORY_1_ALIAS, requested)
+        self.assertIn(self.SYNDICATED, requested)
+        self.assertNotIn("選單", result["article_text"])
+
+    def test_global_scope_round_robins_and_keeps_first_copy(self):
+        result = self.fetch([FEED_A, FEED_B], article_limit=3, article_scope="global")
+
+        # 輪流挑選：A1、B2（B1 與 A1 網址重複已排除）、A2；A2 與 B2 內容相同，保留較早出現的 B2
+        self.assertEqual(sources(result), [self.STORY_1, self.SYNDICATED])
+        self.assertEqual(result["duplicates"], {"url": 1, "content": 1})
+        self.assertNotIn("https://a.example/story-3", self.session.requested_urls())
+
+    def test_failed_feed_is_reported_and_skipped(self):
+        self.session.responses.pop(FEED_B)
+        result = self.fetch([FEED_A, FEED_B], article_limit=3)
+
+        self.assertEqual(result["article_count"], 3)
+        self.assertEqual(result["status"], "partial")
+        self.assertEqual(len(result["errors"]), 1)
+        self.assertTrue(result["errors"][0].startswith(FEED_B))
+
+    def test_failed_article_marks_result_partial(self):
+        self.session.responses["https://a.example/story-3"] = [FakeResponse(status_code=500)]
+        result = self.fetch([FEED_A], article_limit=3)
+
+        self.assertEqual(result["status"], "partial")
+        self.assertEqual(result["article_count"], 2)
+        self.assertEqual(len(result["errors"]), 1)
+        self.assertTrue(result["errors"][0].startswith("https://a.example/story-3"))
+
+    def test_invalid_links_are_logged_and_reported(self):
+        self.session.responses[FEED_A] = [FakeResponse(content=rss(("https:///no-host", "bad"), (self.STORY_1, "a-1")))]
+        warnings = []
+        sink_id = scraper.logger.add(warnings.append, level="WARNING", format="{message}")
+        self.addCleanup(scraper.logger.remove, sink_id)
+
+        result = self.fetch([FEED_A], article_limit=3)
+
+        self.assertEqual(result["invalid_links"], ["https:///no-host"])
+        self.assertEqual(result["status"], "partial")
+        self.assertEqual(sources(result), [self.STORY_1])
+        self.assertTrue(any("https:///no-host" in message for message in warnings))
+
+
+class ConcurrentFetchTest(ScraperTestCase):
+    STORIES = [f"https://a.example/story-{index}" for index in range(1, 7)]
+    SLOWEST = 0.3
+
+    def setUp(self):
+        super().setUp()
+        self.serve(FEED_A, rss(*[(link, None) for link in self.STORIES]))
+        for index, link in enumerate(self.STORIES):
+            self.serve(link, article(f"第 {index + 1} 則"))
+            # 越前面的文章越慢，完成順序與 RSS 順序相反
+            self.session.delays[link] = self.SLOWEST - index * 0.05
+
+    def use_forager(self, **options):
+        self.forager = scraper.ForagerStrategy(**options)
+        self.forager.close()
+        self.forager.session = self.session
+
+    def test_output_keeps_feed_order_and_takes_about_the_slowest_article(self):
+        self.use_forager(max_concurrency=6)
+        started = time.monotonic()
+        result = self.fetch([FEED_A], article_limit=6)
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(sources(result), self.STORIES)
+        self.assertEqual(self.session.max_in_flight, 6)
+        self.assertGreaterEqual(elapsed, self.SLOWEST)
+        self.assertLess(elapsed, self.SLOWEST + 0.15)
+
+    def test_max_concurrency_bounds_in_flight_requests(self):
+        self.use_forager(max_concurrency=2)
+        started = time.monotonic()
+        result = self.fetch([FEED_A], article_limit=6)
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(sources(result), self.STORIES)
+        self.assertEqual(self.session.max_in_flight, 2)
+        # 總共 1.05 秒的回應時間分給兩條工作執行緒
+        self.assertGreaterEqual(elapsed, 0.5)
+
+    def test_article_timeout_is_passed_to_each_request(self):
+        self.use_forager(article_timeout=3.5)
+        self.fetch([FEED_A], article_limit=6)
+
+        self.assertEqual(self.session.timeouts[FEED_A], scraper.ForagerStrategy.FEED_TIMEOUT_SECONDS)
+        self.assertEqual({self.session.timeouts[link] for link in self.STORIES}, {3.5})
+
+
+class IncrementalPollingTest(ScraperTestCase):
+    STORIES = [f"https://a.example/story-{index}" for index in range(1, 6)]
+
+    def setUp(self):
+        super().setUp()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.store = scraper.SeenItemStore(self.temp_dir.name)
+        # 最後一篇沒有 guid，以正規化連結作為鍵
+        self.serve(FEED_A, rss(*[(link, f"a-{index}" if index < 5 else None) for index, link in enumerate(self.STORIES, 1)]))
+        for index, link in enumerate(self.STORIES, 1):
+            self.serve(link, article(f"第 {index} 則"))
+
+    def poll(self, **options):
+        return self.fetch([FEED_A], article_limit=2, seen_store=self.store, only_new=True, **options)
+
+    def article_requests(self):
+        """文章並行抓取，完成順序不固定，依網址排序後比較。"""
+        return sorted(url for url in self.session.requested_urls() if url != FEED_A)
+
+    def test_only_new_fills_the_limit_with_unseen_items(self):
+        first = self.poll()
+        second = self.poll()
+        third = self.poll()
+
+        self.assertEqual(sources(first), self.STORIES[:2])
+        self.assertEqual(first["new_count"], 2)
+        self.assertEqual(first["seen_skipped"], 0)
+        # 已處理的文章在截取篇數前排除，第二輪取到接下來的兩篇
+        self.assertEqual(sources(second), self.STORIES[2:4])
+        self.assertEqual(second["seen_skipped"], 2)
+        self.assertEqual(sources(third), self.STORIES[4:])
+        self.assertEqual(third["seen_skipped"], 4)
+        self.assertEqual(self.article_requests(), self.STORIES)
+
+        idle = self.poll()
+        self.assertEqual(idle["article_count"], 0)
+        self.assertEqual(idle["new_count"], 0)
+        self.assertEqual(idle["seen_skipped"], 5)
+        self.assertEqual(self.article_requests(), self.STORIES)
+
+    def test_include_seen_returns_stored_text_without_refetching(self):
+        self.poll()
+        result = self.poll(include_seen=True)
+
+        self.assertEqual(sources(result), self.STORIES[:2])
+        self.assertIn("第 1 則", result["article_text"])
+        self.assertEqual(result["new_count"], 0)
+        self.assertEqual(result["seen_skipped"], 2)
+        self.assertEqual(self.article_requests(), self.STORIES[:2])
+
+    def test_seen_store_is_ignored_without_only_new(self):
+        self.poll()
+        result = self.fetch([FEED_A], article_limit=2, seen_store=self.store)
+
+        self.assertEqual(sources(result), self.STORIES[:2])
+        self.assertEqual(result["new_count"], 2)
+        self.assertEqual(self.article_requests(), sorted(self.STORIES[:2] * 2))
+
+    def test_main_only_creates_seen_store_for_only_new(self):
+        seen_dir = os.path.join(self.temp_dir.name, "seen")
+        payload = {"url": FEED_A, "article_count": 1, "use_cache": False}
+        with mock.patch.object(scraper, "SEEN_STORE_DIR", scraper.Path(seen_dir)), \
+                mock.patch.object(scraper, "build_scheduled_session", return_value=self.session):
+            self.assertTrue(run_main(payload)["success"])
+            self.assertFalse(os.path.exists(seen_dir))
+            self.assertTrue(run_main({**payload, "only_new": True})["success"])
+        self.assertEqual(len([name for name in os.listdir(seen_dir) if name.endswith(".json")]), 1)
+
+
+@unittest.skipIf(scraper is None, "需要 requests、filelock、lxml 與 pydantic")
+class HostLimitsTest(unittest.TestCase):
+    """文章都在同一主機時，耗時由每主機限制決定；限制可依每次請求調整。"""
+
+    STORIES = [f"https://a.example/story-{index}" for index in range(1, 11)]
+    DELAY = 0.2
+
+    def run_feed(self, **limits):
+        pages = {FEED_A: rss(*[(link, None) for link in self.STORIES])}
+        pages.update({link: article(f"第 {index} 則") for index, link in enumerate(self.STORIES, 1)})
+
+        def send(request, **kwargs):
+            if request.url != FEED_A:
+                time.sleep(self.DELAY)
+            response = requests.Response()
+            response.status_code = 200
+            response._content = pages[request.url].encode("utf-8")
+            response.encoding = "utf-8"
+            response.url = request.url
+            response.request = request
+            return response
+
+        forager = scraper.ForagerStrategy(max_concurrency=10, **limits)
+        self.addCleanup(forager.close)
+        with mock.patch.object(requests.adapters.HTTPAdapter, "send", side_effect=send):
+            started = time.monotonic()
+            response = asyncio.run(forager.fetch_feeds([FEED_A], article_limit=10))
+            elapsed = time.monotonic() - started
+        self.assertTrue(response["success"], response.get("error"))
+        self.assertEqual(sources(response["result"]), self.STORIES)
+        return forager, elapsed
+
+    def test_max_per_host_bounds_same_host_fetches(self):
+        polite, polite_elapsed = self.run_feed(max_per_host=2, host_rate=1000, host_burst=100)
+        fast, fast_elapsed = self.run_feed(max_per_host=10, host_rate=1000, host_burst=100)
+
+        self.assertEqual(polite.scheduler.max_per_host, 2)
+        self.assertEqual(fast.scheduler.max_per_host, 10)
+        # 每主機 2 條連線：10 篇分 5 批；放寬後與最慢的單篇相近
+        self.assertGreaterEqual(polite_elapsed, 5 * self.DELAY)
+        self.assertLess(fast_elapsed, 2.5 * self.DELAY)
+
+    def test_scraper_input_host_limits(self):
+        defaults = scraper.ScraperInput.model_validate({"url": FEED_A})
+        self.assertEqual((defaults.max_per_host, defaults.host_rate, defaults.host_burst), (None, None, None))
+
+        tuned = scraper.ScraperInput.model_validate(
+            {"url": FEED_A, "max_per_host": "64", "host_rate": "20", "host_burst": 0}
+        )
+        self.assertEqual(tuned.max_per_host, scraper.ForagerStrategy.MAX_CONCURRENCY)
+        self.assertEqual(tuned.host_rate, 20.0)
+        self.assertIsNone(tuned.host_burst)
+
+        forager = scraper.ForagerStrategy(max_per_host=tuned.max_per_host, host_rate=tuned.host_rate)
+        self.addCleanup(forager.close)
+        self.assertEqual(forager.scheduler.max_per_host, scraper.ForagerStrategy.MAX_CONCURRENCY)
+        self.assertEqual(forager.scheduler.rate_per_host, 20.0)
+        self.assertEqual(forager.scheduler.burst, scraper.HostScheduler().burst)
+
+
+def run_main(payload):
+    """以命令列參數執行 scraper.main 並解析其 stdout JSON。"""
+    stdout = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+    with mock.patch.object(sys, "argv", ["scraper.py", json.dumps(payload)]), mock.patch.object(sys, "stdout", stdout):
+        asyncio.run(scraper.main())
+    return json.loads(stdout.buffer.getvalue().decode("utf-8"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+# 檔案用途：離線量測 iotVisionTurret YOLOv11 推論延遲（各階段冷/熱啟動百分位、吞吐量與記憶體峰值）
+
+# ───────────────────────────────────────────────
+# 匯入區塊：集中管理基準測試所需的標準函式庫與推論工具
+# ───────────────────────────────────────────────
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:
+    # 相容區塊用途：Windows 沒有 resource 模組，改由 psutil 取得記憶體峰值
+    resource = None  # type: ignore
+
+try:
+    from .infer import (
+        load_model,
+        load_yolo_class,
+        resolve_class_ids,
+        resolve_names,
+        resolve_weights,
+        select_best_candidate,
+    )
+except ImportError:
+    # 匯入相容區塊用途：直接以腳本執行時改用同目錄匯入
+    from infer import (  # type: ignore
+        load_model,
+        load_yolo_class,
+        resolve_class_ids,
+        resolve_names,
+        resolve_weights,
+        select_best_candidate,
+    )
+
+# ───────────────────────────────────────────────
+# 常數區塊：預設架構、量測階段與百分位
+# ───────────────────────────────────────────────
+DEFAULT_ARCH = "yolo11n.yaml"
+STAGES = ("decode", "preprocess", "predict", "postprocess", "extract", "total")
+PERCENTILES = (50, 90, 95, 99)
+
+
+# ───────────────────────────────────────────────
+# 狀態資料結構區塊：定義基準測試設定
+# ───────────────────────────────────────────────
+@dataclass
+class BenchConfig:
+    """基準測試設定資料結構。"""
+
+    weights: List[str]
+    backends: List[str]
+    imgsz: List[int]
+    batch_sizes: List[int]
+    images: int
+    image_width: int
+    image_height: int
+    cold_runs: int
+    warm_runs: int
+    warmup: int
+    conf: float
+    target: Optional[str]
+    device: str
+    seed: int
+    arch: str
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：解析逗號分隔清單
+# ───────────────────────────────────────────────
+def parse_list(raw: str, cast: Any = str) -> List[Any]:
+    """將 "a,b,c" 轉為清單並去除空白項目。"""
+    return [cast(item.strip()) for item in raw.split(",") if item.strip()]
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：解析命令列參數
+# ───────────────────────────────────────────────
+def parse_args() -> argparse.Namespace:
+    """解析基準測試參數。"""
+    parser = argparse.ArgumentParser(description="iotVisionTurret YOLOv11 推論延遲基準測試（離線、合成影像）")
+    # 參數說明區塊：權重清單，未提供時以 --arch 建立未訓練的小模型
+    parser.add_argument("--weights", default="", help="逗號分隔的權重路徑（.pt/.onnx/*_openvino_model）")
+    # 參數說明區塊：未提供權重時使用的模型架構設定
+    parser.add_argument("--arch", default=DEFAULT_ARCH, help="未提供 --weights 時建立的模型架構 (yaml)")
+    # 參數說明區塊：要比較的推論後端
+    parser.add_argument("--backend", default="auto", help="逗號分隔的後端 (auto/pytorch/onnx/openvino)")
+    # 參數說明區塊：要比較的輸入尺寸
+    parser.add_argument("--imgsz", default="640", help="逗號分隔的推論輸入尺寸")
+    # 參數說明區塊：吞吐量量測的批次大小
+    parser.add_argument("--batch-sizes", default="1,4,8", help="逗號分隔的批次大小")
+    # 參數說明區塊：合成影像數量與尺寸
+    parser.add_argument("--images", type=int, default=16, help="合成影像數量")
+    parser.add_argument("--image-size", default="640x480", help="合成影像尺寸 (寬x高)")
+    # 參數說明區塊：冷啟動次數（每次重新載入模型）與熱啟動次數
+    parser.add_argument("--cold-runs", type=int, default=3, help="冷啟動量測次數（每次重新載入模型）")
+    parser.add_argument("--warm-runs", type=int, default=50, help="熱啟動量測次數")
+    parser.add_argument("--warmup", type=int, default=3, help="熱啟動量測前的暖機次數")
+    # 參數說明區塊：推論參數
+    parser.add_argument("--conf", type=float, default=0.25, help="信心門檻")
+    parser.add_argument("--target", default=None, help="目標類別名稱（預設取模型第一個類別）")
+    parser.add_argument("--device", default="cpu", help="推論裝置 (cpu/cuda)")
+    parser.add_argument("--seed", type=int, default=0, help="合成影像亂數種子")
+    # 參數說明區塊：輸出格式
+    parser.add_argument("--json", action="store_true", help="以 JSON 輸出完整結果")
+    parser.add_argument("--output", default=None, help="將 JSON 結果寫入檔案，方便比較多次執行")
+    return parser.parse_args()
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：將命令列參數轉換成基準測試設定
+# ───────────────────────────────────────────────
+def build_config(args: argparse.Namespace) -> BenchConfig:
+    """組裝基準測試設定。"""
+    width, _, height = args.image_size.lower().partition("x")
+    return BenchConfig(
+        weights=parse_list(args.weights),
+        backends=parse_list(args.backend),
+        imgsz=parse_list(args.imgsz, int),
+        batch_sizes=parse_list(args.batch_sizes, int),
+        images=max(1, args.images),
+        image_width=int(width),
+        image_height=int(height),
+        cold_runs=max(0, args.cold_runs),
+        warm_runs=max(1, args.warm_runs),
+        warmup=max(0, args.warmup),
+        conf=args.conf,
+        target=args.target,
+        device=args.device,
+        seed=args.seed,
+        arch=args.arch,
+    )
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：建立未訓練的小型權重（離線，不下載預訓練檔）
+# ───────────────────────────────────────────────
+def build_tiny_checkpoint(arch: str, directory: str) -> str:
+    """以架構 yaml 建立隨機初始化模型並存成 .pt；延遲數字與訓練後權重相同量級。"""
+    weights_path = os.path.join(directory, os.path.splitext(os.path.basename(arch))[0] + ".pt")
+    model = load_yolo_class()(arch)
+    model.save(weights_path)
+    return weights_path
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：產生可重現的合成影像並編碼為 JPEG
+# ───────────────────────────────────────────────
+def build_synthetic_images(config: BenchConfig) -> List[bytes]:
+    """雜訊背景加上數個實心矩形，模擬相機上傳的 JPEG；decode 階段量測的就是這些位元組。"""
+    np = importlib.import_module("numpy")
+    cv2 = importlib.import_module("cv2")
+    rng = np.random.default_rng(config.seed)
+    encoded: List[bytes] = []
+    for _ in range(config.images):
+        image = rng.integers(0, 255, size=(config.image_height, config.image_width, 3), dtype=np.uint8)
+        for _ in range(4):
+            x1, y1 = int(rng.integers(0, config.image_width - 40)), int(rng.integers(0, config.image_height - 40))
+            x2, y2 = x1 + int(rng.integers(20, 160)), y1 + int(rng.integers(20, 160))
+            color = tuple(int(value) for value in rng.integers(0, 255, size=3))
+            cv2.rectangle(image, (x1, y1), (x2, y2), color, -1)
+        ok, buffer = cv2.imencode(".jpg", image)
+        if not ok:
+            raise RuntimeError("合成影像 JPEG 編碼失敗")
+        encoded.append(buffer.tobytes())
+    return encoded
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：解碼 JPEG 位元組
+# ───────────────────────────────────────────────
+def decode_image(data: bytes) -> Any:
+    """與 infer 的 cv2.imread 相同的解碼成本，但不經檔案系統。"""
+    np = importlib.import_module("numpy")
+    cv2 = importlib.import_module("cv2")
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：計算百分位數（線性內插）
+# ───────────────────────────────────────────────
+def percentile(values: List[float], pct: float) -> float:
+    """values 可為任意順序；回傳第 pct 百分位。"""
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：彙整各階段的延遲統計
+# ───────────────────────────────────────────────
+def summarize_stages(samples: List[Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    """每個階段輸出 mean/min/max 與 p50/p90/p95/p99（毫秒）。"""
+    summary: Dict[str, Dict[str, float]] = {}
+    for stage in STAGES + ("model_load",):
+        values = [sample[stage] for sample in samples if stage in sample]
+        if not values:
+            continue
+        stats = {"mean": statistics.fmean(values), "min": min(values), "max": max(values)}
+        stats.update({f"p{pct}": percentile(values, pct) for pct in PERCENTILES})
+        summary[stage] = {key: round(value, 3) for key, value in stats.items()}
+    return summary
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：取得目前進程的記憶體峰值（MB）
+# ───────────────────────────────────────────────
+def peak_rss_mb() -> Optional[float]:
+    """Linux 的 ru_maxrss 單位為 KB，macOS 為 bytes；Windows 取 psutil 的 peak_wset，兩者皆無法取得時回傳 None。"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+        return round(peak / divisor, 2)
+    try:
+        psutil = importlib.import_module("psutil")
+    except ImportError:
+        return None
+    memory = psutil.Process().memory_info()
+    return round((getattr(memory, "peak_wset", None) or memory.rss) / (1024 * 1024), 2)
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：執行單張推論並記錄各階段耗時
+# ───────────────────────────────────────────────
+def measure_single(
+    model: Any,
+    data: bytes,
+    config: BenchConfig,
+    imgsz: int,
+    target: str,
+    class_ids: List[int],
+) -> Dict[str, float]:
+    """decode → predict → 挑選目標；preprocess/predict/postprocess 取自 ultralytics 的 result.speed。"""
+    started = time.perf_counter()
+    image = decode_image(data)
+    decoded = time.perf_counter()
+    results = model.predict(
+        source=image, conf=config.conf, device=config.device, imgsz=imgsz, classes=class_ids, verbose=False
+    )
+    predicted = time.perf_counter()
+    result = results[0]
+    select_best_candidate(result.boxes, resolve_names(result, model), target, config.conf)
+    finished = time.perf_counter()
+
+    speed = getattr(result, "speed", None) or {}
+    sample = {
+        "decode": (decoded - started) * 1000,
+        "extract": (finished - predicted) * 1000,
+        "total": (finished - started) * 1000,
+    }
+    if speed:
+        sample.update({
+            "preprocess": float(speed.get("preprocess") or 0.0),
+            "predict": float(speed.get("inference") or 0.0),
+            "postprocess": float(speed.get("postprocess") or 0.0),
+        })
+    else:
+        # 相容區塊用途：沒有 speed 資訊時以整段 predict 呼叫時間代替
+        sample["predict"] = (predicted - decoded) * 1000
+    return sample
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：量測單一組合（權重 × 後端 × 輸入尺寸）
+# ───────────────────────────────────────────────
+def run_combination(
+    weights_path: str,
+    backend: str,
+    imgsz: int,
+    encoded: List[bytes],
+    config: BenchConfig,
+) -> Dict[str, Any]:
+    """回傳冷/熱啟動各階段統計、不同批次的 images/s 與記憶體峰值。"""
+    resolved_path, resolved_backend = resolve_weights(weights_path, backend)
+    if resolved_path is None:
+        return {"weights": weights_path, "backend": backend, "imgsz": imgsz, "error": "WEIGHTS_NOT_FOUND"}
+
+    # 冷啟動區塊用途：每次重新載入模型，包含 ultralytics 首次推論的 predictor 建立成本
+    cold_samples: List[Dict[str, float]] = []
+    model = None
+    target = config.target
+    for run in range(config.cold_runs + 1):
+        load_started = time.perf_counter()
+        model = load_model(resolved_path)
+        load_ms = (time.perf_counter() - load_started) * 1000
+        target = target or next(iter(resolve_names(None, model).values()))
+        class_ids = resolve_class_ids(resolve_names(None, model), target)
+        if run == config.cold_runs:
+            break
+        sample = measure_single(model, encoded[run % len(encoded)], config, imgsz, target, class_ids)
+        sample["model_load"] = load_ms
+        sample["total"] += load_ms
+        cold_samples.append(sample)
+
+    # 熱啟動區塊用途：同一模型連續推論，先暖機再量測
+    for run in range(config.warmup):
+        measure_single(model, encoded[run % len(encoded)], config, imgsz, target, class_ids)
+    warm_samples = [
+        measure_single(model, encoded[run % len(encoded)], config, imgsz, target, class_ids)
+        for run in range(config.warm_runs)
+    ]
+
+    # 吞吐量區塊用途：已解碼影像，量測 predict 本身在不同批次下的 images/s
+    np_images = [decode_image(data) for data in encoded]
+    throughput: Dict[str, float] = {}
+    for batch_size in config.batch_sizes:
+        batches = [
+            [np_images[(start + offset) % len(np_images)] for offset in range(batch_size)]
+            for start in range(0, max(config.warm_runs, batch_size), batch_size)
+        ]
+        predict_kwargs = {"conf": config.conf, "device": config.device, "imgsz": imgsz, "classes": class_ids, "verbose": False}
+        started = time.perf_counter()
+        for batch in batches:
+            if resolved_backend == "pytorch":
+                model.predict(source=batch, **predict_kwargs)
+            else:
+                # 匯出模型區塊用途：與 infer_batch 相同，固定 batch=1 的匯出模型逐張推論
+                for image in batch:
+                    model.predict(source=image, **predict_kwargs)
+        elapsed = time.perf_counter() - started
+        processed = sum(len(batch) for batch in batches)
+        throughput[str(batch_size)] = round(processed / elapsed, 3) if elapsed > 0 else 0.0
+
+    return {
+        "weights": weights_path,
+        "resolved_weights": resolved_path,
+        "backend": resolved_backend,
+        "imgsz": imgsz,
+        "target": target,
+        "cold": summarize_stages(cold_samples),
+        "warm": summarize_stages(warm_samples),
+        "images_per_s": throughput,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：在獨立子進程量測單一組合
+# ───────────────────────────────────────────────
+def run_combination_isolated(
+    weights_path: str,
+    backend: str,
+    imgsz: int,
+    encoded: List[bytes],
+    config: BenchConfig,
+) -> Dict[str, Any]:
+    """進程記憶體峰值只增不減，每個組合改在新的 spawn 子進程執行，peak_rss_mb 才不會沿用先前組合的最大值。"""
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(run_combination, weights_path, backend, imgsz, encoded, config).result()
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：收集執行環境資訊，便於比較不同機器的結果
+# ───────────────────────────────────────────────
+def build_environment() -> Dict[str, Any]:
+    """記錄 Python / 平台 / 套件版本與 CPU 數量。"""
+    versions: Dict[str, Optional[str]] = {}
+    for module_name in ("ultralytics", "torch", "numpy", "cv2", "onnxruntime", "openvino"):
+        try:
+            versions[module_name] = getattr(importlib.import_module(module_name), "__version__", None)
+        except ImportError:
+            versions[module_name] = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "packages": versions,
+    }
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：以表格輸出人類可讀的摘要
+# ───────────────────────────────────────────────
+def print_report(report: Dict[str, Any]) -> None:
+    """每個組合輸出一段：冷啟動 total、熱啟動各階段 p50/p95、images/s 與記憶體峰值。"""
+    for item in report["results"]:
+        header = f"{os.path.basename(item['weights'])} backend={item['backend']} imgsz={item['imgsz']}"
+        if "error" in item:
+            print(f"{header}: {item['error']}")
+            continue
+        print(header)
+        cold_total = item["cold"].get("total")
+        if cold_total:
+            print(f"  {'cold total':>12}: p50={cold_total['p50']:.2f} max={cold_total['max']:.2f} ms")
+        for stage, stats in item["warm"].items():
+            print(f"  {stage:>12}: mean={stats['mean']:.2f} p50={stats['p50']:.2f} p95={stats['p95']:.2f} p99={stats['p99']:.2f} ms")
+        throughput = " ".join(f"b{size}={value:.1f}" for size, value in item["images_per_s"].items())
+        print(f"  {'images/s':>12}: {throughput}")
+        peak = item["peak_rss_mb"]
+        print(f"  {'peak rss':>12}: {'n/a' if peak is None else f'{peak:.1f} MB'}")
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：主程式入口
+# ───────────────────────────────────────────────
+def main() -> None:
+    """主程式入口。"""
+    args = parse_args()
+    config = build_config(args)
+    with tempfile.TemporaryDirectory(prefix="yolo-bench-") as temp_dir:
+        weights_list = config.weights or [build_tiny_checkpoint(config.arch, temp_dir)]
+        encoded = build_synthetic_images(config)
+        results = [
+            run_combination_isolated(weights_path, backend, imgsz, encoded, config)
+            for weights_path in weights_list
+            for backend in config.backends
+            for imgsz in config.imgsz
+        ]
+
+    report = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": asdict(config),
+        "environment": build_environment(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, ensure_ascii=False, indent=2)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    # 函式區塊用途：提供 CLI 執行入口
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# 檔案用途：將 YOLOv11 的 best.pt 匯出為 CPU 友善的 ONNX / OpenVINO 模型（可選 FP16 / INT8）
+
+# ───────────────────────────────────────────────
+# 匯入區塊：集中管理匯出所需的標準函式庫
+# ───────────────────────────────────────────────
+import argparse
+import importlib
+import os
+import shutil
+import sys
+import traceback
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+try:
+    from .infer import OPENVINO_DIR_SUFFIX, load_yolo_class
+except ImportError:
+    # 匯入相容區塊用途：直接以腳本執行時改用同目錄匯入
+    from infer import OPENVINO_DIR_SUFFIX, load_yolo_class  # type: ignore
+
+# ───────────────────────────────────────────────
+# 常數區塊：支援的匯出格式
+# ───────────────────────────────────────────────
+EXPORT_FORMATS = ("onnx", "openvino")
+
+
+# ───────────────────────────────────────────────
+# 狀態資料結構區塊：定義匯出所需的核心設定
+# ───────────────────────────────────────────────
+@dataclass
+class ExportConfig:
+    """匯出設定資料結構。"""
+
+    weights: str
+    format: str
+    imgsz: int
+    half: bool
+    int8: bool
+    data: Optional[str]
+    device: str
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：解析命令列參數
+# ───────────────────────────────────────────────
+def parse_args() -> argparse.Namespace:
+    """解析匯出腳本參數。"""
+    parser = argparse.ArgumentParser(description="iotVisionTurret YOLOv11 模型匯出腳本")
+    # 參數說明區塊：要匯出的 .pt 權重
+    parser.add_argument("--weights", required=True, help="要匯出的 .pt 權重檔案")
+    # 參數說明區塊：匯出格式
+    parser.add_argument("--format", default="onnx", choices=EXPORT_FORMATS, help="匯出格式 (onnx/openvino)")
+    # 參數說明區塊：匯出影像尺寸，需與訓練時一致
+    parser.add_argument("--imgsz", type=int, default=640, help="匯出影像尺寸")
+    # 參數說明區塊：FP16 權重（OpenVINO 於 CPU 上會以 FP16 壓縮權重）
+    parser.add_argument("--half", action="store_true", help="匯出 FP16 權重")
+    # 參數說明區塊：INT8 量化（OpenVINO 需 --data 做校正，ONNX 使用 onnxruntime 動態量化）
+    parser.add_argument("--int8", action="store_true", help="匯出 INT8 量化模型")
+    # 參數說明區塊：INT8 校正用資料集設定檔
+    parser.add_argument("--data", default=None, help="INT8 校正用資料集設定檔")
+    # 參數說明區塊：匯出裝置
+    parser.add_argument("--device", default="cpu", help="匯出裝置 (cpu/cuda)")
+    return parser.parse_args()
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：將命令列參數轉換成匯出設定
+# ───────────────────────────────────────────────
+def build_config(args: argparse.Namespace) -> ExportConfig:
+    """組裝匯出設定。"""
+    return ExportConfig(
+        weights=args.weights,
+        format=args.format,
+        imgsz=args.imgsz,
+        half=args.half,
+        int8=args.int8,
+        data=args.data,
+        device=args.device,
+    )
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：推導匯出結果的固定路徑（infer.py 依此尋找對應後端模型）
+# ───────────────────────────────────────────────
+def build_export_path(weights: str, export_format: str) -> Path:
+    """best.pt → best.onnx 或 best_openvino_model/。"""
+    weights_path = Path(weights)
+    if export_format == "onnx":
+        return weights_path.with_suffix(".onnx")
+    return weights_path.with_name(weights_path.stem + OPENVINO_DIR_SUFFIX)
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：將 ultralytics 的輸出搬移到固定路徑
+# ───────────────────────────────────────────────
+def move_to(source: Path, destination: Path) -> Path:
+    """ultralytics 的 INT8 輸出會多一段 _int8，統一搬到固定路徑並覆蓋舊檔。"""
+    if source.resolve() == destination.resolve():
+        return destination
+    if destination.is_dir():
+        shutil.rmtree(destination)
+    elif destination.exists():
+        destination.unlink()
+    shutil.move(str(source), str(destination))
+    return destination
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：以 onnxruntime 對 ONNX 模型做動態 INT8 量化
+# ───────────────────────────────────────────────
+def quantize_onnx(source: Path, destination: Path) -> Path:
+    """ultralytics 的 ONNX 匯出不支援 int8，改以 onnxruntime 動態量化權重。"""
+    quantization = importlib.import_module("onnxruntime.quantization")
+    quantized = destination.with_name(destination.stem + ".int8.onnx")
+    quantization.quantize_dynamic(
+        model_input=str(source),
+        model_output=str(quantized),
+        weight_type=quantization.QuantType.QUInt8,
+    )
+    return move_to(quantized, destination)
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：執行匯出並回傳匯出結果路徑
+# ───────────────────────────────────────────────
+def export_model(config: ExportConfig) -> Path:
+    """匯出模型到 .pt 旁的固定路徑，回傳匯出結果。"""
+    if not os.path.isfile(config.weights):
+        raise FileNotFoundError(f"找不到權重檔案: {config.weights}")
+    if config.format not in EXPORT_FORMATS:
+        raise ValueError(f"不支援的匯出格式: {config.format}")
+    if config.half and config.int8:
+        raise ValueError("half 與 int8 不可同時啟用")
+    if config.int8 and config.format == "openvino" and not config.data:
+        raise ValueError("OpenVINO INT8 量化需要 --data 提供校正資料集")
+
+    model = load_yolo_class()(config.weights)
+    # 匯出執行區塊用途：ONNX 的 int8 由 onnxruntime 另行量化，ultralytics 只負責 FP32 匯出
+    export_kwargs = {
+        "format": config.format,
+        "imgsz": config.imgsz,
+        "half": config.half,
+        "int8": config.int8 and config.format == "openvino",
+        "device": config.device,
+    }
+    if config.data:
+        export_kwargs["data"] = config.data
+    exported = Path(str(model.export(**export_kwargs)))
+
+    destination = build_export_path(config.weights, config.format)
+    if config.format == "onnx" and config.int8:
+        return quantize_onnx(exported, destination)
+    return move_to(exported, destination)
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：主程式入口，負責串接參數與輸出
+# ───────────────────────────────────────────────
+def main() -> None:
+    """主程式入口。"""
+    args = parse_args()
+    config = build_config(args)
+
+    try:
+        exported = export_model(config)
+    except Exception as exc:
+        # 錯誤處理區塊用途：捕捉匯出流程錯誤並回報原因
+        sys.stderr.write(traceback.format_exc())
+        print(f"export_result: FAILED ({exc})")
+        sys.exit(1)
+
+    # 輸出資訊區塊用途：輸出匯出結果供外部檢視
+    print(f"exported: {exported}")
+    print(f"backend: {config.format}")
+    print("export_result: OK")
+
+
+if __name__ == "__main__":
+    # 函式區塊用途：提供 CLI 執行入口
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# 檔案用途：將原始影格（stdin 二進位 payload 或 shared memory）包裝為 NumPy 陣列，省去影像編解碼與檔案 I/O
+
+# ───────────────────────────────────────────────
+# 匯入區塊：集中管理影格包裝所需的標準函式庫
+# ───────────────────────────────────────────────
+import contextlib
+import importlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, ContextManager, Dict, Iterator, Optional, Tuple
+
+# ───────────────────────────────────────────────
+# 常數區塊：支援的色彩排列
+# ───────────────────────────────────────────────
+SUPPORTED_COLORS = ("bgr", "rgb", "gray")
+# 常駐模式保留的 shared memory 附掛數上限；呼叫端通常只輪替少數幾段 buffer
+MAX_SHARED_ATTACHMENTS = 8
+# 能以 fstat 的 st_nlink 判斷 shared memory 是否已被 unlink（重建同名區段）的平台；
+# Windows 只要仍有 handle，同名區段就不會被重建，也可安全沿用附掛
+REUSE_SHARED_ATTACHMENTS = sys.platform.startswith("linux") or os.name == "nt"
+
+# shm_name -> SharedMemory；以 OrderedDict 保留最近使用順序
+_SHARED_ATTACHMENTS: "OrderedDict[str, Any]" = OrderedDict()
+_SHARED_ATTACHMENTS_LOCK = threading.Lock()
+
+
+# ───────────────────────────────────────────────
+# 自訂錯誤類別區塊：影格描述或資料不合法
+# ───────────────────────────────────────────────
+class FrameInputError(ValueError):
+    """影格描述（shape/color/payload 長度）不合法。"""
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：驗證影格描述，回傳 (shape, color)
+# ───────────────────────────────────────────────
+def parse_frame_spec(spec: Dict[str, Any]) -> Tuple[Tuple[int, ...], str]:
+    """檢查 shape 為 [h, w] 或 [h, w, 3] 的正整數，dtype 僅支援 uint8。"""
+    shape_raw = spec.get("shape")
+    if not isinstance(shape_raw, list) or len(shape_raw) not in (2, 3):
+        raise FrameInputError("frame.shape 必須為 [h, w] 或 [h, w, 3]")
+    try:
+        shape = tuple(int(value) for value in shape_raw)
+    except (TypeError, ValueError) as exc:
+        raise FrameInputError(f"frame.shape 必須為整數: {exc}") from exc
+    if any(value <= 0 for value in shape) or (len(shape) == 3 and shape[2] != 3):
+        raise FrameInputError("frame.shape 數值不合法")
+
+    dtype = str(spec.get("dtype", "uint8")).lower()
+    if dtype != "uint8":
+        raise FrameInputError("frame.dtype 目前僅支援 uint8")
+
+    color = str(spec.get("color", "bgr" if len(shape) == 3 else "gray")).lower()
+    if color not in SUPPORTED_COLORS:
+        raise FrameInputError(f"不支援的 frame.color: {color}")
+    if (color == "gray") != (len(shape) == 2):
+        raise FrameInputError("gray 影格的 shape 必須為 [h, w]，彩色影格必須為 [h, w, 3]")
+    return shape, color
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：將 buffer 包裝為影格陣列（BGR 不複製）
+# ───────────────────────────────────────────────
+def wrap_frame(buffer: Any, spec: Dict[str, Any], offset: int = 0) -> Any:
+    """以 np.frombuffer 直接引用 buffer；RGB 與灰階需轉成 BGR，才會產生一次複製。"""
+    np = importlib.import_module("numpy")
+    shape, color = parse_frame_spec(spec)
+    expected = 1
+    for value in shape:
+        expected *= value
+    available = len(buffer) - offset
+    if available < expected:
+        raise FrameInputError(f"影格資料長度不足：需要 {expected} bytes，實際 {available} bytes")
+
+    frame = np.frombuffer(buffer, dtype=np.uint8, count=expected, offset=offset).reshape(shape)
+    if color == "rgb":
+        # 色彩轉換區塊用途：ultralytics 的 ndarray 輸入視為 BGR
+        return np.ascontiguousarray(frame[..., ::-1])
+    if color == "gray":
+        return np.ascontiguousarray(np.repeat(frame[..., None], 3, axis=2))
+    return frame
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：以唯讀方式附掛既有的 shared memory
+# ───────────────────────────────────────────────
+def _attach_shared_memory(name: str) -> Any:
+    """附掛由呼叫端建立的 shared memory；本進程不負責 unlink。"""
+    shared_memory = importlib.import_module("multiprocessing.shared_memory")
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # 相容區塊用途：Python 3.13 以前沒有 track 參數，需手動取消 resource_tracker 登記，
+        # 否則本進程結束時會把呼叫端的 shared memory 一併刪除
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker = importlib.import_module("multiprocessing.resource_tracker")
+        with contextlib.suppress(Exception):
+            resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+        return shm
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：關閉 shared memory 的檔案描述元與對應
+# ───────────────────────────────────────────────
+def _close_shared_memory(shm: Any) -> None:
+    """一般情況直接 close；影格仍被外部引用（例如 ultralytics 保留的 orig_img）時改為手動關閉 fd。
+
+    SharedMemory.close() 遇到 BufferError 就不會執行 os.close(fd)；對應本身已不需要這個 fd，
+    交由仍存活的影格陣列持有，最後一個引用消失時才解除對應。
+    """
+    try:
+        shm.close()
+        return
+    except BufferError:
+        pass
+    fd = getattr(shm, "_fd", -1)
+    if fd >= 0:
+        os.close(fd)
+        shm._fd = -1
+    # 脫離區塊用途：避免 SharedMemory.__del__ 再次 close 時觸發無法攔截的 BufferError 訊息
+    shm._buf = None
+    shm._mmap = None
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：判斷附掛的 shared memory 是否已被呼叫端 unlink
+# ───────────────────────────────────────────────
+def _is_unlinked(shm: Any) -> bool:
+    """POSIX 以 fstat 的連結數判斷；Windows 沒有 fd，名稱存在期間必為同一段。"""
+    fd = getattr(shm, "_fd", -1)
+    if fd < 0:
+        return False
+    try:
+        return os.fstat(fd).st_nlink == 0
+    except OSError:
+        return True
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：取得（或沿用）指定名稱的 shared memory 附掛
+# ───────────────────────────────────────────────
+def _acquire_shared_memory(name: str) -> Any:
+    """呼叫端需持有 _SHARED_ATTACHMENTS_LOCK。
+
+    每個 shm_name 在行程內只附掛一次：ultralytics 會保留上一張影格的引用，逐請求附掛再關閉時 close 會失敗，
+    常駐模式下 fd 會一路累積到 EMFILE。區段被 unlink（例如呼叫端以同名重建）後才重新附掛。
+    """
+    shm = _SHARED_ATTACHMENTS.pop(name, None)
+    if shm is not None and _is_unlinked(shm):
+        _close_shared_memory(shm)
+        shm = None
+    if shm is None:
+        shm = _attach_shared_memory(name)
+    _SHARED_ATTACHMENTS[name] = shm
+    while len(_SHARED_ATTACHMENTS) > MAX_SHARED_ATTACHMENTS:
+        _, evicted = _SHARED_ATTACHMENTS.popitem(last=False)
+        _close_shared_memory(evicted)
+    return shm
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：釋放所有保留中的 shared memory 附掛
+# ───────────────────────────────────────────────
+def close_shared_frames() -> None:
+    """常駐模式結束時呼叫；仍被引用的影格維持可讀，直到引用消失。"""
+    with _SHARED_ATTACHMENTS_LOCK:
+        while _SHARED_ATTACHMENTS:
+            _close_shared_memory(_SHARED_ATTACHMENTS.popitem(last=False)[1])
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：在 with 區塊內提供 shared memory 影格
+# ───────────────────────────────────────────────
+@contextlib.contextmanager
+def open_shared_frame(spec: Dict[str, Any]) -> Iterator[Any]:
+    """依 frame.shm_name/offset 取得影格；不刪除 shared memory。
+
+    可沿用附掛的平台保留附掛供下一筆請求使用，其餘平台離開 with 時關閉 fd 與對應。
+    """
+    name = str(spec.get("shm_name", "")).strip()
+    if not name:
+        raise FrameInputError("frame.shm_name 不可為空字串")
+    try:
+        offset = int(spec.get("offset", 0))
+    except (TypeError, ValueError) as exc:
+        raise FrameInputError(f"frame.offset 必須為整數: {exc}") from exc
+    if offset < 0:
+        raise FrameInputError("frame.offset 不可為負數")
+
+    if REUSE_SHARED_ATTACHMENTS:
+        # 沿用附掛區塊用途：包裝影格需在鎖內完成，避免其他執行緒同時淘汰這段附掛
+        with _SHARED_ATTACHMENTS_LOCK:
+            try:
+                shm = _acquire_shared_memory(name)
+            except FileNotFoundError as exc:
+                raise FrameInputError(f"找不到 shared memory: {name}") from exc
+            frame = wrap_frame(shm.buf, spec, offset=offset)
+        yield frame
+        return
+
+    try:
+        shm = _attach_shared_memory(name)
+    except FileNotFoundError as exc:
+        raise FrameInputError(f"找不到 shared memory: {name}") from exc
+    frame = None
+    try:
+        frame = wrap_frame(shm.buf, spec, offset=offset)
+        yield frame
+    finally:
+        # 釋放區塊用途：先放掉本函式對 shm.buf 的引用，close 才有機會直接成功
+        del frame
+        _close_shared_memory(shm)
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：依影格描述取得影格（payload 或 shared memory）
+# ───────────────────────────────────────────────
+def open_frame(spec: Dict[str, Any], payload: Optional[Any] = None) -> ContextManager[Any]:
+    """有 shm_name 時讀 shared memory，否則使用請求附帶的二進位 payload。
+
+    直接回傳 context manager 而不再包一層 generator，避免外層區域變數多持有一份 shm.buf 引用。
+    """
+    if not isinstance(spec, dict):
+        raise FrameInputError("frame 必須為 JSON 物件")
+    if spec.get("shm_name"):
+        return open_shared_frame(spec)
+    if payload is None:
+        raise FrameInputError("frame 未提供 shm_name，且請求沒有附帶二進位 payload")
+    return contextlib.nullcontext(wrap_frame(payload, spec))
@@ -9,9 +9,32 @@ import importlib
 import json
 import os
 import sys
+import threading
+import time
 import traceback
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from .motion import MOTION_GATE, frame_signature, parse_motion_gate
+    from .roi import build_roi_window, parse_roi, shift_candidate
+except ImportError:
+    # 匯入相容區塊用途：直接以腳本執行時改用同目錄匯入
+    from motion import MOTION_GATE, frame_signature, parse_motion_gate  # type: ignore
+    from roi import build_roi_window, parse_roi, shift_candidate  # type: ignore
+
+# ───────────────────────────────────────────────
+# 常數區塊：模型快取容量（常駐模式下可同時保留的權重數）
+# ───────────────────────────────────────────────
+DEFAULT_MODEL_CACHE_SIZE = int(os.environ.get("YOLO_MODEL_CACHE_SIZE", "2"))
+
+# ───────────────────────────────────────────────
+# 常數區塊：推論後端（auto 依副檔名判斷，亦可由 YOLO_BACKEND 指定預設值）
+# ───────────────────────────────────────────────
+SUPPORTED_BACKENDS = ("auto", "pytorch", "onnx", "openvino")
+DEFAULT_BACKEND = os.environ.get("YOLO_BACKEND", "auto").strip().lower() or "auto"
+OPENVINO_DIR_SUFFIX = "_openvino_model"
 
 # ───────────────────────────────────────────────
 # 狀態資料結構區塊：定義推論所需的核心設定
@@ -23,8 +46,11 @@ class InferConfig:
     source: str
     weights: str
     conf_threshold: float
-    target: str
+    target: Optional[str]
     device: str
+    backend: str
+    targets: Optional[List[str]] = None
+    top_k: Optional[int] = None
 
 
 # ───────────────────────────────────────────────
@@ -42,8 +68,17 @@ def parse_args() -> argparse.Namespace:
     # 參數說明區塊：指定推論裝置 (cpu/cuda)
     parser.add_argument("--device", default="cpu", help="推論裝置 (cpu/cuda)")
     # 參數說明區塊：指定要追蹤的目標類別名稱
-    parser.add_argument("--target", required=True, help="要追蹤的目標類別名稱")
-    return parser.parse_args()
+    parser.add_argument("--target", default=None, help="要追蹤的目標類別名稱")
+    # 參數說明區塊：多目標模式，逗號分隔的類別名稱（取代 --target）
+    parser.add_argument("--targets", default=None, help="逗號分隔的多個目標類別，單次推論回傳各類別的所有框")
+    # 參數說明區塊：多目標模式下每個類別最多回傳的框數
+    parser.add_argument("--top-k", type=int, default=None, help="多目標模式下每個類別最多回傳的框數")
+    # 參數說明區塊：指定推論後端 (auto/pytorch/onnx/openvino)
+    parser.add_argument("--backend", default=DEFAULT_BACKEND, choices=SUPPORTED_BACKENDS, help="推論後端")
+    args = parser.parse_args()
+    if not args.target and not args.targets:
+        parser.error("需提供 --target 或 --targets")
+    return args
 
 
 # ───────────────────────────────────────────────
@@ -57,6 +92,9 @@ def build_config(args: argparse.Namespace) -> InferConfig:
         conf_threshold=args.conf,
         target=args.target,
         device=args.device,
+        backend=args.backend,
+        targets=[item.strip() for item in args.targets.split(",") if item.strip()] if args.targets else None,
+        top_k=args.top_k,
     )
 
 
@@ -70,16 +108,145 @@ def load_yolo_class():
 
 
 # ───────────────────────────────────────────────
-# 函式區塊用途：載入 OpenCV 取得影像大小
+# 函式區塊用途：依權重路徑判斷推論後端
+# ───────────────────────────────────────────────
+def detect_backend(weights_path: str) -> str:
+    """.onnx 為 onnx；*_openvino_model 資料夾或 .xml 為 openvino；其餘視為 pytorch。"""
+    normalized = weights_path.rstrip("/\\").lower()
+    if normalized.endswith(".onnx"):
+        return "onnx"
+    if normalized.endswith(OPENVINO_DIR_SUFFIX) or normalized.endswith(".xml"):
+        return "openvino"
+    return "pytorch"
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：解析實際要載入的權重路徑與後端
+# ───────────────────────────────────────────────
+def resolve_weights(weights_path: str, backend: Optional[str] = None) -> Tuple[Optional[str], str]:
+    """回傳 (實際權重路徑, 後端)；找不到對應檔案時路徑為 None。
+
+    指定 onnx/openvino 但 weights_path 為 .pt 時，改用 export.py 輸出在旁邊的
+    best.onnx 或 best_openvino_model/，呼叫端不需更動權重設定即可切換後端。
+    """
+    requested = (backend or DEFAULT_BACKEND).strip().lower()
+    if requested not in SUPPORTED_BACKENDS:
+        raise ValueError(f"不支援的推論後端: {requested}")
+    detected = detect_backend(weights_path)
+    if requested in ("auto", detected):
+        resolved = weights_path
+        requested = detected
+    elif detected == "pytorch" and requested == "onnx":
+        resolved = os.path.splitext(weights_path)[0] + ".onnx"
+    elif detected == "pytorch" and requested == "openvino":
+        resolved = os.path.splitext(weights_path)[0] + OPENVINO_DIR_SUFFIX
+    else:
+        raise ValueError(f"權重格式 ({detected}) 與指定後端 ({requested}) 不相符")
+
+    if requested == "openvino" and os.path.isdir(resolved):
+        return resolved, requested
+    if requested == "openvino" and resolved.lower().endswith(".xml") and os.path.isfile(resolved):
+        # 路徑整理區塊用途：ultralytics 以 OpenVINO 匯出資料夾為載入單位
+        return os.path.dirname(resolved), requested
+    return (resolved if os.path.isfile(resolved) else None), requested
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：確認權重路徑存在（檔案或 OpenVINO 匯出資料夾）
+# ───────────────────────────────────────────────
+def weights_exist(weights_path: str) -> bool:
+    """.pt/.onnx 需為檔案，OpenVINO 匯出結果為資料夾。"""
+    if os.path.isfile(weights_path):
+        return True
+    return detect_backend(weights_path) == "openvino" and os.path.isdir(weights_path)
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：取得權重版本（檔案 mtime，資料夾取內部檔案最新 mtime）
+# ───────────────────────────────────────────────
+def weights_version(path: str) -> int:
+    """回傳可作為快取鍵的 mtime_ns；OpenVINO 資料夾內任一檔案更新都視為新版本。"""
+    if not os.path.isdir(path):
+        return os.stat(path).st_mtime_ns
+    versions = [os.stat(entry.path).st_mtime_ns for entry in os.scandir(path) if entry.is_file()]
+    return max(versions, default=os.stat(path).st_mtime_ns)
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：依後端載入 YOLO 模型
+# ───────────────────────────────────────────────
+def load_model(weights_path: str) -> Any:
+    """載入 .pt 或匯出模型；ONNX/OpenVINO 無法自行推斷任務類型，需明確指定 detect。"""
+    if detect_backend(weights_path) == "pytorch":
+        return load_yolo_class()(weights_path)
+    return load_yolo_class()(weights_path, task="detect")
+
+
+# ───────────────────────────────────────────────
+# 模型快取區塊：以權重路徑 + mtime 為鍵的 LRU，常駐模式下避免重複載入
+# ───────────────────────────────────────────────
+class ModelCache:
+    """已載入 YOLO 模型的 LRU 快取，權重檔案更新（mtime 改變）時自動重新載入。"""
+
+    def __init__(self, capacity: int = DEFAULT_MODEL_CACHE_SIZE) -> None:
+        self.capacity = max(1, capacity)
+        self._models: "OrderedDict[Tuple[str, int], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, weights_path: str) -> Tuple[Any, bool]:
+        """取得模型，回傳 (model, 是否命中快取)。"""
+        path = os.path.abspath(weights_path)
+        key = (path, weights_version(path))
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                return model, True
+            # 快取失效區塊用途：同一路徑的舊版本權重直接移除
+            for stale_key in [item for item in self._models if item[0] == path]:
+                del self._models[stale_key]
+            model = load_model(path)
+            self._models[key] = model
+            while len(self._models) > self.capacity:
+                self._models.popitem(last=False)
+            return model, False
+
+    def clear(self) -> None:
+        """清空所有已載入的模型。"""
+        with self._lock:
+            self._models.clear()
+
+
+# 模組層級快取：單次執行時僅載入一次，常駐模式下跨請求共用
+MODEL_CACHE = ModelCache()
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：計算經過的毫秒數
+# ───────────────────────────────────────────────
+def elapsed_ms(start: float) -> float:
+    """回傳從 start（perf_counter）到現在的毫秒數。"""
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：以 OpenCV 解碼影像（僅解碼一次，同時供尺寸與推論使用）
 # ───────────────────────────────────────────────
-def load_image_size(image_path: str) -> Tuple[int, int]:
-    """讀取影像尺寸，回傳 (w, h)。"""
-    # 影像讀取區塊用途：使用 OpenCV 確保取得原始尺寸
+def load_image(image_path: str) -> Any:
+    """讀取並解碼影像，回傳 BGR ndarray。"""
     cv2 = importlib.import_module("cv2")
     image = cv2.imread(image_path)
     if image is None:
         # 錯誤分支區塊用途：影像讀取失敗時拋出例外給上層統一處理
         raise ValueError("影像讀取失敗，請確認影像格式或路徑")
+    return image
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：由已解碼影像取得尺寸
+# ───────────────────────────────────────────────
+def get_image_size(image: Any) -> Tuple[int, int]:
+    """回傳 ndarray 影像的 (w, h)。"""
     height, width = image.shape[:2]
     return int(width), int(height)
 
@@ -119,6 +286,65 @@ def build_bbox_and_center(x1: float, y1: float, x2: float, y2: float) -> Tuple[D
     return bbox, center
 
 
+# ───────────────────────────────────────────────
+# 函式區塊用途：將 tensor / list 轉為 numpy 陣列
+# ───────────────────────────────────────────────
+def to_numpy(value: Any) -> Any:
+    """GPU tensor 先搬回 CPU，整批一次轉換，避免逐框取值。"""
+    if hasattr(value, "cpu"):
+        value = value.cpu()
+    if hasattr(value, "numpy"):
+        return value.numpy()
+    return importlib.import_module("numpy").asarray(value)
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：將 target 名稱轉為模型類別 id
+# ───────────────────────────────────────────────
+def resolve_class_ids(names: Dict[int, str], target: str) -> List[int]:
+    """回傳名稱等於 target 的類別 id；模型沒有該類別時回傳空陣列。"""
+    class_ids = [int(cls_id) for cls_id, name in names.items() if name == target]
+    if not class_ids and target.isdigit() and int(target) not in names:
+        # 相容區塊用途：沿用舊行為，類別表缺漏時以數字字串直接對應類別 id
+        class_ids = [int(target)]
+    return class_ids
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：以向量化運算篩選符合類別與信心門檻的框
+# ───────────────────────────────────────────────
+def filter_boxes(boxes: Any, class_ids: List[int], conf_threshold: float) -> Tuple[Any, Any, Any, Optional[Any]]:
+    """回傳 (保留的 cls, conf, xyxy, track_id)，全部為 numpy 陣列，順序與原始框一致。"""
+    np = importlib.import_module("numpy")
+    cls_values = to_numpy(boxes.cls).reshape(-1)
+    conf_values = to_numpy(boxes.conf).reshape(-1).astype(float)
+    mask = np.isin(cls_values.astype(int), class_ids) & (conf_values >= conf_threshold)
+    indices = np.flatnonzero(mask)
+    xyxy_values = to_numpy(boxes.xyxy).reshape(-1, 4)[indices] if indices.size else np.empty((0, 4))
+    # 追蹤模式區塊用途：model.track 會在 boxes.id 帶入持續的 track id
+    id_values = getattr(boxes, "id", None)
+    track_ids = to_numpy(id_values).reshape(-1)[indices] if id_values is not None else None
+    return cls_values[indices].astype(int), conf_values[indices], xyxy_values, track_ids
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：將單一框組成候選 detection
+# ───────────────────────────────────────────────
+def build_candidate(label: str, confidence: Any, xyxy: Any, track_id: Optional[Any] = None) -> Dict[str, Any]:
+    """組成 label/conf/bbox/center（追蹤模式另含 track_id）。"""
+    x1, y1, x2, y2 = [float(value) for value in xyxy]
+    bbox, center = build_bbox_and_center(x1, y1, x2, y2)
+    candidate = {
+        "label": label,
+        "conf": float(confidence),
+        "bbox": bbox,
+        "center": center,
+    }
+    if track_id is not None:
+        candidate["track_id"] = int(track_id)
+    return candidate
+
+
 # ───────────────────────────────────────────────
 # 函式區塊用途：從 YOLO 結果抽取候選 detection
 # ───────────────────────────────────────────────
@@ -128,30 +354,362 @@ def extract_candidates(
     target: str,
     conf_threshold: float,
 ) -> List[Dict[str, Any]]:
-    """抽取符合目標與信心門檻的候選框。"""
-    candidates: List[Dict[str, Any]] = []
-    for box in boxes:
-        # 解析輸出區塊用途：兼容不同 tensor 型別的取值方式
-        cls_value = box.cls[0] if hasattr(box.cls, "__len__") else box.cls
-        conf_value = box.conf[0] if hasattr(box.conf, "__len__") else box.conf
-        xyxy_value = box.xyxy[0] if hasattr(box.xyxy, "__len__") else box.xyxy
-        cls_id = int(cls_value)
-        confidence = float(conf_value)
-        label = names.get(cls_id, str(cls_id))
-        # 篩選判斷區塊用途：只保留 label 相符且信心值達標的框
-        if label != target or confidence < conf_threshold:
-            continue
-        x1, y1, x2, y2 = [float(value) for value in xyxy_value.tolist()]
-        bbox, center = build_bbox_and_center(x1, y1, x2, y2)
-        candidates.append(
-            {
-                "label": label,
-                "conf": confidence,
-                "bbox": bbox,
-                "center": center,
-            }
+    """抽取符合目標與信心門檻的候選框；篩選以向量化完成，只為保留的框組 dict。"""
+    class_ids = resolve_class_ids(names, target)
+    if not class_ids or len(boxes) == 0:
+        return []
+    cls_values, conf_values, xyxy_values, track_ids = filter_boxes(boxes, class_ids, conf_threshold)
+    return [
+        build_candidate(
+            names.get(int(cls_values[index]), str(int(cls_values[index]))),
+            conf_values[index],
+            xyxy_values[index],
+            track_ids[index] if track_ids is not None else None,
         )
-    return candidates
+        for index in range(len(conf_values))
+    ]
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：直接挑出最高信心的目標框
+# ───────────────────────────────────────────────
+def select_best_candidate(
+    boxes: Any,
+    names: Dict[int, str],
+    target: str,
+    conf_threshold: float,
+) -> Optional[Dict[str, Any]]:
+    """以 argmax 取最高信心框，不為其他框建立 dict；沒有符合的框時回傳 None。"""
+    class_ids = resolve_class_ids(names, target)
+    if not class_ids or len(boxes) == 0:
+        return None
+    cls_values, conf_values, xyxy_values, track_ids = filter_boxes(boxes, class_ids, conf_threshold)
+    if not len(conf_values):
+        return None
+    best = int(conf_values.argmax())
+    return build_candidate(
+        names.get(int(cls_values[best]), str(int(cls_values[best]))),
+        conf_values[best],
+        xyxy_values[best],
+        track_ids[best] if track_ids is not None else None,
+    )
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：一次篩選多個目標並依 label 分組
+# ───────────────────────────────────────────────
+def group_candidates(
+    boxes: Any,
+    names: Dict[int, str],
+    class_map: Dict[str, List[int]],
+    conf_threshold: float,
+    top_k: Optional[int] = None,
+) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, int]]:
+    """回傳 ({target: 依信心排序的前 top_k 個框}, {target: 符合的總框數})；只對保留的框組 dict。"""
+    np = importlib.import_module("numpy")
+    grouped: Dict[str, List[Dict[str, Any]]] = {target: [] for target in class_map}
+    counts: Dict[str, int] = {target: 0 for target in class_map}
+    all_ids = sorted({cls_id for ids in class_map.values() for cls_id in ids})
+    if not all_ids or len(boxes) == 0:
+        return grouped, counts
+    # 向量化篩選區塊用途：所有目標共用一次篩選，再以遮罩分組
+    cls_values, conf_values, xyxy_values, track_ids = filter_boxes(boxes, all_ids, conf_threshold)
+    for target, ids in class_map.items():
+        indices = np.flatnonzero(np.isin(cls_values, ids))
+        counts[target] = int(indices.size)
+        # 排序區塊用途：依信心由高到低，穩定排序讓同分框維持原順序
+        indices = indices[np.argsort(-conf_values[indices], kind="stable")][:top_k]
+        grouped[target] = [
+            build_candidate(
+                names.get(int(cls_values[index]), str(int(cls_values[index]))),
+                conf_values[index],
+                xyxy_values[index],
+                track_ids[index] if track_ids is not None else None,
+            )
+            for index in indices
+        ]
+    return grouped, counts
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：整理模型類別名稱為 dict
+# ───────────────────────────────────────────────
+def resolve_names(result: Any, model: Any) -> Dict[int, str]:
+    """由推論結果或模型取得類別名稱，統一轉成 {id: name}。"""
+    raw_names = getattr(result, "names", None) or getattr(model, "names", None)
+    if raw_names is None:
+        # 錯誤分支區塊用途：結果格式不完整時回報錯誤
+        raise RuntimeError("推論結果格式異常")
+    # 類別名稱整理區塊用途：確保 names 為 dict 格式以便查詢
+    if isinstance(raw_names, list):
+        return {index: name for index, name in enumerate(raw_names)}
+    if isinstance(raw_names, dict):
+        return raw_names
+    # 錯誤分支區塊用途：類別名稱型別異常時回報
+    raise RuntimeError("類別名稱格式異常")
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：將單張影像的推論結果轉為統一回傳格式
+# ───────────────────────────────────────────────
+def build_detection_response(
+    result: Any,
+    model: Any,
+    target: str,
+    conf_threshold: float,
+    image_size: Tuple[int, int],
+) -> Dict[str, Any]:
+    """挑出最高信心的目標框，回傳 found/未命中格式。"""
+    boxes = getattr(result, "boxes", None)
+    if boxes is None:
+        # 錯誤分支區塊用途：結果格式不完整時回報錯誤
+        raise RuntimeError("推論結果格式異常")
+    names = resolve_names(result, model)
+
+    best = select_best_candidate(boxes, names, target, conf_threshold)
+    return build_found_response(best, image_size)
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：將最佳候選框組成 found/未命中回傳格式
+# ───────────────────────────────────────────────
+def build_found_response(best: Optional[Dict[str, Any]], image_size: Tuple[int, int]) -> Dict[str, Any]:
+    """best 為 None 時回傳 found=false，否則帶出 label/conf/bbox/center。"""
+    image_width, image_height = image_size
+    if best is None:
+        # 未命中回傳區塊用途：推論成功但沒有符合目標時回傳 found=false
+        return {
+            "ok": True,
+            "found": False,
+            "image_size": {"w": image_width, "h": image_height},
+        }
+
+    # 最佳結果區塊用途：select_best_candidate 已採用最高信心值避免追蹤抖動
+    return {
+        "ok": True,
+        "found": True,
+        "image_size": {"w": image_width, "h": image_height},
+        "label": best["label"],
+        "conf": best["conf"],
+        "bbox": best["bbox"],
+        "center": best["center"],
+    }
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：在上一次目標附近的裁切視窗內以小尺寸推論
+# ───────────────────────────────────────────────
+def search_roi(
+    model: Any,
+    image: Any,
+    roi: Dict[str, Any],
+    window: Tuple[int, int, int, int],
+    target: str,
+    conf: float,
+    device: str,
+    class_ids: List[int],
+) -> Optional[Dict[str, Any]]:
+    """回傳已換算回全圖座標的最佳框；找不到或信心低於 roi.min_conf 時回傳 None。"""
+    x1, y1, x2, y2 = window
+    # 裁切區塊用途：ndarray 切片為 view，不複製像素
+    results = model.predict(
+        source=image[y1:y2, x1:x2],
+        conf=float(conf),
+        device=device,
+        classes=class_ids,
+        imgsz=roi["imgsz"],
+        verbose=False,
+    )
+    if not results or getattr(results[0], "boxes", None) is None:
+        return None
+    best = select_best_candidate(results[0].boxes, resolve_names(results[0], model), target, float(conf))
+    min_conf = roi["min_conf"] if roi["min_conf"] is not None else float(conf)
+    if best is None or best["conf"] < min_conf:
+        return None
+    return shift_candidate(best, x1, y1)
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：對已解碼的 ndarray 影像執行推論
+# ───────────────────────────────────────────────
+def infer_image(
+    image: Any,
+    weights_path: str,
+    target: str,
+    conf: float = 0.25,
+    device: str = "cpu",
+    model_cache: Optional[ModelCache] = None,
+    timing: Optional[Dict[str, float]] = None,
+    backend: Optional[str] = None,
+    roi: Optional[Dict[str, Any]] = None,
+    motion_gate: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """對 BGR ndarray 執行推論（不經檔案讀取），回傳與 infer 相同格式。
+
+    提供 roi（上一次的 bbox/center）時先在附近裁切視窗以較小 imgsz 推論，
+    目標遺失或信心不足才退回全畫面搜尋；回傳座標一律為全圖座標。
+    提供 motion_gate 時，畫面與上一次推論幾乎相同就直接沿用該次結果（cached=true）。
+    """
+    started = time.perf_counter()
+    timing = dict(timing or {})
+    # 基本檢查區塊用途：依後端找出實際權重並確認存在
+    try:
+        resolved_path, resolved_backend = resolve_weights(weights_path, backend)
+    except ValueError as exc:
+        return {"ok": False, "error": "INFER_FAILED", "detail": trim_error_detail(str(exc))}
+    if resolved_path is None:
+        return {"ok": False, "error": "WEIGHTS_NOT_FOUND"}
+    # 基本檢查區塊用途：確認 target 為非空字串
+    if not isinstance(target, str) or not target.strip():
+        return {"ok": False, "error": "INFER_FAILED", "detail": "target 必須為非空字串"}
+
+    # 推論區塊用途：包住 YOLO 推論流程，統一錯誤處理
+    try:
+        image_size = get_image_size(image)
+        # 變動閘門區塊用途：縮圖灰階差異低於門檻且結果未過期時，不執行推論
+        gate_key: Optional[Tuple[Any, ...]] = None
+        if motion_gate is not None:
+            motion_gate = parse_motion_gate(motion_gate)
+            gate_started = time.perf_counter()
+            signature = frame_signature(image)
+            gate_key = (motion_gate["key"], os.path.abspath(resolved_path), target, float(conf), image_size)
+            cached, motion, age_ms = MOTION_GATE.lookup(
+                gate_key, signature, motion_gate["threshold"], motion_gate["max_age_ms"]
+            )
+            timing["motion_gate"] = elapsed_ms(gate_started)
+            if cached is not None:
+                timing["total"] = round(timing.get("decode", 0.0) + elapsed_ms(started), 3)
+                return {
+                    **cached,
+                    "cached": True,
+                    "cache_age_ms": round(age_ms, 3),
+                    "motion": round(motion, 5),
+                    "timing_ms": timing,
+                }
+        # 模型載入區塊用途：由快取取得指定權重，權重檔案更新時自動重新載入
+        load_started = time.perf_counter()
+        model, cache_hit = (model_cache or MODEL_CACHE).get(resolved_path)
+        timing["model_load"] = elapsed_ms(load_started)
+        # 類別預篩區塊用途：target 先轉為類別 id 交給 NMS，模型沒有該類別時不必推論
+        class_ids = resolve_class_ids(resolve_names(None, model), target)
+        if not class_ids:
+            timing["total"] = round(timing.get("decode", 0.0) + elapsed_ms(started), 3)
+            return {
+                "ok": True,
+                "found": False,
+                "image_size": {"w": image_size[0], "h": image_size[1]},
+                "model_cached": cache_hit,
+                "backend": resolved_backend,
+                "timing_ms": timing,
+            }
+        # ROI 搜尋區塊用途：鎖定後只推論目標附近的小區域，命中即可省去全畫面推論
+        response: Optional[Dict[str, Any]] = None
+        search: Optional[Dict[str, Any]] = None
+        if roi is not None:
+            roi = parse_roi(roi)
+            window = build_roi_window(roi, image_size)
+            if window is not None:
+                roi_started = time.perf_counter()
+                best = search_roi(model, image, roi, window, target, conf, device, class_ids)
+                timing["roi_predict"] = elapsed_ms(roi_started)
+                roi_box = dict(zip(("x1", "y1", "x2", "y2"), window))
+                if best is not None:
+                    response = build_found_response(best, image_size)
+                    search = {"mode": "roi", "roi": roi_box}
+                else:
+                    search = {"mode": "full", "fallback": True, "roi": roi_box}
+            else:
+                search = {"mode": "full", "fallback": False}
+
+        if response is None:
+            # 推論執行區塊用途：直接傳入 ndarray，避免 ultralytics 重新讀檔解碼
+            predict_started = time.perf_counter()
+            results = model.predict(source=image, conf=float(conf), device=device, classes=class_ids, verbose=False)
+            timing["predict"] = elapsed_ms(predict_started)
+            if not results:
+                # 錯誤分支區塊用途：推論沒有回傳結果時直接中止
+                raise RuntimeError("推論結果為空")
+            response = build_detection_response(results[0], model, target, float(conf), image_size)
+
+        if search is not None:
+            response["search"] = search
+        timing["total"] = round(timing.get("decode", 0.0) + elapsed_ms(started), 3)
+        response["model_cached"] = cache_hit
+        response["backend"] = resolved_backend
+        if gate_key is not None:
+            MOTION_GATE.store(gate_key, signature, response)
+            response["cached"] = False
+            response["motion"] = round(motion, 5)
+        response["timing_ms"] = timing
+        return response
+    except Exception as exc:
+        # 錯誤處理區塊用途：統一回傳 INFER_FAILED 並保留錯誤訊息
+        sys.stderr.write(traceback.format_exc())
+        return {"ok": False, "error": "INFER_FAILED", "detail": trim_error_detail(str(exc))}
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：單次推論取得多個目標類別的所有偵測框
+# ───────────────────────────────────────────────
+def infer_image_multi(
+    image: Any,
+    weights_path: str,
+    targets: List[str],
+    conf: float = 0.25,
+    top_k: Optional[int] = None,
+    device: str = "cpu",
+    model_cache: Optional[ModelCache] = None,
+    timing: Optional[Dict[str, float]] = None,
+    backend: Optional[str] = None,
+) -> Dict[str, Any]:
+    """所有 targets 的類別一起交給 NMS，只執行一次 predict；detections 依 target 分組，每組最多 top_k 個框。"""
+    started = time.perf_counter()
+    timing = dict(timing or {})
+    try:
+        resolved_path, resolved_backend = resolve_weights(weights_path, backend)
+    except ValueError as exc:
+        return {"ok": False, "error": "INFER_FAILED", "detail": trim_error_detail(str(exc))}
+    if resolved_path is None:
+        return {"ok": False, "error": "WEIGHTS_NOT_FOUND"}
+    if not targets or any(not isinstance(target, str) or not target.strip() for target in targets):
+        return {"ok": False, "error": "INFER_FAILED", "detail": "targets 必須為非空字串陣列"}
+
+    try:
+        image_size = get_image_size(image)
+        load_started = time.perf_counter()
+        model, cache_hit = (model_cache or MODEL_CACHE).get(resolved_path)
+        timing["model_load"] = elapsed_ms(load_started)
+        names = resolve_names(None, model)
+        class_map = {target: resolve_class_ids(names, target) for target in targets}
+        class_ids = sorted({cls_id for ids in class_map.values() for cls_id in ids})
+        grouped: Dict[str, List[Dict[str, Any]]] = {target: [] for target in targets}
+        counts: Dict[str, int] = {target: 0 for target in targets}
+        if class_ids:
+            # 推論執行區塊用途：模型完全沒有這些類別時不必推論
+            predict_started = time.perf_counter()
+            results = model.predict(source=image, conf=float(conf), device=device, classes=class_ids, verbose=False)
+            timing["predict"] = elapsed_ms(predict_started)
+            if not results or getattr(results[0], "boxes", None) is None:
+                raise RuntimeError("推論結果格式異常")
+            grouped, counts = group_candidates(
+                results[0].boxes, resolve_names(results[0], model), class_map, float(conf), top_k
+            )
+        timing["total"] = round(timing.get("decode", 0.0) + elapsed_ms(started), 3)
+        return {
+            "ok": True,
+            "found": any(counts.values()),
+            "image_size": {"w": image_size[0], "h": image_size[1]},
+            "detections": grouped,
+            "counts": counts,
+            "unknown_targets": [target for target, ids in class_map.items() if not ids],
+            "model_cached": cache_hit,
+            "backend": resolved_backend,
+            "timing_ms": timing,
+        }
+    except Exception as exc:
+        # 錯誤處理區塊用途：統一回傳 INFER_FAILED 並保留錯誤訊息
+        sys.stderr.write(traceback.format_exc())
+        return {"ok": False, "error": "INFER_FAILED", "detail": trim_error_detail(str(exc))}
 
 
 # ───────────────────────────────────────────────
@@ -163,78 +721,148 @@ def infer(
     target: str,
     conf: float = 0.25,
     device: str = "cpu",
+    model_cache: Optional[ModelCache] = None,
+    backend: Optional[str] = None,
+    roi: Optional[Dict[str, Any]] = None,
+    motion_gate: Optional[Dict[str, Any]] = None,
+    targets: Optional[List[str]] = None,
+    top_k: Optional[int] = None,
+    decoded: Optional[Tuple[Any, float]] = None,
 ) -> Dict[str, Any]:
-    """執行 YOLOv11 推論並回傳指定格式結果。"""
+    """執行 YOLOv11 推論並回傳指定格式結果；提供 targets 時改為多目標模式（見 infer_image_multi）。
+
+    decoded 為呼叫端已預先解碼的 (影像, 解碼毫秒)，常駐管線在推論前一筆時即先解碼下一筆。
+    """
     # 基本檢查區塊用途：確認權重檔案存在
-    if not os.path.isfile(weights_path):
+    if not weights_exist(weights_path):
         return {"ok": False, "error": "WEIGHTS_NOT_FOUND"}
     # 基本檢查區塊用途：確認影像檔案存在
     if not os.path.isfile(image_path):
         # 設計說明區塊用途：將影像缺失視為獨立錯誤碼，便於外部快速判斷
         return {"ok": False, "error": "IMAGE_NOT_FOUND"}
-    # 基本檢查區塊用途：確認 target 為非空字串
-    if not isinstance(target, str) or not target.strip():
+    # 基本檢查區塊用途：確認 target 為非空字串（多目標模式改由 targets 檢查）
+    if targets is None and (not isinstance(target, str) or not target.strip()):
         return {"ok": False, "error": "INFER_FAILED", "detail": "target 必須為非空字串"}
 
-    # 影像尺寸讀取區塊用途：先取得影像尺寸供成功或未命中時回傳
+    # 影像解碼區塊用途：只解碼一次，尺寸與推論共用同一份 ndarray
     try:
-        image_width, image_height = load_image_size(image_path)
+        if decoded is not None:
+            image, decode_ms = decoded
+        else:
+            decode_started = time.perf_counter()
+            image = load_image(image_path)
+            decode_ms = elapsed_ms(decode_started)
     except Exception as exc:
         # 錯誤分支區塊用途：影像讀取失敗時轉換為 INFER_FAILED
         sys.stderr.write(traceback.format_exc())
         return {"ok": False, "error": "INFER_FAILED", "detail": trim_error_detail(str(exc))}
 
-    # 推論區塊用途：包住 YOLO 推論流程，統一錯誤處理
+    if targets is not None:
+        return infer_image_multi(
+            image,
+            weights_path=weights_path,
+            targets=targets,
+            conf=conf,
+            top_k=top_k,
+            device=device,
+            model_cache=model_cache,
+            timing={"decode": decode_ms},
+            backend=backend,
+        )
+    return infer_image(
+        image,
+        weights_path=weights_path,
+        target=target,
+        conf=conf,
+        device=device,
+        model_cache=model_cache,
+        timing={"decode": decode_ms},
+        backend=backend,
+        roi=roi,
+        motion_gate=motion_gate,
+    )
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：批次推論，多張影像共用一次 predict 呼叫
+# ───────────────────────────────────────────────
+def infer_batch(
+    images: List[Dict[str, Any]],
+    weights_path: str,
+    device: str = "cpu",
+    model_cache: Optional[ModelCache] = None,
+    backend: Optional[str] = None,
+) -> Dict[str, Any]:
+    """批次推論；images 每筆含 image_path/target/conf，results 依輸入順序回傳單張推論格式。"""
+    started = time.perf_counter()
     try:
-        yolo_class = load_yolo_class()
-        # 模型載入區塊用途：載入指定權重
-        model = yolo_class(weights_path)
-        # 推論執行區塊用途：啟動 YOLO 推論流程
-        results = model.predict(source=image_path, conf=float(conf), device=device)
-        if not results:
-            # 錯誤分支區塊用途：推論沒有回傳結果時直接中止
-            raise RuntimeError("推論結果為空")
-
-        primary = results[0]
-        boxes = getattr(primary, "boxes", None)
-        raw_names = getattr(primary, "names", None) or getattr(model, "names", None)
-        if boxes is None or raw_names is None:
-            # 錯誤分支區塊用途：結果格式不完整時回報錯誤
-            raise RuntimeError("推論結果格式異常")
-
-        # 類別名稱整理區塊用途：確保 names 為 dict 格式以便查詢
-        if isinstance(raw_names, list):
-            names = {index: name for index, name in enumerate(raw_names)}
-        elif isinstance(raw_names, dict):
-            names = raw_names
-        else:
-            # 錯誤分支區塊用途：類別名稱型別異常時回報
-            raise RuntimeError("類別名稱格式異常")
+        resolved_path, resolved_backend = resolve_weights(weights_path, backend)
+    except ValueError as exc:
+        return {"ok": False, "error": "INFER_FAILED", "detail": trim_error_detail(str(exc))}
+    if resolved_path is None:
+        return {"ok": False, "error": "WEIGHTS_NOT_FOUND"}
 
-        candidates = extract_candidates(boxes, names, target, float(conf))
-        if not candidates:
-            # 未命中回傳區塊用途：推論成功但沒有符合目標時回傳 found=false
-            return {
-                "ok": True,
-                "found": False,
-                "image_size": {"w": image_width, "h": image_height},
-            }
+    # 逐張檢查與解碼區塊用途：單張失敗只影響該筆結果，不中止整批
+    results: List[Optional[Dict[str, Any]]] = [None] * len(images)
+    decoded: List[Tuple[int, Any]] = []
+    decode_started = time.perf_counter()
+    for index, item in enumerate(images):
+        image_path = item.get("image_path", "")
+        target = item.get("target")
+        if not os.path.isfile(image_path):
+            results[index] = {"ok": False, "error": "IMAGE_NOT_FOUND"}
+            continue
+        if not isinstance(target, str) or not target.strip():
+            results[index] = {"ok": False, "error": "INFER_FAILED", "detail": "target 必須為非空字串"}
+            continue
+        try:
+            decoded.append((index, load_image(image_path)))
+        except Exception as exc:
+            results[index] = {"ok": False, "error": "INFER_FAILED", "detail": trim_error_detail(str(exc))}
+    timing = {"decode": elapsed_ms(decode_started)}
 
-        # 最佳結果選擇區塊用途：採用最高信心值避免追蹤抖動
-        best = max(candidates, key=lambda item: item.get("conf", 0.0))
-        return {
-            "ok": True,
-            "found": True,
-            "image_size": {"w": image_width, "h": image_height},
-            "label": best["label"],
-            "conf": best["conf"],
-            "bbox": best["bbox"],
-            "center": best["center"],
-        }
-    except Exception as exc:
-        # 錯誤處理區塊用途：統一回傳 INFER_FAILED 並保留錯誤訊息
-        sys.stderr.write(traceback.format_exc())
-        return {"ok": False, "error": "INFER_FAILED", "detail": trim_error_detail(str(exc))}
+    cache_hit = False
+    if decoded:
+        try:
+            load_started = time.perf_counter()
+            model, cache_hit = (model_cache or MODEL_CACHE).get(resolved_path)
+            timing["model_load"] = elapsed_ms(load_started)
+            # 批次推論區塊用途：以最低門檻推論一次，再依各張 conf 個別篩選
+            min_conf = min(float(images[index]["conf"]) for index, _ in decoded)
+            # 類別預篩區塊用途：只讓批次內出現過的 target 類別進入 NMS
+            names = resolve_names(None, model)
+            class_ids = sorted({
+                cls_id for index, _ in decoded for cls_id in resolve_class_ids(names, images[index]["target"])
+            }) or None
+            predict_kwargs = {"conf": min_conf, "device": device, "classes": class_ids, "verbose": False}
+            predict_started = time.perf_counter()
+            if resolved_backend == "pytorch":
+                predictions = model.predict(source=[image for _, image in decoded], **predict_kwargs)
+            else:
+                # 匯出模型區塊用途：ONNX/OpenVINO 預設以固定 batch=1 匯出，改為逐張推論但共用同一模型
+                predictions = [model.predict(source=image, **predict_kwargs)[0] for _, image in decoded]
+            timing["predict"] = elapsed_ms(predict_started)
+            if not predictions or len(predictions) != len(decoded):
+                raise RuntimeError("批次推論結果數量與輸入不一致")
+            for (index, image), prediction in zip(decoded, predictions):
+                item = images[index]
+                results[index] = build_detection_response(
+                    prediction, model, item["target"], float(item["conf"]), get_image_size(image)
+                )
+        except Exception as exc:
+            # 錯誤處理區塊用途：整批推論失敗時，尚未完成的影像統一標示 INFER_FAILED
+            sys.stderr.write(traceback.format_exc())
+            failure = {"ok": False, "error": "INFER_FAILED", "detail": trim_error_detail(str(exc))}
+            for index, _ in decoded:
+                results[index] = dict(failure)
+
+    timing["total"] = elapsed_ms(started)
+    return {
+        "ok": True,
+        "results": results,
+        "model_cached": cache_hit,
+        "backend": resolved_backend,
+        "timing_ms": timing,
+    }
 
 
 # ───────────────────────────────────────────────
@@ -248,6 +876,9 @@ def run_inference(config: InferConfig) -> Dict[str, Any]:
         target=config.target,
         conf=config.conf_threshold,
         device=config.device,
+        backend=config.backend,
+        targets=config.targets,
+        top_k=config.top_k,
     )
 
 
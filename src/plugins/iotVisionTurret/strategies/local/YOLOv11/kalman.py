@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# 檔案用途：提供 iotVisionTurret 的等速度 Kalman 濾波，平滑目標中心並預測兩次推論之間的位置
+
+# ───────────────────────────────────────────────
+# 匯入區塊：集中管理濾波所需的標準函式庫
+# ───────────────────────────────────────────────
+import importlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# ───────────────────────────────────────────────
+# 常數區塊：預設雜訊參數與外插上限
+# ───────────────────────────────────────────────
+# 加速度標準差（px/s²），越大代表越相信新量測、越快跟上轉向
+DEFAULT_PROCESS_NOISE = 300.0
+# 量測標準差（px），反映 YOLO 中心點的抖動
+DEFAULT_MEASUREMENT_NOISE = 6.0
+# 初始速度不確定度（px/s）
+INITIAL_VELOCITY_STD = 500.0
+# 距離上次量測超過此時間即視為過期：predict 標示 stale，update 重新初始化
+DEFAULT_MAX_AGE_MS = 1500.0
+# 同時保留的濾波器上限（每個 key 一個）
+MAX_FILTERS = 16
+
+
+# ───────────────────────────────────────────────
+# 自訂錯誤類別區塊：濾波參數不合法
+# ───────────────────────────────────────────────
+class FilterError(ValueError):
+    """filter 參數（key/process_noise/measurement_noise/max_age_ms）不合法。"""
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：驗證並正規化 filter 參數
+# ───────────────────────────────────────────────
+def parse_filter_options(spec: Any) -> Optional[Dict[str, Any]]:
+    """filter 可為 true/false 或 {key, process_noise, measurement_noise, max_age_ms}。"""
+    if spec is None or spec is False:
+        return None
+    if spec is True:
+        spec = {}
+    if not isinstance(spec, dict):
+        raise FilterError("filter 必須為布林值或 JSON 物件")
+    try:
+        options = {
+            "key": str(spec.get("key", "default")),
+            "process_noise": float(spec.get("process_noise", DEFAULT_PROCESS_NOISE)),
+            "measurement_noise": float(spec.get("measurement_noise", DEFAULT_MEASUREMENT_NOISE)),
+            "max_age_ms": float(spec.get("max_age_ms", DEFAULT_MAX_AGE_MS)),
+        }
+    except (TypeError, ValueError) as exc:
+        raise FilterError(f"filter 參數不是有效數值: {exc}") from exc
+    if options["process_noise"] <= 0 or options["measurement_noise"] <= 0:
+        raise FilterError("filter 的雜訊參數必須大於 0")
+    if options["max_age_ms"] <= 0:
+        raise FilterError("filter.max_age_ms 必須大於 0")
+    return options
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：取得目前時間戳（毫秒）
+# ───────────────────────────────────────────────
+def now_ms() -> float:
+    """以 wall clock 毫秒為時間軸，呼叫端可自行帶入相同時間軸的 timestamp_ms。"""
+    return time.time() * 1000
+
+
+# ───────────────────────────────────────────────
+# 類別區塊用途：等速度模型的 2D Kalman 濾波器
+# ───────────────────────────────────────────────
+class ConstantVelocityFilter:
+    """狀態為 [x, y, vx, vy]（像素與像素/秒），量測為目標中心 [x, y]。"""
+
+    def __init__(self, process_noise: float, measurement_noise: float, max_age_ms: float) -> None:
+        self._np = importlib.import_module("numpy")
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.max_age_ms = max_age_ms
+        self.state: Optional[Any] = None
+        self.covariance: Optional[Any] = None
+        self.timestamp_ms = 0.0
+        self.updates = 0
+
+    def configure(self, process_noise: float, measurement_noise: float, max_age_ms: float) -> None:
+        """更新雜訊與逾時設定；保留目前狀態，下一次預測與量測更新起套用新值。"""
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.max_age_ms = max_age_ms
+
+    def _transition(self, dt: float) -> Tuple[Any, Any]:
+        """回傳 dt 秒的狀態轉移矩陣 F 與程序雜訊 Q（離散白雜訊加速度模型）。"""
+        np = self._np
+        transition = np.eye(4)
+        transition[0, 2] = transition[1, 3] = dt
+        dt2, dt3, dt4 = dt * dt, dt ** 3, dt ** 4
+        noise = np.array([
+            [dt4 / 4, 0, dt3 / 2, 0],
+            [0, dt4 / 4, 0, dt3 / 2],
+            [dt3 / 2, 0, dt2, 0],
+            [0, dt3 / 2, 0, dt2],
+        ]) * self.process_noise ** 2
+        return transition, noise
+
+    def reset(self, center: Tuple[float, float], timestamp_ms: float) -> None:
+        """以第一筆量測初始化，速度未知。"""
+        np = self._np
+        self.state = np.array([center[0], center[1], 0.0, 0.0])
+        self.covariance = np.diag([
+            self.measurement_noise ** 2,
+            self.measurement_noise ** 2,
+            INITIAL_VELOCITY_STD ** 2,
+            INITIAL_VELOCITY_STD ** 2,
+        ])
+        self.timestamp_ms = timestamp_ms
+        self.updates = 1
+
+    def update(self, center: Tuple[float, float], timestamp_ms: float) -> None:
+        """以新量測更新狀態；距離上次量測過久或時間倒退時重新初始化。"""
+        if self.state is None or not 0 <= timestamp_ms - self.timestamp_ms <= self.max_age_ms:
+            self.reset(center, timestamp_ms)
+            return
+        np = self._np
+        transition, noise = self._transition((timestamp_ms - self.timestamp_ms) / 1000)
+        predicted = transition @ self.state
+        covariance = transition @ self.covariance @ transition.T + noise
+        # 量測更新區塊用途：H 只取位置分量，直接以切片取代矩陣乘法
+        innovation = np.asarray(center, dtype=float) - predicted[:2]
+        innovation_cov = covariance[:2, :2] + np.eye(2) * self.measurement_noise ** 2
+        gain = covariance[:, :2] @ np.linalg.inv(innovation_cov)
+        self.state = predicted + gain @ innovation
+        self.covariance = (np.eye(4) - gain @ np.eye(2, 4)) @ covariance
+        self.timestamp_ms = timestamp_ms
+        self.updates += 1
+
+    def predict(self, timestamp_ms: float) -> Dict[str, Any]:
+        """外插到指定時間，不修改濾波狀態。"""
+        np = self._np
+        dt = max(0.0, timestamp_ms - self.timestamp_ms) / 1000
+        transition, noise = self._transition(dt)
+        state = transition @ self.state
+        covariance = transition @ self.covariance @ transition.T + noise
+        age_ms = timestamp_ms - self.timestamp_ms
+        return {
+            "center": {"x": int(round(state[0])), "y": int(round(state[1]))},
+            "velocity": {"x": round(float(state[2]), 3), "y": round(float(state[3]), 3)},
+            "position_std": round(float(np.sqrt(covariance[0, 0] + covariance[1, 1])), 3),
+            "age_ms": round(age_ms, 3),
+            "stale": age_ms > self.max_age_ms,
+            "updates": self.updates,
+        }
+
+
+# ───────────────────────────────────────────────
+# 類別區塊用途：依 key 管理多個濾波器（常駐模式下跨請求共用）
+# ───────────────────────────────────────────────
+class FilterRegistry:
+    """每個 key 一個濾波器，超過上限時移除最久未使用者。"""
+
+    def __init__(self, capacity: int = MAX_FILTERS) -> None:
+        self.capacity = max(1, capacity)
+        self._filters: "OrderedDict[str, ConstantVelocityFilter]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, options: Dict[str, Any], center: Dict[str, Any], timestamp_ms: float) -> Dict[str, Any]:
+        """寫入一筆量測並回傳平滑後的位置；同一 key 帶入不同雜訊設定時立即改用新設定。"""
+        with self._lock:
+            track_filter = self._filters.get(options["key"])
+            if track_filter is None:
+                track_filter = ConstantVelocityFilter(
+                    options["process_noise"], options["measurement_noise"], options["max_age_ms"]
+                )
+                self._filters[options["key"]] = track_filter
+                while len(self._filters) > self.capacity:
+                    self._filters.popitem(last=False)
+            else:
+                track_filter.configure(options["process_noise"], options["measurement_noise"], options["max_age_ms"])
+            self._filters.move_to_end(options["key"])
+            track_filter.update((float(center["x"]), float(center["y"])), timestamp_ms)
+            return track_filter.predict(timestamp_ms)
+
+    def predict(self, key: str, timestamp_ms: float) -> Optional[Dict[str, Any]]:
+        """外插指定 key 的目標位置；沒有任何量測時回傳 None。"""
+        with self._lock:
+            track_filter = self._filters.get(key)
+            if track_filter is None or track_filter.state is None:
+                return None
+            return track_filter.predict(timestamp_ms)
+
+    def reset(self, key: Optional[str] = None) -> None:
+        """清除指定 key（或全部）的濾波器。"""
+        with self._lock:
+            if key is None:
+                self._filters.clear()
+            else:
+                self._filters.pop(key, None)
+
+
+# 模組層級濾波器：常駐模式下跨請求共用
+TRACK_FILTERS = FilterRegistry()
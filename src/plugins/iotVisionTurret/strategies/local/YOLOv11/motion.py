@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# 檔案用途：提供 iotVisionTurret YOLOv11 的畫面變動閘門（畫面幾乎沒變時沿用上一次偵測結果）
+
+# ───────────────────────────────────────────────
+# 匯入區塊：集中管理變動偵測所需的標準函式庫
+# ───────────────────────────────────────────────
+import importlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# ───────────────────────────────────────────────
+# 常數區塊：縮圖尺寸、預設門檻與最長沿用時間
+# ───────────────────────────────────────────────
+SIGNATURE_SIZE = (64, 48)
+DEFAULT_MOTION_THRESHOLD = float(os.environ.get("YOLO_MOTION_THRESHOLD", "0.02"))
+DEFAULT_MOTION_MAX_AGE_MS = float(os.environ.get("YOLO_MOTION_MAX_AGE_MS", "1000"))
+# 同時追蹤的畫面來源上限（每個 key 保留一份縮圖與結果）
+MAX_GATE_ENTRIES = 16
+
+
+# ───────────────────────────────────────────────
+# 自訂錯誤類別區塊：閘門參數不合法
+# ───────────────────────────────────────────────
+class MotionGateError(ValueError):
+    """motion_gate 參數（threshold/max_age_ms/key）不合法。"""
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：驗證並正規化 motion_gate 參數
+# ───────────────────────────────────────────────
+def parse_motion_gate(spec: Any) -> Optional[Dict[str, Any]]:
+    """motion_gate 可為 true/false 或 {threshold, max_age_ms, key}；false/None 代表不啟用。"""
+    if spec is None or spec is False:
+        return None
+    if spec is True:
+        spec = {}
+    if not isinstance(spec, dict):
+        raise MotionGateError("motion_gate 必須為布林值或 JSON 物件")
+    try:
+        threshold = float(spec.get("threshold", DEFAULT_MOTION_THRESHOLD))
+        max_age_ms = float(spec.get("max_age_ms", DEFAULT_MOTION_MAX_AGE_MS))
+    except (TypeError, ValueError) as exc:
+        raise MotionGateError(f"motion_gate 參數不是有效數值: {exc}") from exc
+    if not 0.0 <= threshold <= 1.0:
+        raise MotionGateError("motion_gate.threshold 必須介於 0 到 1 之間")
+    if max_age_ms < 0:
+        raise MotionGateError("motion_gate.max_age_ms 不可為負數")
+    return {
+        "threshold": threshold,
+        "max_age_ms": max_age_ms,
+        "key": str(spec.get("key", "default")),
+    }
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：計算影格的縮小灰階特徵
+# ───────────────────────────────────────────────
+def frame_signature(image: Any) -> Any:
+    """以 INTER_AREA 縮成 64x48 灰階 float32，後續比較只需一次向量化相減。"""
+    cv2 = importlib.import_module("cv2")
+    np = importlib.import_module("numpy")
+    small = cv2.resize(image, SIGNATURE_SIZE, interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return small.astype(np.float32)
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：計算兩個特徵的平均差異（0~1）
+# ───────────────────────────────────────────────
+def signature_distance(first: Any, second: Any) -> float:
+    """平均絕對差除以 255；尺寸不同視為完全不同。"""
+    if first.shape != second.shape:
+        return 1.0
+    np = importlib.import_module("numpy")
+    return float(np.abs(first - second).mean() / 255.0)
+
+
+# ───────────────────────────────────────────────
+# 類別區塊用途：保存每個來源最後一次推論的特徵與結果
+# ───────────────────────────────────────────────
+class MotionGate:
+    """畫面與上一次「實際推論」的影格差異低於門檻時，回傳當時的結果。
+
+    只在真正推論時更新基準影格，避免緩慢漂移被逐格比較吃掉；超過 max_age_ms 一律強制推論。
+    """
+
+    def __init__(self, capacity: int = MAX_GATE_ENTRIES) -> None:
+        self.capacity = max(1, capacity)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, key: Hashable, signature: Any, threshold: float, max_age_ms: float) -> Tuple[Optional[Dict[str, Any]], float, float]:
+        """回傳 (可沿用的結果或 None, 差異值, 結果年齡毫秒)。"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, 1.0, 0.0
+            self._entries.move_to_end(key)
+        base_signature, response, stored_at = entry
+        age_ms = (time.perf_counter() - stored_at) * 1000
+        distance = signature_distance(signature, base_signature)
+        if age_ms > max_age_ms or distance > threshold:
+            return None, distance, age_ms
+        return response, distance, age_ms
+
+    def store(self, key: Hashable, signature: Any, response: Dict[str, Any]) -> None:
+        """記錄實際推論的結果與基準影格。"""
+        with self._lock:
+            self._entries[key] = (signature, dict(response), time.perf_counter())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空所有基準影格。"""
+        with self._lock:
+            self._entries.clear()
+
+
+# 模組層級閘門：常駐模式下跨請求共用
+MOTION_GATE = MotionGate()
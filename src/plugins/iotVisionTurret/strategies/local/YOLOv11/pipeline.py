@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# 檔案用途：提供 iotVisionTurret 常駐模式的三段式管線（解碼執行緒池 → 推論 → 輸出），依請求順序輸出結果
+
+# ───────────────────────────────────────────────
+# 匯入區塊：集中管理管線所需的標準函式庫
+# ───────────────────────────────────────────────
+import os
+import queue
+import sys
+import threading
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# ───────────────────────────────────────────────
+# 常數區塊：預設管線深度與解碼執行緒數（預設 0 停用管線，維持逐筆處理，由呼叫端選擇啟用）
+# ───────────────────────────────────────────────
+DEFAULT_PIPELINE_DEPTH = int(os.environ.get("YOLO_PIPELINE_DEPTH", "0"))
+# 啟用管線時建議的深度
+RECOMMENDED_PIPELINE_DEPTH = 2
+DEFAULT_DECODE_WORKERS = int(os.environ.get("YOLO_DECODE_WORKERS", "2"))
+
+# 佇列結束標記
+_STOP = object()
+
+
+# ───────────────────────────────────────────────
+# 類別區塊用途：依提交順序輸出的三段式管線
+# ───────────────────────────────────────────────
+class OrderedPipeline:
+    """prepare 在執行緒池平行執行（影像解碼），process 在單一執行緒依序執行（模型不可並行），
+    emit 在另一個執行緒輸出（JSON 序列化與寫出）。
+
+    三段以有界佇列串接：depth 限制等待推論與等待輸出的請求數，佇列滿時 submit 會阻塞，
+    讀取端自然停止讀取新請求，排隊造成的額外延遲最多為 depth 筆請求。
+    """
+
+    def __init__(
+        self,
+        prepare: Callable[[Any], Any],
+        process: Callable[[Any, Any, Callable[[Dict[str, Any]], None]], None],
+        emit: Callable[[Dict[str, Any]], None],
+        depth: int = RECOMMENDED_PIPELINE_DEPTH,
+        workers: int = DEFAULT_DECODE_WORKERS,
+    ) -> None:
+        self._prepare = prepare
+        self._process = process
+        self._emit = emit
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="yolo-prepare")
+        self._work: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, depth))
+        self._output: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, depth))
+        self._process_thread = threading.Thread(target=self._process_loop, name="yolo-process", daemon=True)
+        self._emit_thread = threading.Thread(target=self._emit_loop, name="yolo-emit", daemon=True)
+        self._process_thread.start()
+        self._emit_thread.start()
+
+    def submit(self, item: Any) -> None:
+        """提交一筆請求：立即開始 prepare，並排入推論佇列（佇列滿時阻塞）。"""
+        self._work.put((item, self._pool.submit(self._prepare, item)))
+
+    def emit(self, record: Dict[str, Any]) -> None:
+        """不經推論、依順序直接輸出的紀錄（例如協議錯誤），避免插隊到先前請求之前。"""
+        self._work.put((record, None))
+
+    def close(self) -> None:
+        """等待所有已提交的請求輸出完畢後結束。"""
+        self._work.put(_STOP)
+        self._process_thread.join()
+        self._emit_thread.join()
+        self._pool.shutdown(wait=True)
+
+    def _process_loop(self) -> None:
+        """依提交順序取出請求，等待該筆 prepare 完成後執行 process。"""
+        while True:
+            entry = self._work.get()
+            if entry is _STOP:
+                self._output.put(_STOP)
+                return
+            item, future = entry
+            if future is None:
+                self._output.put(item)
+                continue
+            try:
+                self._process(item, self._prepared_result(future), self._output.put)
+            except Exception:
+                # 防護區塊用途：process 應自行轉換錯誤，此處僅避免執行緒結束導致管線卡住
+                sys.stderr.write(traceback.format_exc())
+
+    def _emit_loop(self) -> None:
+        """依序輸出；輸出失敗時持續清空佇列，避免推論執行緒被阻塞。"""
+        while True:
+            record = self._output.get()
+            if record is _STOP:
+                return
+            try:
+                self._emit(record)
+            except Exception:
+                sys.stderr.write(traceback.format_exc())
+
+    @staticmethod
+    def _prepared_result(future: "Future[Any]") -> Optional[Any]:
+        """prepare 失敗時回傳 None，由 process 走原本的流程並回報錯誤。"""
+        try:
+            return future.result()
+        except Exception:
+            sys.stderr.write(traceback.format_exc())
+            return None
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：解析管線參數
+# ───────────────────────────────────────────────
+def resolve_pipeline_options(depth: Optional[int], workers: Optional[int]) -> Tuple[int, int]:
+    """未指定時使用環境變數預設值；負數視為 0（停用）。"""
+    depth = DEFAULT_PIPELINE_DEPTH if depth is None else depth
+    workers = DEFAULT_DECODE_WORKERS if workers is None else workers
+    return max(0, depth), max(1, workers)
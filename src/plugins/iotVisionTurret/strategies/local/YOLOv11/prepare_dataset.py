@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+# 檔案用途：預先將 YOLOv11 訓練影像縮放到 imgsz 並存成記憶體映射快取，訓練時省去每個 epoch 的 JPEG 解碼
+
+# ───────────────────────────────────────────────
+# 匯入區塊：集中管理資料集快取所需的標準函式庫
+# ───────────────────────────────────────────────
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# ───────────────────────────────────────────────
+# 常數區塊：快取檔名、格式版本與支援的影像副檔名
+# ───────────────────────────────────────────────
+MANIFEST_NAME = "manifest.json"
+IMAGES_NAME = "images.u8"
+MANIFEST_VERSION = 1
+# 與 ultralytics 的 IMG_FORMATS 對齊，避免快取與訓練看到的檔案清單不同
+IMAGE_SUFFIXES = {".bmp", ".dng", ".jpeg", ".jpg", ".mpo", ".png", ".tif", ".tiff", ".webp", ".pfm", ".heic"}
+DATASET_SPLITS = ("train", "val", "test")
+# 每個解碼執行緒一次處理的影像數，限制同時留在記憶體中的解碼結果
+DECODE_CHUNK_PER_WORKER = 8
+# spawn/forkserver 啟動的 dataloader worker 以此環境變數（{cache_dir, imgsz}）重新安裝快取
+DATASET_CACHE_ENV = "YOLO_DATASET_CACHE"
+
+# 目前行程已安裝的快取與 ultralytics 原本的 seed_worker；fork 出的 worker 會直接繼承
+_INSTALLED_CACHE: Optional["DatasetCache"] = None
+_ORIGINAL_SEED_WORKER: Optional[Callable[[int], None]] = None
+
+
+# ───────────────────────────────────────────────
+# 狀態資料結構區塊：定義快取準備所需的核心設定
+# ───────────────────────────────────────────────
+@dataclass
+class PrepareConfig:
+    """資料集快取設定資料結構。"""
+
+    data: str
+    imgsz: int
+    cache_dir: Optional[str]
+    workers: int
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：解析命令列參數
+# ───────────────────────────────────────────────
+def parse_args() -> argparse.Namespace:
+    """解析資料集快取腳本參數。"""
+    parser = argparse.ArgumentParser(description="iotVisionTurret YOLOv11 資料集預處理快取")
+    # 參數說明區塊：資料集設定檔路徑
+    parser.add_argument("--data", required=True, help="data.yaml 路徑")
+    # 參數說明區塊：縮放目標尺寸，需與 train.py --imgsz 一致
+    parser.add_argument("--imgsz", type=int, default=640, help="影像長邊縮放尺寸")
+    # 參數說明區塊：快取輸出目錄
+    parser.add_argument("--cache-dir", default=None, help="快取目錄（預設為 data.yaml 旁的 .yolo_cache/imgsz<N>）")
+    # 參數說明區塊：解碼執行緒數
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="解碼與縮放的執行緒數")
+    return parser.parse_args()
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：將命令列參數轉換成快取設定
+# ───────────────────────────────────────────────
+def build_config(args: argparse.Namespace) -> PrepareConfig:
+    """組裝資料集快取設定。"""
+    return PrepareConfig(
+        data=args.data,
+        imgsz=args.imgsz,
+        cache_dir=args.cache_dir,
+        workers=max(1, args.workers),
+    )
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：推導預設快取目錄
+# ───────────────────────────────────────────────
+def build_cache_dir(config: PrepareConfig) -> Path:
+    """不同 imgsz 各自一份快取，切換尺寸時不會互相覆蓋。"""
+    if config.cache_dir:
+        return Path(config.cache_dir)
+    return Path(config.data).resolve().parent / ".yolo_cache" / f"imgsz{config.imgsz}"
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：列出資料集中所有影像（路徑解析與 ultralytics 相同）
+# ───────────────────────────────────────────────
+def list_dataset_images(data_yaml: str) -> List[str]:
+    """以 ultralytics 的 check_det_dataset 解析 data.yaml，確保快取鍵與訓練讀取的路徑一致。"""
+    data_utils = importlib.import_module("ultralytics.data.utils")
+    dataset = data_utils.check_det_dataset(data_yaml)
+    images: List[str] = []
+    for split in DATASET_SPLITS:
+        sources = dataset.get(split)
+        if not sources:
+            continue
+        for source in sources if isinstance(sources, list) else [sources]:
+            source_path = Path(source)
+            if source_path.is_dir():
+                candidates = (str(item) for item in source_path.rglob("*"))
+            elif source_path.is_file():
+                # 清單檔區塊用途：txt 內的相對路徑以清單檔所在目錄為基準
+                lines = source_path.read_text(encoding="utf-8").splitlines()
+                candidates = (
+                    str(source_path.parent / line[2:]) if line.startswith("./") else line
+                    for line in (line.strip() for line in lines) if line
+                )
+            else:
+                raise FileNotFoundError(f"找不到資料集來源: {source}")
+            images.extend(os.path.realpath(item) for item in candidates if Path(item).suffix.lower() in IMAGE_SUFFIXES)
+    # 去重區塊用途：train/val 共用影像時只快取一份
+    return sorted(set(images))
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：取得來源檔案的變更指紋
+# ───────────────────────────────────────────────
+def source_fingerprint(path: str) -> Tuple[int, int]:
+    """以 (檔案大小, 修改時間 ns) 判斷來源是否變更，不需重新讀檔雜湊。"""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：解碼並縮放單張影像
+# ───────────────────────────────────────────────
+def load_resized(path: str, imgsz: int) -> Any:
+    """與 ultralytics load_image 相同的長邊縮放規則；只縮小不放大，放大交給訓練時處理。"""
+    cv2 = importlib.import_module("cv2")
+    image = cv2.imread(path, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError(f"無法讀取影像: {path}")
+    height, width = image.shape[:2]
+    ratio = imgsz / max(height, width)
+    if ratio < 1:
+        size = (min(int(round(width * ratio)), imgsz), min(int(round(height * ratio)), imgsz))
+        image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    return image
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：解碼失敗時回傳 None 而非中斷整批處理
+# ───────────────────────────────────────────────
+def try_load_resized(path: str, imgsz: int) -> Optional[Any]:
+    """損毀或無法讀取的影像回傳 None。"""
+    try:
+        return load_resized(path, imgsz)
+    except (OSError, ValueError):
+        return None
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：讀取既有 manifest
+# ───────────────────────────────────────────────
+def load_manifest(cache_dir: Path) -> Optional[Dict[str, Any]]:
+    """manifest 不存在、損毀或版本不符時回傳 None。"""
+    manifest_path = cache_dir / MANIFEST_NAME
+    if not manifest_path.is_file() or not (cache_dir / IMAGES_NAME).is_file():
+        return None
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：建立或增量更新資料集快取
+# ───────────────────────────────────────────────
+def prepare_cache(config: PrepareConfig) -> Dict[str, Any]:
+    """未變更的影像直接從舊快取複製位元組，只重新解碼新增或修改過的影像；已刪除的來源會被移除。"""
+    np = importlib.import_module("numpy")
+    cache_dir = build_cache_dir(config)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    images = list_dataset_images(config.data)
+    if not images:
+        raise ValueError(f"資料集沒有任何影像: {config.data}")
+
+    previous = load_manifest(cache_dir)
+    previous_entries: Dict[str, Any] = {}
+    previous_blob = None
+    if previous is not None and previous.get("imgsz") == config.imgsz and previous.get("entries"):
+        previous_entries = previous["entries"]
+        previous_blob = np.memmap(cache_dir / IMAGES_NAME, dtype=np.uint8, mode="r")
+
+    # 變更判斷區塊用途：大小與修改時間皆相同才視為可沿用
+    fingerprints = {path: source_fingerprint(path) for path in images}
+    reusable = {
+        path for path in images
+        if path in previous_entries
+        and (previous_entries[path]["size"], previous_entries[path]["mtime_ns"]) == fingerprints[path]
+    }
+    pending = [path for path in images if path not in reusable]
+
+    entries: Dict[str, Any] = {}
+    skipped: List[str] = []
+    offset = 0
+    temp_blob = cache_dir / (IMAGES_NAME + ".tmp")
+    chunk_size = config.workers * DECODE_CHUNK_PER_WORKER
+    with ThreadPoolExecutor(max_workers=config.workers) as executor, temp_blob.open("wb") as handle:
+        for start in range(0, len(images), chunk_size):
+            chunk = images[start:start + chunk_size]
+            # 解碼區塊用途：cv2 解碼時會釋放 GIL，以執行緒平行處理；分段處理讓記憶體只保留一段影像
+            todo = [path for path in chunk if path not in reusable]
+            decoded = dict(zip(todo, executor.map(lambda path: try_load_resized(path, config.imgsz), todo)))
+            for path in chunk:
+                if path in reusable:
+                    entry = previous_entries[path]
+                    data = previous_blob[entry["offset"]:entry["offset"] + entry["nbytes"]]
+                    shape = entry["shape"]
+                else:
+                    image = decoded[path]
+                    if image is None:
+                        # 損毀影像區塊用途：不寫入快取，訓練時交由 ultralytics 原本的檢查流程處理
+                        skipped.append(path)
+                        continue
+                    image = np.ascontiguousarray(image)
+                    data = image.reshape(-1)
+                    shape = list(image.shape)
+                handle.write(memoryview(data))
+                size, mtime_ns = fingerprints[path]
+                entries[path] = {
+                    "offset": offset,
+                    "nbytes": int(data.size),
+                    "shape": shape,
+                    "size": size,
+                    "mtime_ns": mtime_ns,
+                }
+                offset += int(data.size)
+
+    # 原子替換區塊用途：先寫暫存檔再替換，中斷時舊快取仍完整可用
+    del previous_blob
+    manifest = {"version": MANIFEST_VERSION, "imgsz": config.imgsz, "data": str(Path(config.data).resolve()), "entries": entries}
+    temp_manifest = cache_dir / (MANIFEST_NAME + ".tmp")
+    temp_manifest.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+    os.replace(temp_blob, cache_dir / IMAGES_NAME)
+    os.replace(temp_manifest, cache_dir / MANIFEST_NAME)
+
+    return {
+        "cache_dir": str(cache_dir),
+        "images": len(images),
+        "reused": len(reusable),
+        "encoded": len(pending) - len(skipped),
+        "skipped": skipped,
+        "removed": len(set(previous_entries) - set(images)),
+        "bytes": offset,
+    }
+
+
+# ───────────────────────────────────────────────
+# 類別區塊用途：訓練時以記憶體映射讀取快取影像
+# ───────────────────────────────────────────────
+class DatasetCache:
+    """依影像路徑回傳預縮放影像；來源檔案已變更或不在快取內時回傳 None，交由原本的解碼流程處理。"""
+
+    def __init__(self, cache_dir: str) -> None:
+        manifest = load_manifest(Path(cache_dir))
+        if manifest is None:
+            raise FileNotFoundError(f"找不到有效的資料集快取: {cache_dir}")
+        self.cache_dir = Path(cache_dir)
+        self.imgsz = int(manifest["imgsz"])
+        self.entries: Dict[str, Any] = manifest["entries"]
+        # dataloader worker 是否也會使用快取；False 時呼叫端應改用 workers=0
+        self.worker_safe = True
+        self._blob = None
+        self._blob_pid: Optional[int] = None
+
+    def _open_blob(self) -> Any:
+        """每個 dataloader worker 行程各自開啟 memmap，避免跨 fork 共用檔案位置。"""
+        if self._blob is None or self._blob_pid != os.getpid():
+            np = importlib.import_module("numpy")
+            self._blob = np.memmap(self.cache_dir / IMAGES_NAME, dtype=np.uint8, mode="r")
+            self._blob_pid = os.getpid()
+        return self._blob
+
+    def get(self, path: str) -> Optional[Any]:
+        """回傳可寫入的影像副本（ultralytics 的 HSV 增強會原地修改影像）。"""
+        entry = self.entries.get(path) or self.entries.get(os.path.realpath(path))
+        if entry is None:
+            return None
+        try:
+            if source_fingerprint(path) != (entry["size"], entry["mtime_ns"]):
+                return None
+        except OSError:
+            return None
+        blob = self._open_blob()
+        return blob[entry["offset"]:entry["offset"] + entry["nbytes"]].reshape(entry["shape"]).copy()
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：讓 ultralytics 訓練改從快取讀取影像
+# ───────────────────────────────────────────────
+def install_dataset_cache(cache_dir: str, imgsz: int) -> DatasetCache:
+    """替換 ultralytics.data.base 使用的 imread；快取影像已符合 imgsz，load_image 的縮放會直接略過。
+
+    只替換目前行程的 imread：fork 出的 worker 會繼承，但 spawn/forkserver（Windows、macOS 預設）啟動的 worker
+    會重新匯入 ultralytics，因此同時把 dataloader 的 worker_init_fn 換成 dataset_cache_worker_init，在 worker 內再安裝一次。
+    """
+    global _ORIGINAL_SEED_WORKER
+    cache = patch_imread(cache_dir, imgsz)
+    os.environ[DATASET_CACHE_ENV] = json.dumps({"cache_dir": str(cache_dir), "imgsz": int(imgsz)})
+    data_build = importlib.import_module("ultralytics.data.build")
+    seed_worker = getattr(data_build, "seed_worker", None)
+    if seed_worker is None:
+        # 相容區塊用途：無法掛上 worker 初始化時，只有 fork 啟動的 worker 看得到替換後的 imread
+        cache.worker_safe = multiprocessing.get_start_method() == "fork"
+    elif seed_worker is not dataset_cache_worker_init:
+        _ORIGINAL_SEED_WORKER = seed_worker
+        data_build.seed_worker = dataset_cache_worker_init
+    return cache
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：dataloader worker 初始化時安裝資料集快取
+# ───────────────────────────────────────────────
+def dataset_cache_worker_init(worker_id: int) -> None:
+    """先執行 ultralytics 原本的 seed_worker；spawn/forkserver 啟動的 worker 尚未替換 imread，依環境變數重新安裝。"""
+    seed_worker = _ORIGINAL_SEED_WORKER or importlib.import_module("ultralytics.data.build").seed_worker
+    if seed_worker is not dataset_cache_worker_init:
+        seed_worker(worker_id)
+    settings = os.environ.get(DATASET_CACHE_ENV)
+    if _INSTALLED_CACHE is None and settings:
+        options = json.loads(settings)
+        patch_imread(options["cache_dir"], options["imgsz"])
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：替換目前行程的 ultralytics imread
+# ───────────────────────────────────────────────
+def patch_imread(cache_dir: str, imgsz: int) -> DatasetCache:
+    """驗證快取尺寸後以快取版 imread 取代 ultralytics.data.base.imread。"""
+    global _INSTALLED_CACHE
+    cache = DatasetCache(cache_dir)
+    if cache.imgsz != imgsz:
+        raise ValueError(f"資料集快取的 imgsz={cache.imgsz} 與訓練 imgsz={imgsz} 不一致，請以相同尺寸重新執行 prepare_dataset.py")
+    cv2 = importlib.import_module("cv2")
+    data_base = importlib.import_module("ultralytics.data.base")
+    original_imread: Callable[..., Any] = getattr(data_base, "imread", None)
+    if original_imread is None:
+        raise RuntimeError("目前的 ultralytics 版本不支援資料集快取（找不到 ultralytics.data.base.imread）")
+
+    def cached_imread(filename: str, flags: int = cv2.IMREAD_COLOR) -> Any:
+        """只有彩色讀取走快取，其餘模式維持原行為。"""
+        if flags == cv2.IMREAD_COLOR:
+            image = cache.get(str(filename))
+            if image is not None:
+                return image
+        return original_imread(filename, flags)
+
+    data_base.imread = cached_imread
+    _INSTALLED_CACHE = cache
+    return cache
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：主程式入口，負責串接參數與輸出
+# ───────────────────────────────────────────────
+def main() -> None:
+    """主程式入口。"""
+    config = build_config(parse_args())
+    try:
+        summary = prepare_cache(config)
+    except Exception as exc:
+        # 錯誤處理區塊用途：捕捉快取建立錯誤並回報原因
+        sys.stderr.write(traceback.format_exc())
+        print(f"prepare_result: FAILED ({exc})")
+        sys.exit(1)
+
+    # 輸出資訊區塊用途：輸出快取統計供外部檢視
+    print(f"cache_dir: {summary['cache_dir']}")
+    print(f"images: {summary['images']} (reused {summary['reused']}, encoded {summary['encoded']}, removed {summary['removed']})")
+    for path in summary["skipped"]:
+        print(f"skipped: {path}")
+    print(f"size_mb: {summary['bytes'] / 1024 / 1024:.1f}")
+    print("prepare_result: OK")
+
+
+if __name__ == "__main__":
+    # 函式區塊用途：提供 CLI 執行入口
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# 檔案用途：提供 iotVisionTurret 的偵測結果快取（同一影像內容 + 同一模型 + 同一參數直接回傳上次結果）
+
+# ───────────────────────────────────────────────
+# 匯入區塊：集中管理結果快取所需的標準函式庫
+# ───────────────────────────────────────────────
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+try:
+    from .infer import resolve_weights, weights_version
+except ImportError:
+    # 匯入相容區塊用途：直接以腳本執行時改用同目錄匯入
+    from infer import resolve_weights, weights_version  # type: ignore
+
+# ───────────────────────────────────────────────
+# 常數區塊：快取容量與檔案雜湊備忘上限
+# ───────────────────────────────────────────────
+# 0 代表停用結果快取（預設停用，查詢前需雜湊整個影像檔，只在重複請求多的情境才值得開啟）
+DEFAULT_RESULT_CACHE_SIZE = int(os.environ.get("YOLO_RESULT_CACHE_SIZE", "0"))
+# 以 (路徑, inode, 大小, mtime, ctime) 記住檔案雜湊，重試同一檔案時不必重讀整個檔案
+FILE_DIGEST_MEMO_SIZE = 256
+# mtime 或 ctime 距今少於此值的檔案不記憶：粗粒度時間戳記的檔案系統上，同一刻內再次覆寫的檔案 stat 可能完全相同
+FILE_DIGEST_SETTLE_NS = 2_000_000_000
+# 分段讀檔大小，避免大檔一次載入
+READ_CHUNK_BYTES = 1024 * 1024
+
+# 模組層級檔案雜湊備忘：鍵為 (絕對路徑, inode, 大小, mtime_ns, ctime_ns)
+_FILE_DIGESTS: "OrderedDict[Tuple[str, int, int, int, int], str]" = OrderedDict()
+_FILE_DIGEST_LOCK = threading.Lock()
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：計算影像檔案內容雜湊
+# ───────────────────────────────────────────────
+def hash_file(path: str) -> str:
+    """以 blake2b 雜湊檔案內容；同一檔案未變更（inode、大小、mtime 與 ctime 皆相同）時直接沿用上次結果。
+
+    ctime 無法以 os.utime 還原，inode 可分辨以 rename 換上的新檔；剛寫入的檔案仍可能在同一時間戳記內被覆寫，因此不記憶。
+    """
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_ino, stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns)
+    with _FILE_DIGEST_LOCK:
+        digest = _FILE_DIGESTS.get(memo_key)
+        if digest is not None:
+            _FILE_DIGESTS.move_to_end(memo_key)
+            return digest
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(READ_CHUNK_BYTES), b""):
+            hasher.update(chunk)
+    digest = hasher.hexdigest()
+    if time.time_ns() - max(stat.st_mtime_ns, stat.st_ctime_ns) < FILE_DIGEST_SETTLE_NS:
+        return digest
+    with _FILE_DIGEST_LOCK:
+        _FILE_DIGESTS[memo_key] = digest
+        while len(_FILE_DIGESTS) > FILE_DIGEST_MEMO_SIZE:
+            _FILE_DIGESTS.popitem(last=False)
+    return digest
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：組合快取鍵
+# ───────────────────────────────────────────────
+def build_result_key(
+    content_digest: str,
+    weights_path: str,
+    backend: Optional[str],
+    target: Hashable,
+    conf: float,
+    roi: Optional[Dict[str, Any]] = None,
+) -> Optional[Tuple[Hashable, ...]]:
+    """鍵為 (內容雜湊, 實際權重路徑, 權重 mtime, 後端, target, conf, roi)；權重無法解析時回傳 None（不快取）。
+
+    target 在多目標模式下為 (targets, top_k) tuple。
+    """
+    try:
+        resolved_path, resolved_backend = resolve_weights(weights_path, backend)
+    except ValueError:
+        return None
+    if resolved_path is None:
+        return None
+    resolved_path = os.path.abspath(resolved_path)
+    # ROI 區塊用途：裁切範圍不同結果可能不同，序列化後納入鍵
+    roi_key = json.dumps(roi, sort_keys=True) if roi is not None else None
+    return (
+        content_digest,
+        resolved_path,
+        weights_version(resolved_path),
+        resolved_backend,
+        target,
+        round(float(conf), 6),
+        roi_key,
+    )
+
+
+# ───────────────────────────────────────────────
+# 類別區塊用途：有容量上限的偵測結果 LRU
+# ───────────────────────────────────────────────
+class ResultCache:
+    """存放實際推論的回應（不含 timing），命中時回傳深拷貝，呼叫端修改回應不會污染快取。"""
+
+    def __init__(self, capacity: int = DEFAULT_RESULT_CACHE_SIZE) -> None:
+        self.capacity = max(0, capacity)
+        self._entries: "OrderedDict[Hashable, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        """容量為 0 時停用。"""
+        return self.capacity > 0
+
+    def lookup(self, key: Hashable) -> Tuple[Optional[Dict[str, Any]], float]:
+        """回傳 (快取的回應或 None, 結果年齡毫秒)，並更新命中/未命中計數。"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, 0.0
+            self._entries.move_to_end(key)
+            self.hits += 1
+        response, stored_at = entry
+        return copy.deepcopy(response), (time.perf_counter() - stored_at) * 1000
+
+    def store(self, key: Hashable, response: Dict[str, Any]) -> None:
+        """只保存成功且非變動閘門沿用的結果。"""
+        if not self.enabled or not response.get("ok") or response.get("cached"):
+            return
+        stored = {name: value for name, value in response.items() if name != "timing_ms"}
+        with self._lock:
+            self._entries[key] = (copy.deepcopy(stored), time.perf_counter())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """回傳命中/未命中計數與目前大小。"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "size": len(self._entries),
+                "capacity": self.capacity,
+            }
+
+    def clear(self) -> None:
+        """清空快取與計數。"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# 模組層級快取：常駐模式下跨請求共用
+RESULT_CACHE = ResultCache()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# 檔案用途：提供 iotVisionTurret YOLOv11 的 ROI（上一次目標附近）局部搜尋所需的幾何計算
+
+# ───────────────────────────────────────────────
+# 匯入區塊：集中管理 ROI 計算所需的標準函式庫
+# ───────────────────────────────────────────────
+from typing import Any, Dict, Optional, Tuple
+
+# ───────────────────────────────────────────────
+# 常數區塊：ROI 預設放大倍率、輸入尺寸與最小邊長
+# ───────────────────────────────────────────────
+DEFAULT_ROI_SCALE = 2.5
+DEFAULT_ROI_IMGSZ = 320
+MIN_ROI_SIZE = 96
+# ROI 佔畫面比例超過此值時直接做全畫面推論，裁切已無意義
+MAX_ROI_COVERAGE = 0.8
+# ultralytics 的輸入尺寸需為 stride 的倍數
+IMGSZ_STRIDE = 32
+
+
+# ───────────────────────────────────────────────
+# 自訂錯誤類別區塊：ROI 參數不合法
+# ───────────────────────────────────────────────
+class RoiError(ValueError):
+    """ROI 參數（bbox/center/scale/imgsz/min_conf）不合法。"""
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：讀取含指定欄位的數值物件
+# ───────────────────────────────────────────────
+def _parse_point_fields(raw: Any, fields: Tuple[str, ...], name: str) -> Dict[str, int]:
+    """將 {x1, y1, ...} 類物件轉為整數 dict。"""
+    if not isinstance(raw, dict):
+        raise RoiError(f"roi.{name} 必須為物件")
+    try:
+        return {field: int(round(float(raw[field]))) for field in fields}
+    except (KeyError, TypeError, ValueError) as exc:
+        raise RoiError(f"roi.{name} 需包含數值欄位 {'/'.join(fields)}: {exc}") from exc
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：驗證並正規化 ROI 參數
+# ───────────────────────────────────────────────
+def parse_roi(spec: Any) -> Dict[str, Any]:
+    """roi 需含上一次的 bbox 或 center；scale/imgsz/min_conf 為選填。輸出格式可再次傳入（冪等）。"""
+    if not isinstance(spec, dict):
+        raise RoiError("roi 必須為 JSON 物件")
+    bbox = _parse_point_fields(spec["bbox"], ("x1", "y1", "x2", "y2"), "bbox") if spec.get("bbox") else None
+    center = _parse_point_fields(spec["center"], ("x", "y"), "center") if spec.get("center") else None
+    if bbox is None and center is None:
+        raise RoiError("roi 需提供上一次的 bbox 或 center")
+    if bbox is not None and (bbox["x2"] <= bbox["x1"] or bbox["y2"] <= bbox["y1"]):
+        raise RoiError("roi.bbox 座標不合法")
+
+    try:
+        scale = float(spec.get("scale", DEFAULT_ROI_SCALE))
+        imgsz = int(spec.get("imgsz", DEFAULT_ROI_IMGSZ))
+        min_conf = None if spec.get("min_conf") is None else float(spec["min_conf"])
+    except (TypeError, ValueError) as exc:
+        raise RoiError(f"roi 參數不是有效數值: {exc}") from exc
+    if scale < 1.0:
+        raise RoiError("roi.scale 必須大於等於 1")
+    if imgsz <= 0:
+        raise RoiError("roi.imgsz 必須大於 0")
+    if min_conf is not None and not 0.0 <= min_conf <= 1.0:
+        raise RoiError("roi.min_conf 必須介於 0 到 1 之間")
+
+    return {
+        "bbox": bbox,
+        "center": center,
+        "scale": scale,
+        # 尺寸對齊區塊用途：向上取整到 stride 倍數，避免 ultralytics 自行調整並輸出警告
+        "imgsz": -(-imgsz // IMGSZ_STRIDE) * IMGSZ_STRIDE,
+        "min_conf": min_conf,
+    }
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：依上一次目標位置計算裁切視窗
+# ───────────────────────────────────────────────
+def build_roi_window(roi: Dict[str, Any], image_size: Tuple[int, int]) -> Optional[Tuple[int, int, int, int]]:
+    """回傳 (x1, y1, x2, y2) 正方形視窗；視窗過大（接近全畫面）時回傳 None。"""
+    image_width, image_height = image_size
+    bbox = roi.get("bbox")
+    if bbox is not None:
+        center_x = (bbox["x1"] + bbox["x2"]) / 2
+        center_y = (bbox["y1"] + bbox["y2"]) / 2
+        side = max(bbox["x2"] - bbox["x1"], bbox["y2"] - bbox["y1"]) * roi["scale"]
+    else:
+        # 只有中心點區塊用途：沒有框大小可參考時，以短邊一半作為搜尋範圍
+        center_x = roi["center"]["x"]
+        center_y = roi["center"]["y"]
+        side = min(image_width, image_height) / 2
+    side = int(round(max(side, MIN_ROI_SIZE)))
+
+    window_width = min(side, image_width)
+    window_height = min(side, image_height)
+    if window_width * window_height >= MAX_ROI_COVERAGE * image_width * image_height:
+        return None
+
+    # 邊界處理區塊用途：視窗超出畫面時整體平移回畫面內，保持視窗大小不變
+    x1 = int(round(center_x - window_width / 2))
+    y1 = int(round(center_y - window_height / 2))
+    x1 = min(max(x1, 0), image_width - window_width)
+    y1 = min(max(y1, 0), image_height - window_height)
+    return x1, y1, x1 + window_width, y1 + window_height
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：將裁切座標系的候選框平移回全圖座標
+# ───────────────────────────────────────────────
+def shift_candidate(candidate: Dict[str, Any], offset_x: int, offset_y: int) -> Dict[str, Any]:
+    """bbox 與 center 加上視窗左上角偏移，其餘欄位保持不變。"""
+    bbox = candidate["bbox"]
+    center = candidate["center"]
+    return {
+        **candidate,
+        "bbox": {
+            "x1": bbox["x1"] + offset_x,
+            "y1": bbox["y1"] + offset_y,
+            "x2": bbox["x2"] + offset_x,
+            "y2": bbox["y2"] + offset_y,
+        },
+        "center": {"x": center["x"] + offset_x, "y": center["y"] + offset_y},
+    }
@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+# 檔案用途：在 CPU/RAM 預算內平行執行多組 YOLOv11 訓練設定，提前淘汰落後的組合並推廣最佳權重
+
+# ───────────────────────────────────────────────
+# 匯入區塊：集中管理參數搜尋所需的標準函式庫與訓練設定
+# ───────────────────────────────────────────────
+import argparse
+import csv
+import itertools
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    from .train import CACHE_MODES, TrainConfig
+except ImportError:
+    # 匯入相容區塊用途：直接以腳本執行時改用同目錄匯入
+    from train import CACHE_MODES, TrainConfig  # type: ignore
+
+# ───────────────────────────────────────────────
+# 常數區塊：訓練腳本位置、比較指標與中止等待時間
+# ───────────────────────────────────────────────
+TRAIN_SCRIPT = Path(__file__).resolve().parent / "train.py"
+# ultralytics 每個 epoch 寫入 results.csv 的驗證指標欄位
+METRIC_COLUMNS = {"map50-95": "metrics/mAP50-95(B)", "map50": "metrics/mAP50(B)"}
+# 中止落後組合時等待行程結束的秒數，逾時改送 SIGKILL
+TERMINATE_TIMEOUT_S = 30
+# 佔用執行名額的狀態：stopping 為已送出 SIGTERM、尚未回收的組合，仍佔用 CPU/RAM
+ACTIVE_STATUSES = ("running", "stopping")
+# 各組合限制執行緒數時要設定的環境變數（torch/OpenMP/MKL/OpenBLAS）
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+# ───────────────────────────────────────────────
+# 狀態資料結構區塊：定義參數搜尋設定
+# ───────────────────────────────────────────────
+@dataclass
+class SweepConfig:
+    """參數搜尋設定資料結構。"""
+
+    data: str
+    models: List[str]
+    imgsz: List[int]
+    batch: List[int]
+    epochs: List[int]
+    device: str
+    project: str
+    name: str
+    out_weights: str
+    cpu_budget: int
+    ram_budget_gb: float
+    trial_ram_gb: float
+    max_parallel: int
+    trial_workers: int
+    patience: int
+    cache: str
+    metric: str
+    grace_epochs: int
+    min_peers: int
+    poll_seconds: float
+
+
+# ───────────────────────────────────────────────
+# 狀態資料結構區塊：記錄單一組合的執行狀態與結果
+# ───────────────────────────────────────────────
+@dataclass
+class Trial:
+    """單一訓練組合；history 為每個 epoch 的比較指標。"""
+
+    index: int
+    config: TrainConfig
+    status: str = "pending"
+    history: List[float] = field(default_factory=list)
+    scores: Dict[str, float] = field(default_factory=dict)
+    started_at: float = 0.0
+    finished_at: float = 0.0
+    return_code: Optional[int] = None
+    process: Optional[subprocess.Popen] = None
+    stop_deadline: float = 0.0
+
+    @property
+    def trial_dir(self) -> Path:
+        """ultralytics 的輸出目錄（train.py --resume 會固定使用 project/name）。"""
+        return Path(self.config.project) / self.config.name
+
+    @property
+    def best_score(self) -> float:
+        """目前為止的最佳比較指標。"""
+        return max(self.history) if self.history else 0.0
+
+    @property
+    def elapsed_s(self) -> float:
+        """已執行秒數（尚未結束時計算到現在）。"""
+        if not self.started_at:
+            return 0.0
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：解析逗號分隔清單
+# ───────────────────────────────────────────────
+def parse_list(raw: str, cast: Any = str) -> List[Any]:
+    """將 "a,b,c" 轉為清單並去除空白項目。"""
+    return [cast(item.strip()) for item in raw.split(",") if item.strip()]
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：解析命令列參數
+# ───────────────────────────────────────────────
+def parse_args() -> argparse.Namespace:
+    """解析參數搜尋腳本參數。"""
+    parser = argparse.ArgumentParser(description="iotVisionTurret YOLOv11 平行參數搜尋")
+    # 參數說明區塊：搜尋空間（逗號分隔，取所有組合）
+    parser.add_argument("--data", required=True, help="data.yaml 路徑")
+    parser.add_argument("--model", default="yolo11n.pt", help="逗號分隔的模型或權重")
+    parser.add_argument("--imgsz", default="320,416,640", help="逗號分隔的訓練影像尺寸")
+    parser.add_argument("--batch", default="16", help="逗號分隔的批次大小")
+    parser.add_argument("--epochs", default="50", help="逗號分隔的訓練回合數")
+    parser.add_argument("--device", default="cpu", help="訓練裝置 (cpu/cuda)")
+    # 參數說明區塊：輸出位置
+    parser.add_argument("--project", default="runs/sweep", help="搜尋輸出目錄")
+    parser.add_argument("--name", default="sweep", help="搜尋名稱（每個組合存於 project/name/trial_XX）")
+    parser.add_argument("--out-weights", required=True, help="最佳組合 best.pt 的推廣路徑")
+    # 參數說明區塊：資源預算
+    parser.add_argument("--cpu-budget", type=int, default=os.cpu_count() or 1, help="可使用的 CPU 核心數")
+    parser.add_argument("--ram-budget-gb", type=float, default=0.0, help="可使用的記憶體 (GB)，0 代表依目前可用記憶體判斷")
+    parser.add_argument("--trial-ram-gb", type=float, default=4.0, help="每個組合預估的記憶體用量 (GB)")
+    parser.add_argument("--max-parallel", type=int, default=0, help="同時執行的組合上限，0 代表只受 CPU/RAM 預算限制")
+    parser.add_argument("--trial-workers", type=int, default=2, help="每個組合的資料載入 worker 數")
+    # 參數說明區塊：傳給 train.py 的共用參數
+    parser.add_argument("--patience", type=int, default=100, help="單一組合的 early stopping 容忍回合數")
+    parser.add_argument("--cache", default="none", choices=CACHE_MODES, help="影像快取 (none/ram/disk)")
+    # 參數說明區塊：提前淘汰規則
+    parser.add_argument("--metric", default="map50-95", choices=tuple(METRIC_COLUMNS), help="比較用的驗證指標")
+    parser.add_argument("--grace-epochs", type=int, default=5, help="前幾個 epoch 不淘汰")
+    parser.add_argument("--min-peers", type=int, default=2, help="至少要有幾個組合跑到同一 epoch 才做比較")
+    parser.add_argument("--poll-seconds", type=float, default=10.0, help="檢查進度的間隔秒數")
+    return parser.parse_args()
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：將命令列參數轉換成搜尋設定
+# ───────────────────────────────────────────────
+def build_config(args: argparse.Namespace) -> SweepConfig:
+    """組裝參數搜尋設定。"""
+    return SweepConfig(
+        data=args.data,
+        models=parse_list(args.model),
+        imgsz=parse_list(args.imgsz, int),
+        batch=parse_list(args.batch, int),
+        epochs=parse_list(args.epochs, int),
+        device=args.device,
+        project=args.project,
+        name=args.name,
+        out_weights=args.out_weights,
+        cpu_budget=max(1, args.cpu_budget),
+        ram_budget_gb=max(0.0, args.ram_budget_gb),
+        trial_ram_gb=max(0.0, args.trial_ram_gb),
+        max_parallel=max(0, args.max_parallel),
+        trial_workers=max(0, args.trial_workers),
+        patience=args.patience,
+        cache=args.cache,
+        metric=args.metric,
+        grace_epochs=max(1, args.grace_epochs),
+        min_peers=max(1, args.min_peers),
+        poll_seconds=max(0.5, args.poll_seconds),
+    )
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：展開搜尋空間為 TrainConfig 清單
+# ───────────────────────────────────────────────
+def build_trials(config: SweepConfig) -> List[Trial]:
+    """每個組合輸出到 project/name/trial_XX，並各自複製一份 best.pt 供最後推廣。"""
+    sweep_dir = Path(config.project) / config.name
+    trials: List[Trial] = []
+    combinations = itertools.product(config.models, config.imgsz, config.batch, config.epochs)
+    for index, (model, imgsz, batch, epochs) in enumerate(combinations):
+        trial_name = f"trial_{index:02d}"
+        trials.append(Trial(index=index, config=TrainConfig(
+            data=config.data,
+            model=model,
+            imgsz=imgsz,
+            epochs=epochs,
+            batch=batch,
+            device=config.device,
+            project=str(sweep_dir),
+            name=trial_name,
+            out_weights=str(sweep_dir / f"{trial_name}.pt"),
+            # 續訓區塊用途：固定輸出目錄，中斷後重跑同一條搜尋指令會接續未完成的組合
+            resume=True,
+            patience=config.patience,
+            cache=config.cache,
+            workers=config.trial_workers,
+        )))
+    return trials
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：將 TrainConfig 轉為 train.py 命令列
+# ───────────────────────────────────────────────
+def build_train_command(config: TrainConfig) -> List[str]:
+    """每個組合以獨立行程執行 train.py，崩潰或被淘汰不會影響其他組合。"""
+    command = [
+        sys.executable, str(TRAIN_SCRIPT),
+        "--data", config.data,
+        "--model", config.model,
+        "--imgsz", str(config.imgsz),
+        "--epochs", str(config.epochs),
+        "--batch", str(config.batch),
+        "--device", config.device,
+        "--project", config.project,
+        "--name", config.name,
+        "--out-weights", config.out_weights,
+        "--patience", str(config.patience),
+        "--cache", config.cache,
+        "--workers", str(config.workers),
+    ]
+    if config.resume:
+        command.append("--resume")
+    return command
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：計算同時執行的組合數與每組執行緒數
+# ───────────────────────────────────────────────
+def plan_slots(config: SweepConfig, total: int) -> int:
+    """同時執行數取 CPU 預算、記憶體預算與 max_parallel 的最小值，至少為 1。"""
+    slots = config.cpu_budget
+    if config.ram_budget_gb and config.trial_ram_gb:
+        slots = min(slots, int(config.ram_budget_gb // config.trial_ram_gb))
+    if config.max_parallel:
+        slots = min(slots, config.max_parallel)
+    return max(1, min(slots, total))
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：讀取系統目前可用記憶體
+# ───────────────────────────────────────────────
+def available_memory_gb() -> Optional[float]:
+    """讀取 /proc/meminfo 的 MemAvailable；非 Linux 平台回傳 None（不檢查）。"""
+    try:
+        with open("/proc/meminfo", "r", encoding="utf-8") as handle:
+            for line in handle:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024 / 1024
+    except OSError:
+        return None
+    return None
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：讀取組合目前的驗證指標歷程
+# ───────────────────────────────────────────────
+def read_metric_history(trial: Trial) -> Dict[str, List[float]]:
+    """解析 results.csv；舊版 ultralytics 的欄位名稱前後帶空白，需先去除。"""
+    results_path = trial.trial_dir / "results.csv"
+    if not results_path.is_file():
+        return {}
+    history: Dict[str, List[float]] = {name: [] for name in METRIC_COLUMNS}
+    try:
+        with results_path.open("r", encoding="utf-8", newline="") as handle:
+            for row in csv.DictReader(handle):
+                row = {key.strip(): value for key, value in row.items() if key}
+                for name, column in METRIC_COLUMNS.items():
+                    if row.get(column, "").strip():
+                        history[name].append(float(row[column]))
+    except (OSError, ValueError):
+        # 寫入中區塊用途：訓練行程正在寫檔時可能讀到半行，下次輪詢再讀
+        return {}
+    return history
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：判斷執行中的組合是否應提前淘汰
+# ───────────────────────────────────────────────
+def should_prune(trial: Trial, trials: List[Trial], config: SweepConfig) -> bool:
+    """中位數淘汰規則：跑到第 N 個 epoch 時，最佳指標低於其他組合在同一 epoch 之最佳指標的中位數即淘汰。"""
+    epoch = len(trial.history)
+    if epoch < config.grace_epochs:
+        return False
+    peers = [
+        max(other.history[:epoch])
+        for other in trials
+        if other is not trial and len(other.history) >= epoch
+    ]
+    if len(peers) < config.min_peers:
+        return False
+    return trial.best_score < statistics.median(peers)
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：啟動單一組合的訓練行程
+# ───────────────────────────────────────────────
+def start_trial(trial: Trial, threads: int) -> None:
+    """限制每個行程的執行緒數，避免多個 torch 行程互搶核心；輸出寫入 trial 目錄旁的 log。"""
+    env = dict(os.environ)
+    for name in THREAD_ENV_VARS:
+        env[name] = str(threads)
+    log_path = Path(trial.config.project) / f"{trial.config.name}.log"
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with log_path.open("ab") as log_handle:
+        trial.process = subprocess.Popen(
+            build_train_command(trial.config),
+            stdout=log_handle,
+            stderr=subprocess.STDOUT,
+            env=env,
+        )
+    trial.status = "running"
+    trial.started_at = time.perf_counter()
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：中止落後的組合
+# ───────────────────────────────────────────────
+def stop_trial(trial: Trial) -> None:
+    """送出 SIGTERM 後立即返回，由 poll_trials 回收行程，逾時才改送 SIGKILL；不阻塞其他組合的輪詢。"""
+    process = trial.process
+    if process is None:
+        return
+    process.terminate()
+    trial.status = "stopping"
+    trial.stop_deadline = time.perf_counter() + TERMINATE_TIMEOUT_S
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：回收已送出 SIGTERM 的組合
+# ───────────────────────────────────────────────
+def reap_stopping_trial(trial: Trial) -> None:
+    """行程已結束時標記為 pruned；超過等待期限仍未結束則改送 SIGKILL，下次輪詢再回收。"""
+    process = trial.process
+    return_code = process.poll() if process is not None else -1
+    if return_code is None:
+        if time.perf_counter() >= trial.stop_deadline:
+            process.kill()
+        return
+    trial.status = "pruned"
+    trial.return_code = return_code
+    trial.finished_at = time.perf_counter()
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：結束並等待所有仍在執行的組合
+# ───────────────────────────────────────────────
+def shutdown_trials(trials: List[Trial]) -> None:
+    """先對所有組合送 SIGTERM，再共用一個等待期限逐一回收，逾時改送 SIGKILL，不留下孤兒或殭屍行程。"""
+    active = [trial for trial in trials if trial.status in ACTIVE_STATUSES and trial.process is not None]
+    for trial in active:
+        if trial.process.poll() is None:
+            trial.process.terminate()
+    deadline = time.perf_counter() + TERMINATE_TIMEOUT_S
+    for trial in active:
+        try:
+            trial.process.wait(timeout=max(0.0, deadline - time.perf_counter()))
+        except subprocess.TimeoutExpired:
+            trial.process.kill()
+            trial.process.wait()
+        trial.return_code = trial.process.returncode
+        trial.finished_at = time.perf_counter()
+        trial.status = "pruned" if trial.status == "stopping" else "interrupted"
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：更新執行中組合的狀態
+# ───────────────────────────────────────────────
+def poll_trials(trials: List[Trial], config: SweepConfig) -> None:
+    """讀取最新指標、回收已結束的行程，並淘汰落後組合。"""
+    for trial in trials:
+        if trial.status == "stopping":
+            reap_stopping_trial(trial)
+            continue
+        if trial.status != "running":
+            continue
+        history = read_metric_history(trial)
+        if history:
+            trial.history = history[config.metric]
+            trial.scores = {name: max(values) for name, values in history.items() if values}
+        return_code = trial.process.poll() if trial.process else None
+        if return_code is not None:
+            trial.return_code = return_code
+            trial.status = "done" if return_code == 0 else "failed"
+            trial.finished_at = time.perf_counter()
+    for trial in trials:
+        if trial.status == "running" and should_prune(trial, trials, config):
+            print(f"prune: {trial.config.name} epoch={len(trial.history)} {config.metric}={trial.best_score:.4f}", flush=True)
+            stop_trial(trial)
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：依預算排程並執行所有組合
+# ───────────────────────────────────────────────
+def run_sweep(config: SweepConfig, trials: List[Trial]) -> None:
+    """同時最多執行 slots 個組合；每次啟動前確認系統仍有足夠可用記憶體。"""
+    slots = plan_slots(config, len(trials))
+    threads = max(1, config.cpu_budget // slots)
+    print(f"sweep: {len(trials)} trials, {slots} parallel, {threads} threads each", flush=True)
+    pending = list(trials)
+    try:
+        while pending or any(trial.status in ACTIVE_STATUSES for trial in trials):
+            running = sum(1 for trial in trials if trial.status in ACTIVE_STATUSES)
+            while pending and running < slots:
+                memory_gb = available_memory_gb()
+                if running and memory_gb is not None and memory_gb < config.trial_ram_gb:
+                    # 記憶體不足區塊用途：等其他組合結束再啟動，至少保證有一個組合在跑
+                    break
+                trial = pending.pop(0)
+                print(f"start: {trial.config.name} model={trial.config.model} imgsz={trial.config.imgsz} "
+                      f"batch={trial.config.batch} epochs={trial.config.epochs}", flush=True)
+                start_trial(trial, threads)
+                running += 1
+            time.sleep(config.poll_seconds)
+            poll_trials(trials, config)
+    finally:
+        # 中斷處理區塊用途：Ctrl+C 或例外時一併結束並回收子行程，下次以 --resume 接續
+        shutdown_trials(trials)
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：整理結果表
+# ───────────────────────────────────────────────
+def build_results(trials: List[Trial]) -> List[Dict[str, Any]]:
+    """每個組合一列：設定、狀態、最佳指標、完成 epoch 數與耗時。"""
+    rows = []
+    for trial in trials:
+        epochs_run = len(trial.history)
+        rows.append({
+            "trial": trial.config.name,
+            "model": trial.config.model,
+            "imgsz": trial.config.imgsz,
+            "batch": trial.config.batch,
+            "epochs": trial.config.epochs,
+            "status": trial.status,
+            "epochs_run": epochs_run,
+            "map50-95": round(trial.scores.get("map50-95", 0.0), 5),
+            "map50": round(trial.scores.get("map50", 0.0), 5),
+            "wall_s": round(trial.elapsed_s, 1),
+            "s_per_epoch": round(trial.elapsed_s / epochs_run, 1) if epochs_run else None,
+            "weights": trial.config.out_weights,
+        })
+    return rows
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：寫出結果表（CSV 與 JSON）
+# ───────────────────────────────────────────────
+def write_results(config: SweepConfig, rows: List[Dict[str, Any]]) -> Path:
+    """結果存於 project/name/sweep_results.csv 與 .json。"""
+    sweep_dir = Path(config.project) / config.name
+    sweep_dir.mkdir(parents=True, exist_ok=True)
+    csv_path = sweep_dir / "sweep_results.csv"
+    with csv_path.open("w", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    with (sweep_dir / "sweep_results.json").open("w", encoding="utf-8") as handle:
+        json.dump({"config": asdict(config), "results": rows}, handle, ensure_ascii=False, indent=2)
+    return csv_path
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：挑選最佳組合並推廣權重
+# ───────────────────────────────────────────────
+def promote_best(config: SweepConfig, rows: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """只從完整跑完的組合中挑選指標最高者，將其 best.pt 複製到 --out-weights。"""
+    finished = [row for row in rows if row["status"] == "done" and Path(row["weights"]).is_file()]
+    if not finished:
+        return None
+    best = max(finished, key=lambda row: row[config.metric])
+    out_path = Path(config.out_weights)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copy2(best["weights"], out_path)
+    return best
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：以表格輸出結果摘要
+# ───────────────────────────────────────────────
+def print_results(rows: List[Dict[str, Any]], metric: str) -> None:
+    """依指標由高到低輸出。"""
+    for row in sorted(rows, key=lambda item: item[metric], reverse=True):
+        per_epoch = f"{row['s_per_epoch']}s/ep" if row["s_per_epoch"] is not None else "-"
+        print(
+            f"{row['trial']:>9} {row['status']:>7} {metric}={row[metric]:.4f} "
+            f"model={row['model']} imgsz={row['imgsz']} batch={row['batch']} "
+            f"epochs={row['epochs_run']}/{row['epochs']} wall={row['wall_s']}s {per_epoch}"
+        )
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：主程式入口，負責串接參數與輸出
+# ───────────────────────────────────────────────
+def main() -> None:
+    """主程式入口。"""
+    config = build_config(parse_args())
+    trials = build_trials(config)
+    if not trials:
+        print("sweep_result: FAILED (搜尋空間為空)")
+        sys.exit(1)
+
+    run_sweep(config, trials)
+    rows = build_results(trials)
+    csv_path = write_results(config, rows)
+    print_results(rows, config.metric)
+    best = promote_best(config, rows)
+
+    # 輸出資訊區塊用途：輸出結果表位置與推廣結果
+    print(f"results: {csv_path}")
+    if best is None:
+        print("sweep_result: FAILED (沒有任何組合完整跑完)")
+        sys.exit(1)
+    print(f"best_trial: {best['trial']} ({config.metric}={best[config.metric]:.4f})")
+    print(f"promoted_to: {config.out_weights}")
+    print("sweep_result: OK")
+
+
+if __name__ == "__main__":
+    # 函式區塊用途：提供 CLI 執行入口
+    main()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# 檔案用途：提供 iotVisionTurret YOLOv11 的影片 / 連續影格追蹤流程（解碼與推論分執行緒管線化）
+
+# ───────────────────────────────────────────────
+# 匯入區塊：集中管理追蹤所需的標準函式庫與推論工具
+# ───────────────────────────────────────────────
+import argparse
+import glob
+import importlib
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+try:
+    from .infer import (
+        DEFAULT_BACKEND,
+        SUPPORTED_BACKENDS,
+        elapsed_ms,
+        extract_candidates,
+        get_image_size,
+        load_image,
+        load_model,
+        resolve_class_ids,
+        resolve_names,
+        resolve_weights,
+        trim_error_detail,
+    )
+except ImportError:
+    # 匯入相容區塊用途：直接以腳本執行時改用同目錄匯入
+    from infer import (  # type: ignore
+        DEFAULT_BACKEND,
+        SUPPORTED_BACKENDS,
+        elapsed_ms,
+        extract_candidates,
+        get_image_size,
+        load_image,
+        load_model,
+        resolve_class_ids,
+        resolve_names,
+        resolve_weights,
+        trim_error_detail,
+    )
+
+# ───────────────────────────────────────────────
+# 常數區塊：影格佇列深度、支援的影格副檔名與預設追蹤器
+# ───────────────────────────────────────────────
+DEFAULT_QUEUE_SIZE = 4
+FRAME_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+DEFAULT_TRACKER = "bytetrack.yaml"
+
+
+# ───────────────────────────────────────────────
+# 自訂錯誤類別區塊：影格來源無法開啟或讀取
+# ───────────────────────────────────────────────
+class FrameSourceError(Exception):
+    """影格來源錯誤（影片無法開啟、資料夾內沒有影格等）。"""
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：依來源型別產生 (index, timestamp_ms, frame)
+# ───────────────────────────────────────────────
+def iter_frames(source: Union[str, List[str]]) -> Iterator[Tuple[int, float, Any]]:
+    """逐一解碼影格；source 可為影片路徑、攝影機編號、影格資料夾或影格路徑清單。"""
+    if isinstance(source, list) or (isinstance(source, str) and os.path.isdir(source)):
+        # 影格序列區塊用途：資料夾依檔名排序，時間戳以讀取時間為準
+        if isinstance(source, list):
+            frame_paths = source
+        else:
+            frame_paths = sorted(
+                path for path in glob.glob(os.path.join(source, "*"))
+                if path.lower().endswith(FRAME_EXTENSIONS)
+            )
+        if not frame_paths:
+            raise FrameSourceError(f"找不到任何影格: {source}")
+        started = time.perf_counter()
+        for index, frame_path in enumerate(frame_paths):
+            yield index, elapsed_ms(started), load_image(frame_path)
+        return
+
+    # 影片 / 攝影機區塊用途：以 OpenCV VideoCapture 逐格解碼，優先使用影片本身的時間戳
+    cv2 = importlib.import_module("cv2")
+    capture_source: Union[str, int] = int(source) if str(source).isdigit() else source
+    capture = cv2.VideoCapture(capture_source)
+    if not capture.isOpened():
+        raise FrameSourceError(f"無法開啟影片來源: {source}")
+    try:
+        index = 0
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            yield index, float(capture.get(cv2.CAP_PROP_POS_MSEC)), frame
+            index += 1
+    finally:
+        capture.release()
+
+
+# ───────────────────────────────────────────────
+# 類別區塊用途：背景解碼執行緒，與推論管線化
+# ───────────────────────────────────────────────
+class FrameReader(threading.Thread):
+    """在背景執行緒解碼影格並放入有界佇列，推論端取用時下一格已在解碼。"""
+
+    _END = object()
+
+    def __init__(self, source: Union[str, List[str]], queue_size: int = DEFAULT_QUEUE_SIZE, max_frames: Optional[int] = None) -> None:
+        super().__init__(daemon=True)
+        self.source = source
+        self.max_frames = max_frames
+        self.frames: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size))
+        self.error: Optional[BaseException] = None
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        try:
+            for index, timestamp_ms, frame in iter_frames(self.source):
+                if self._stopped.is_set() or (self.max_frames is not None and index >= self.max_frames):
+                    break
+                decode_done = time.perf_counter()
+                self._put((index, timestamp_ms, frame, decode_done))
+        except BaseException as exc:  # noqa: BLE001 - 交由取用端統一回報
+            self.error = exc
+        finally:
+            self._put(self._END)
+
+    def _put(self, item: Any) -> None:
+        # 停止檢查區塊用途：取用端已停止時不再阻塞於滿佇列
+        while not self._stopped.is_set():
+            try:
+                self.frames.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def stop(self) -> None:
+        """通知解碼執行緒停止。"""
+        self._stopped.set()
+
+    def __iter__(self) -> Iterator[Tuple[int, float, Any, float]]:
+        while True:
+            item = self.frames.get()
+            if item is self._END:
+                if self.error is not None:
+                    raise self.error
+                return
+            yield item
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：在同一影格的候選框中挑選追蹤對象
+# ───────────────────────────────────────────────
+def select_track(candidates: List[Dict[str, Any]], locked_track_id: Optional[int]) -> Optional[Dict[str, Any]]:
+    """優先延續已鎖定的 track id，否則取最高信心值。"""
+    if not candidates:
+        return None
+    if locked_track_id is not None:
+        for candidate in candidates:
+            if candidate.get("track_id") == locked_track_id:
+                return candidate
+    return max(candidates, key=lambda item: item.get("conf", 0.0))
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：串流追蹤主流程，每一格呼叫 emit 輸出一筆結果
+# ───────────────────────────────────────────────
+def track_stream(
+    source: Union[str, List[str]],
+    weights_path: str,
+    target: str,
+    emit: Callable[[Dict[str, Any]], None],
+    conf: float = 0.25,
+    device: str = "cpu",
+    tracker: str = DEFAULT_TRACKER,
+    max_frames: Optional[int] = None,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    backend: Optional[str] = None,
+) -> Dict[str, Any]:
+    """逐格追蹤目標並透過 emit 輸出；回傳整體摘要。"""
+    started = time.perf_counter()
+    try:
+        resolved_path, resolved_backend = resolve_weights(weights_path, backend)
+    except ValueError as exc:
+        return {"ok": False, "error": "INFER_FAILED", "detail": trim_error_detail(str(exc))}
+    if resolved_path is None:
+        return {"ok": False, "error": "WEIGHTS_NOT_FOUND"}
+    if not isinstance(target, str) or not target.strip():
+        return {"ok": False, "error": "INFER_FAILED", "detail": "target 必須為非空字串"}
+
+    # 模型準備區塊用途：model.track 會在模型上註冊追蹤 callback 與狀態，
+    # 因此每個串流使用獨立模型，不與 infer 的模型快取共用
+    model = load_model(resolved_path)
+    # 類別預篩區塊用途：只讓 target 類別進入 NMS 與追蹤器
+    class_ids = resolve_class_ids(resolve_names(None, model), target)
+    if not class_ids:
+        return {"ok": False, "error": "INFER_FAILED", "detail": f"模型沒有類別: {target}"}
+
+    reader = FrameReader(source, queue_size=queue_size, max_frames=max_frames)
+    reader.start()
+    frames = 0
+    found_frames = 0
+    locked_track_id: Optional[int] = None
+    try:
+        for index, timestamp_ms, frame, decode_done in reader:
+            infer_started = time.perf_counter()
+            results = model.track(
+                source=frame,
+                conf=float(conf),
+                device=device,
+                tracker=tracker,
+                classes=class_ids,
+                persist=True,
+                verbose=False,
+            )
+            track_ms = elapsed_ms(infer_started)
+            if not results:
+                raise RuntimeError("追蹤結果為空")
+            result = results[0]
+            names = resolve_names(result, model)
+            boxes = getattr(result, "boxes", None)
+            candidates = extract_candidates(boxes, names, target, float(conf)) if boxes is not None else []
+            best = select_track(candidates, locked_track_id)
+            image_width, image_height = get_image_size(frame)
+
+            # 逐格輸出區塊用途：每格一筆 JSON，未命中時 found=false
+            record: Dict[str, Any] = {
+                "ok": True,
+                "frame": index,
+                "timestamp_ms": round(timestamp_ms, 3),
+                "found": best is not None,
+                "image_size": {"w": image_width, "h": image_height},
+                "timing_ms": {
+                    "queue_wait": round((infer_started - decode_done) * 1000, 3),
+                    "track": track_ms,
+                },
+            }
+            if best is not None:
+                locked_track_id = best.get("track_id", locked_track_id)
+                found_frames += 1
+                record.update({
+                    "label": best["label"],
+                    "conf": best["conf"],
+                    "bbox": best["bbox"],
+                    "center": best["center"],
+                    "track_id": best.get("track_id"),
+                })
+            emit(record)
+            frames += 1
+    except FrameSourceError as exc:
+        return {"ok": False, "error": "SOURCE_FAILED", "detail": trim_error_detail(str(exc))}
+    except Exception as exc:
+        sys.stderr.write(traceback.format_exc())
+        return {"ok": False, "error": "INFER_FAILED", "detail": trim_error_detail(str(exc)), "frames": frames}
+    finally:
+        reader.stop()
+
+    total_ms = elapsed_ms(started)
+    return {
+        "ok": True,
+        "done": True,
+        "frames": frames,
+        "found_frames": found_frames,
+        "last_track_id": locked_track_id,
+        "backend": resolved_backend,
+        "elapsed_ms": total_ms,
+        "fps": round(frames * 1000 / total_ms, 3) if total_ms > 0 else 0.0,
+    }
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：解析命令列參數
+# ───────────────────────────────────────────────
+def parse_args() -> argparse.Namespace:
+    """解析追蹤腳本參數。"""
+    parser = argparse.ArgumentParser(description="iotVisionTurret YOLOv11 影片追蹤腳本")
+    # 參數說明區塊：影片路徑、攝影機編號或影格資料夾
+    parser.add_argument("--source", required=True, help="影片路徑、攝影機編號或影格資料夾")
+    # 參數說明區塊：指定模型權重檔案
+    parser.add_argument("--weights", required=True, help="模型權重檔案")
+    # 參數說明區塊：指定要追蹤的目標類別名稱
+    parser.add_argument("--target", required=True, help="要追蹤的目標類別名稱")
+    # 參數說明區塊：指定信心門檻
+    parser.add_argument("--conf", type=float, default=0.25, help="信心門檻")
+    # 參數說明區塊：指定推論裝置 (cpu/cuda)
+    parser.add_argument("--device", default="cpu", help="推論裝置 (cpu/cuda)")
+    # 參數說明區塊：指定 ultralytics 追蹤器設定
+    parser.add_argument("--tracker", default=DEFAULT_TRACKER, help="追蹤器設定 (bytetrack.yaml/botsort.yaml)")
+    # 參數說明區塊：限制處理的影格數
+    parser.add_argument("--max-frames", type=int, default=None, help="最多處理的影格數")
+    # 參數說明區塊：指定推論後端 (auto/pytorch/onnx/openvino)
+    parser.add_argument("--backend", default=DEFAULT_BACKEND, choices=SUPPORTED_BACKENDS, help="推論後端")
+    return parser.parse_args()
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：主程式入口，每格輸出一行 JSON，最後輸出摘要
+# ───────────────────────────────────────────────
+def main() -> None:
+    """主程式入口。"""
+    def emit(record: Dict[str, Any]) -> None:
+        sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+
+    args = parse_args()
+    summary = track_stream(
+        source=args.source,
+        weights_path=args.weights,
+        target=args.target,
+        emit=emit,
+        conf=args.conf,
+        device=args.device,
+        tracker=args.tracker,
+        max_frames=args.max_frames,
+        backend=args.backend,
+    )
+    emit(summary)
+    if not summary.get("ok"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    # 函式區塊用途：提供 CLI 執行入口
+    main()
@@ -9,10 +9,28 @@ import importlib
 import shutil
 import sys
 import traceback
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from pathlib import Path
 from typing import Optional
 
+try:
+    from .export import EXPORT_FORMATS, ExportConfig, export_model
+except ImportError:
+    # 匯入相容區塊用途：直接以腳本執行時改用同目錄匯入
+    from export import EXPORT_FORMATS, ExportConfig, export_model  # type: ignore
+
+try:
+    from .prepare_dataset import install_dataset_cache
+except ImportError:
+    # 匯入相容區塊用途：直接以腳本執行時改用同目錄匯入
+    from prepare_dataset import install_dataset_cache  # type: ignore
+
+# ───────────────────────────────────────────────
+# 常數區塊：影像快取模式（none 不快取，ram 載入記憶體，disk 存成 .npy）
+# ───────────────────────────────────────────────
+CACHE_MODES = ("none", "ram", "disk")
+
+
 # ───────────────────────────────────────────────
 # 狀態資料結構區塊：定義訓練所需的核心設定
 # ───────────────────────────────────────────────
@@ -29,6 +47,14 @@ class TrainConfig:
     project: str
     name: str
     out_weights: str
+    resume: bool = False
+    patience: int = 100
+    cache: str = "none"
+    workers: int = 8
+    dataset_cache: Optional[str] = None
+    export_format: Optional[str] = None
+    export_half: bool = False
+    export_int8: bool = False
 
 
 # ───────────────────────────────────────────────
@@ -55,6 +81,22 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--name", default="exp", help="訓練輸出名稱")
     # 參數說明區塊：輸出 best.pt 目標路徑
     parser.add_argument("--out-weights", required=True, help="best.pt 複製輸出路徑")
+    # 參數說明區塊：從 project/name/weights/last.pt 續訓（不存在時從頭訓練）
+    parser.add_argument("--resume", action="store_true", help="從上次中斷的 last.pt 續訓")
+    # 參數說明區塊：驗證指標連續多少回合未改善即提前停止
+    parser.add_argument("--patience", type=int, default=100, help="early stopping 容忍回合數")
+    # 參數說明區塊：資料集影像快取位置
+    parser.add_argument("--cache", default="none", choices=CACHE_MODES, help="影像快取 (none/ram/disk)")
+    # 參數說明區塊：資料載入 worker 數
+    parser.add_argument("--workers", type=int, default=8, help="資料載入 worker 數")
+    # 參數說明區塊：prepare_dataset.py 產生的預縮放影像快取目錄
+    parser.add_argument("--dataset-cache", default=None, help="預處理影像快取目錄（由 prepare_dataset.py 產生）")
+    # 參數說明區塊：訓練完成後於 out-weights 旁匯出 CPU 推論模型
+    parser.add_argument("--export", dest="export_format", default=None, choices=EXPORT_FORMATS, help="額外匯出格式 (onnx/openvino)")
+    # 參數說明區塊：匯出 FP16 權重
+    parser.add_argument("--export-half", action="store_true", help="匯出 FP16 權重")
+    # 參數說明區塊：匯出 INT8 量化模型（OpenVINO 以 --data 校正）
+    parser.add_argument("--export-int8", action="store_true", help="匯出 INT8 量化模型")
     return parser.parse_args()
 
 
@@ -73,6 +115,14 @@ def build_config(args: argparse.Namespace) -> TrainConfig:
         project=args.project,
         name=args.name,
         out_weights=args.out_weights,
+        resume=args.resume,
+        patience=args.patience,
+        cache=args.cache,
+        workers=args.workers,
+        dataset_cache=args.dataset_cache,
+        export_format=args.export_format,
+        export_half=args.export_half,
+        export_int8=args.export_int8,
     )
 
 
@@ -94,24 +144,75 @@ def build_expected_best_path(config: TrainConfig, save_dir: Optional[Path]) -> P
     return base_dir / "weights" / "best.pt"
 
 
+# ───────────────────────────────────────────────
+# 函式區塊用途：推導 last.pt 的預期路徑
+# ───────────────────────────────────────────────
+def build_last_checkpoint_path(config: TrainConfig) -> Path:
+    """續訓使用的 last.pt 固定位於 project/name/weights/。"""
+    return Path(config.project) / config.name / "weights" / "last.pt"
+
+
+# ───────────────────────────────────────────────
+# 函式區塊用途：判斷 checkpoint 是否為未完成的訓練
+# ───────────────────────────────────────────────
+def is_resumable_checkpoint(checkpoint_path: Path) -> bool:
+    """ultralytics 訓練結束時會移除 optimizer 並把 epoch 設為 -1，此時已無可續訓內容。"""
+    if not checkpoint_path.is_file():
+        return False
+    torch = importlib.import_module("torch")
+    try:
+        checkpoint = torch.load(str(checkpoint_path), map_location="cpu", weights_only=False)
+    except TypeError:
+        # 相容區塊用途：舊版 torch 沒有 weights_only 參數
+        checkpoint = torch.load(str(checkpoint_path), map_location="cpu")
+    return isinstance(checkpoint, dict) and checkpoint.get("epoch", -1) >= 0 and checkpoint.get("optimizer") is not None
+
+
 # ───────────────────────────────────────────────
 # 函式區塊用途：執行訓練流程並回傳 best.pt 路徑
 # ───────────────────────────────────────────────
 def run_training(config: TrainConfig) -> Path:
     """執行訓練流程並回傳 best.pt 路徑。"""
     yolo_class = load_yolo_class()
-    # 模型載入區塊用途：載入指定模型或權重
-    model = yolo_class(config.model)
-    # 訓練執行區塊用途：呼叫 ultralytics 訓練流程
-    results = model.train(
-        data=config.data,
-        imgsz=config.imgsz,
-        epochs=config.epochs,
-        batch=config.batch,
-        device=config.device,
-        project=config.project,
-        name=config.name,
-    )
+    if config.dataset_cache:
+        # 資料集快取區塊用途：讓 dataloader 直接讀取預縮放影像，略過 JPEG 解碼與縮放
+        dataset_cache = install_dataset_cache(config.dataset_cache, config.imgsz)
+        print(f"dataset_cache: {config.dataset_cache} ({len(dataset_cache.entries)} images)")
+        if not dataset_cache.worker_safe and config.workers > 0:
+            # 相容區塊用途：spawn 啟動的 worker 看不到替換後的 imread，改在主行程載入資料
+            print("dataset_cache: 此 ultralytics 版本無法在 spawn worker 內安裝快取，改用 workers=0")
+            config = replace(config, workers=0)
+    last_path = build_last_checkpoint_path(config)
+    if config.resume and last_path.is_file() and not is_resumable_checkpoint(last_path):
+        # 已完成分支區塊用途：上次訓練已跑完，直接沿用既有 best.pt
+        print(f"resume: 訓練已完成，沿用 {last_path.parent / 'best.pt'}")
+        return build_expected_best_path(config, None)
+
+    if config.resume and last_path.is_file():
+        # 續訓區塊用途：ultralytics 會從 checkpoint 還原 epoch、optimizer 與原本的訓練參數
+        print(f"resume: 從 {last_path} 續訓")
+        model = yolo_class(str(last_path))
+        results = model.train(resume=True)
+    else:
+        if config.resume:
+            print(f"resume: 找不到 {last_path}，從頭開始訓練")
+        # 模型載入區塊用途：載入指定模型或權重
+        model = yolo_class(config.model)
+        # 訓練執行區塊用途：呼叫 ultralytics 訓練流程
+        results = model.train(
+            data=config.data,
+            imgsz=config.imgsz,
+            epochs=config.epochs,
+            batch=config.batch,
+            device=config.device,
+            project=config.project,
+            name=config.name,
+            patience=config.patience,
+            cache=False if config.cache == "none" else config.cache,
+            workers=config.workers,
+            # 輸出目錄區塊用途：續訓模式固定寫入 project/name，避免產生 exp2 導致下次找不到 last.pt
+            exist_ok=config.resume,
+        )
     raw_save_dir = getattr(results, "save_dir", "") if results else ""
     save_dir = Path(raw_save_dir) if raw_save_dir else None
     best_path = build_expected_best_path(config, save_dir)
@@ -129,6 +230,7 @@ def main() -> None:
     best_path: Optional[Path] = None
     error_message: Optional[str] = None
     copy_success = False
+    exported_path: Optional[Path] = None
 
     try:
         # 訓練流程區塊用途：執行訓練並取得 best.pt 路徑
@@ -144,6 +246,17 @@ def main() -> None:
         # 檔案複製區塊用途：將 best.pt 複製至指定輸出路徑
         shutil.copy2(best_path, out_path)
         copy_success = True
+        if config.export_format:
+            # 匯出區塊用途：在輸出權重旁產生 ONNX/OpenVINO 模型，供 infer.py 以 backend 選用
+            exported_path = export_model(ExportConfig(
+                weights=str(out_path),
+                format=config.export_format,
+                imgsz=config.imgsz,
+                half=config.export_half,
+                int8=config.export_int8,
+                data=config.data,
+                device=config.device,
+            ))
     except Exception as exc:
         # 錯誤處理區塊用途：捕捉訓練或複製流程錯誤並記錄原因
         error_message = str(exc)
@@ -155,12 +268,15 @@ def main() -> None:
         print(f"copied_to: {config.out_weights}")
         if copy_success:
             print("copy_result: OK")
+            if config.export_format:
+                export_status = f"OK ({exported_path})" if exported_path else f"FAILED ({error_message or '未知錯誤'})"
+                print(f"export_result: {export_status}")
         else:
             failure_reason = error_message or "未知錯誤"
             print(f"copy_result: FAILED ({failure_reason})")
 
-    if not copy_success:
-        # 結束狀態區塊用途：複製失敗時回傳非零狀態碼
+    if not copy_success or (config.export_format and exported_path is None):
+        # 結束狀態區塊用途：複製或匯出失敗時回傳非零狀態碼
         sys.exit(1)
 
 
@@ -21,7 +21,15 @@ const state = {
     yoloWeightsPath: process.env.YOLO_WEIGHTS_PATH || '',
     yoloTarget: process.env.YOLO_TARGET || '',
     yoloConf: Number.isFinite(Number(process.env.YOLO_CONF)) ? Number(process.env.YOLO_CONF) : 0.25,
-    yoloInferTimeoutMs: 12000 // Default YOLO inference timeout, can be overridden by buildConfig
+    yoloInferTimeoutMs: 12000, // Default YOLO inference timeout, can be overridden by buildConfig
+    // 常駐推論模式：保留單一 Python runner（--serve），避免每次推論重新啟動進程與載入權重
+    yoloPersistent: process.env.YOLO_PERSISTENT === '1',
+    // 推論後端：空字串交由 Python 依權重副檔名判斷，可設為 onnx/openvino 使用 export.py 的匯出模型
+    yoloBackend: process.env.YOLO_BACKEND || '',
+    // ROI 追蹤：追蹤階段以上一輪 bbox 附近的裁切區域推理，遺失時 Python 端自動退回全畫面
+    yoloRoi: process.env.YOLO_ROI === '1',
+    // 變動閘門：畫面與上一次推理幾乎相同時沿用結果（需搭配 yoloPersistent 才能跨請求保留狀態）
+    yoloMotionGate: process.env.YOLO_MOTION_GATE === '1'
   },
   metrics: {
     lastRunAt: null,
@@ -48,6 +56,14 @@ let jobLock = false;
 // 長輪詢等待隊列：用於在沒有指令時等待裝置連線
 const pendingPullWaiters = [];
 
+// 常駐 YOLO runner 狀態：子進程、stdout 行緩衝與依 id 對應的等待中請求
+const yoloServer = {
+  child: null,
+  buffer: '',
+  pending: new Map(),
+  nextId: 1
+};
+
 // 長輪詢逾時設定（ms）
 const LONG_POLL_TIMEOUT_MS = 25000;
 // 上傳檔案儲存目錄
@@ -154,7 +170,11 @@ function buildConfig(options = {}) {
     yoloConf: Number.isFinite(options.yoloConf) ? options.yoloConf : state.config.yoloConf,
     yoloInferTimeoutMs: Number.isFinite(options.yoloInferTimeoutMs)
       ? options.yoloInferTimeoutMs
-      : state.config.yoloInferTimeoutMs
+      : state.config.yoloInferTimeoutMs,
+    yoloPersistent: typeof options.yoloPersistent === 'boolean' ? options.yoloPersistent : state.config.yoloPersistent,
+    yoloBackend: options.yoloBackend !== undefined ? options.yoloBackend : state.config.yoloBackend,
+    yoloRoi: typeof options.yoloRoi === 'boolean' ? options.yoloRoi : state.config.yoloRoi,
+    yoloMotionGate: typeof options.yoloMotionGate === 'boolean' ? options.yoloMotionGate : state.config.yoloMotionGate
   };
 }
 
@@ -604,19 +624,149 @@ function runPython(payload, config) {
   });
 }
 
+/**
+ * 判斷 Python runner 回應是否為明確失敗
+ * @param {Object} parsed - runner 回傳的 JSON
+ * @returns {boolean} 是否失敗
+ */
+function isYoloFailure(parsed) {
+  const errorCode = parsed?.error_code;
+  return parsed?.ok === false || (typeof errorCode === 'string' && errorCode.length > 0);
+}
+
+/**
+ * 結束常駐 YOLO runner，並讓所有等待中的請求以 null 結束
+ * @param {string} reason - 結束原因
+ */
+function stopYoloServer(reason) {
+  const child = yoloServer.child;
+  yoloServer.child = null;
+  yoloServer.buffer = '';
+  for (const waiter of yoloServer.pending.values()) {
+    clearTimeout(waiter.timeoutId);
+    waiter.resolve(null);
+  }
+  yoloServer.pending.clear();
+  if (child) {
+    logger.info(`[iotVisionTurret] 常駐 YOLO runner 結束：${reason}`);
+    try {
+      child.stdin.end();
+    } catch (err) {
+      // stdin 已關閉時忽略
+    }
+    child.kill('SIGTERM');
+  }
+}
+
+/**
+ * 確保常駐 YOLO runner 已啟動（python index.py --serve）
+ * @returns {Object} 子進程
+ */
+function ensureYoloServer() {
+  if (yoloServer.child) {
+    return yoloServer.child;
+  }
+  const child = spawn(state.config.pythonPath, [state.config.runnerPath, '--serve'], { stdio: ['pipe', 'pipe', 'pipe'] });
+  yoloServer.child = child;
+  yoloServer.buffer = '';
+
+  // ───────────────────────────────────────────────
+  // 段落用途：stdout 每行一個 JSON 回應，依 id 找回對應請求
+  // ───────────────────────────────────────────────
+  child.stdout.on('data', (chunk) => {
+    yoloServer.buffer += chunk.toString('utf8');
+    let newlineIndex = yoloServer.buffer.indexOf('\n');
+    while (newlineIndex >= 0) {
+      const line = yoloServer.buffer.slice(0, newlineIndex).trim();
+      yoloServer.buffer = yoloServer.buffer.slice(newlineIndex + 1);
+      newlineIndex = yoloServer.buffer.indexOf('\n');
+      if (!line) continue;
+      let parsed;
+      try {
+        parsed = JSON.parse(line);
+      } catch (err) {
+        logger.error(`[iotVisionTurret] 常駐 YOLO runner 輸出非 JSON：${line.slice(0, 500)}`);
+        continue;
+      }
+      const waiter = yoloServer.pending.get(parsed?.id);
+      if (!waiter) continue;
+      yoloServer.pending.delete(parsed.id);
+      clearTimeout(waiter.timeoutId);
+      waiter.resolve(parsed);
+    }
+  });
+
+  child.stderr.on('data', (chunk) => {
+    logger.warn(`[iotVisionTurret] 常駐 YOLO runner stderr：${chunk.toString('utf8').trim()}`);
+  });
+
+  const handleExit = (reason) => {
+    if (yoloServer.child !== child) return;
+    stopYoloServer(reason);
+  };
+  child.on('error', (err) => handleExit(`子進程錯誤：${err.message}`));
+  child.on('close', (code) => handleExit(`子進程結束 (code=${code})`));
+
+  logger.info('[iotVisionTurret] 常駐 YOLO runner 已啟動');
+  return child;
+}
+
+/**
+ * 透過常駐 YOLO runner 送出請求
+ * @param {Object} payload - 請求內容（不含 id）
+ * @param {number} timeoutMs - 逾時時間
+ * @returns {Promise<Object|null>} runner 回應；逾時或進程結束時回傳 null
+ */
+function requestYoloServer(payload, timeoutMs) {
+  return new Promise((resolve) => {
+    let child;
+    try {
+      child = ensureYoloServer();
+    } catch (err) {
+      logger.error(`[iotVisionTurret] 常駐 YOLO runner 啟動失敗：${err.message}`);
+      resolve(null);
+      return;
+    }
+    const id = yoloServer.nextId;
+    yoloServer.nextId += 1;
+
+    // ───────────────────────────────────────────────
+    // 段落用途：逾時代表 runner 可能卡住，直接重啟以免後續請求一併卡住
+    // ───────────────────────────────────────────────
+    const timeoutId = setTimeout(() => {
+      if (!yoloServer.pending.has(id)) return;
+      yoloServer.pending.delete(id);
+      resolve(null);
+      stopYoloServer('推理逾時');
+    }, timeoutMs);
+    yoloServer.pending.set(id, { resolve, timeoutId });
+
+    try {
+      child.stdin.write(`${JSON.stringify({ id, ...payload })}\n`);
+    } catch (err) {
+      yoloServer.pending.delete(id);
+      clearTimeout(timeoutId);
+      logger.error(`[iotVisionTurret] 常駐 YOLO runner stdin 寫入失敗：${err.message}`);
+      resolve(null);
+    }
+  });
+}
+
 /**
  * 以子進程呼叫 YOLO 推理並回傳結果
  * @param {string} imagePath - 影像路徑
  * @param {number} maxTimeoutMs - 最大超時時間（毫秒），用於遵守全域任務期限
+ * @param {Object} [extraPayload] - 額外推理參數（例如 roi）
  * @returns {Promise<Object>} 成功回傳 { ok:true, payload }，失敗回傳 { ok:false }
  */
-async function runYoloInfer(imagePath, maxTimeoutMs) {
+async function runYoloInfer(imagePath, maxTimeoutMs, extraPayload = {}) {
   // ───────────────────────────────────────────────
   // 段落用途：組裝推理所需設定與輸入摘要（避免重複寫死在多處）
   // ───────────────────────────────────────────────
   const weightsPath = state.config.yoloWeightsPath;
   const target = state.config.yoloTarget;
   const conf = state.config.yoloConf;
+  const backend = state.config.yoloBackend;
   const configuredTimeoutMs = Number.isFinite(state.config.yoloInferTimeoutMs)
     ? state.config.yoloInferTimeoutMs
     : YOLO_INFER_TIMEOUT_MS;
@@ -650,6 +800,39 @@ async function runYoloInfer(imagePath, maxTimeoutMs) {
     conf
   };
 
+  // ───────────────────────────────────────────────
+  // 段落用途：常駐模式，透過已啟動的 runner 推理（模型快取於 Python 端）
+  // ───────────────────────────────────────────────
+  if (state.config.yoloPersistent) {
+    const parsed = await requestYoloServer({
+      action: 'infer',
+      payload: {
+        image_path: imagePath,
+        weights_path: weightsPath,
+        target,
+        conf,
+        ...(backend ? { backend } : {}),
+        ...(state.config.yoloMotionGate ? { motion_gate: true } : {}),
+        ...extraPayload
+      }
+    }, timeoutMs);
+    if (!parsed) {
+      logger.error(`[iotVisionTurret] 常駐 YOLO 推理逾時或 runner 已結束：${JSON.stringify(inputSummary)}`);
+      return { ok: false };
+    }
+    if (isYoloFailure(parsed)) {
+      logger.error(
+        `[iotVisionTurret] YOLO 推理回傳失敗：${JSON.stringify({
+          errorCode: parsed?.error_code || parsed?.error || null,
+          message: parsed?.message || parsed?.detail || null
+        })}`
+      );
+      return { ok: false };
+    }
+    logger.info(`[iotVisionTurret] 常駐 YOLO 推理完成，耗時 ${parsed.elapsed_ms} ms`);
+    return { ok: true, payload: parsed };
+  }
+
   // ───────────────────────────────────────────────
   // 段落用途：使用 spawn 呼叫 Python，便於精準控制 stdin/stdout/stderr 與 EOF
   // ───────────────────────────────────────────────
@@ -727,10 +910,7 @@ async function runYoloInfer(imagePath, maxTimeoutMs) {
         const trimmed = stdout.trim();
         const parsed = trimmed ? JSON.parse(trimmed) : {};
         const errorCode = parsed?.error_code;
-        const isExplicitFailure =
-          parsed?.ok === false ||
-          (typeof errorCode === 'string' && errorCode.length > 0);
-        if (isExplicitFailure) {
+        if (isYoloFailure(parsed)) {
           // ───────────────────────────────────────────────
           // 段落用途：Python 明確回傳失敗，統一映射為 { ok:false }
           // ───────────────────────────────────────────────
@@ -769,7 +949,9 @@ async function runYoloInfer(imagePath, maxTimeoutMs) {
           image_path: imagePath,
           weights_path: weightsPath,
           target,
-          conf
+          conf,
+          ...(backend ? { backend } : {}),
+          ...extraPayload
         }
       };
       child.stdin.write(JSON.stringify(payload));
@@ -973,7 +1155,10 @@ async function algorithmBatchProcess(deadline, irProfile = 'LIGHT_ON') {
       return { ok: false };
     }
 
-    const trackInferResult = await runYoloInfer(trackImagePath, remainingForTrackInfer);
+    // ROI 提示：以上一輪 bbox 為中心裁切推理，目標遺失時 Python 端會退回全畫面搜尋
+    const lastBbox = lastYoloResult?.raw?.bbox;
+    const roiPayload = state.config.yoloRoi && lastBbox ? { roi: { bbox: lastBbox } } : {};
+    const trackInferResult = await runYoloInfer(trackImagePath, remainingForTrackInfer, roiPayload);
     if (!trackInferResult || trackInferResult.ok !== true) {
       logger.error('[iotVisionTurret] YOLO 推理失敗（追蹤）：runYoloInfer 回傳 ok=false');
       return { ok: false };
@@ -1129,6 +1314,7 @@ module.exports = {
     deviceOnline = false;
     currentDeviceId = null;
     resetDeviceState('插件離線');
+    stopYoloServer('插件離線');
     logger.info('iotVisionTurret 本地策略已離線');
   },
 
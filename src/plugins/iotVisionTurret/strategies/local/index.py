@@ -5,11 +5,14 @@
 # ───────────────────────────────────────────────
 # 匯入區塊：集中管理標準函式庫與推論模組
 # ───────────────────────────────────────────────
+import argparse
 import json
 import os
+import struct
 import sys
+import time
 import traceback
-from typing import Any, Dict, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 # 確保在 Windows 環境下使用 UTF-8 編碼輸出
 if sys.platform == 'win32':
@@ -17,12 +20,41 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
-from YOLOv11.infer import infer
+from YOLOv11.frame_input import FrameInputError, close_shared_frames, open_frame
+from YOLOv11.infer import (
+    SUPPORTED_BACKENDS,
+    elapsed_ms,
+    infer,
+    infer_batch,
+    infer_image,
+    infer_image_multi,
+    load_image,
+    weights_exist,
+)
+from YOLOv11.kalman import TRACK_FILTERS, FilterError, now_ms, parse_filter_options
+from YOLOv11.motion import MotionGateError, parse_motion_gate
+from YOLOv11.pipeline import OrderedPipeline, resolve_pipeline_options
+from YOLOv11.result_cache import RESULT_CACHE, build_result_key, hash_file
+from YOLOv11.roi import RoiError, parse_roi
+from YOLOv11.track import DEFAULT_TRACKER, track_stream
+
+# 協議輸出通道：常駐模式會把一般 stdout 轉到 stderr，避免第三方輸出污染 JSON 行
+PROTOCOL_STDOUT = sys.stdout
 
 # ───────────────────────────────────────────────
 # 常數區塊：定義錯誤代碼與必要欄位清單
 # ───────────────────────────────────────────────
 REQUIRED_FIELDS = ("image_path", "weights_path", "conf")
+BATCH_REQUIRED_FIELDS = ("images", "weights_path")
+TRACK_REQUIRED_FIELDS = ("weights_path", "target", "conf")
+FRAME_REQUIRED_FIELDS = ("frame", "weights_path", "conf")
+# 二進位請求的 header 與 payload 上限，避免異常長度耗盡記憶體
+MAX_BINARY_HEADER_BYTES = 1024 * 1024
+MAX_BINARY_PAYLOAD_BYTES = 256 * 1024 * 1024
+# 單次批次推論的影像上限，避免一次佔用過多記憶體
+MAX_BATCH_SIZE = 32
+# 多目標模式單次請求的類別上限
+MAX_TARGETS = 32
 
 
 # ───────────────────────────────────────────────
@@ -42,8 +74,8 @@ class RunnerError(Exception):
 # ───────────────────────────────────────────────
 def emit_stdout(payload: Dict[str, Any]) -> None:
     """輸出單行 JSON 到 stdout。"""
-    sys.stdout.write(f"{json.dumps(payload, ensure_ascii=False)}\n")
-    sys.stdout.flush()
+    PROTOCOL_STDOUT.write(f"{json.dumps(payload, ensure_ascii=False)}\n")
+    PROTOCOL_STDOUT.flush()
 
 
 # ───────────────────────────────────────────────
@@ -132,6 +164,172 @@ def normalize_request(payload: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
     return str(op), parameters
 
 
+# ───────────────────────────────────────────────
+# 輔助函式區塊：解析 target 欄位
+# ───────────────────────────────────────────────
+def parse_target(target_raw: Any) -> Optional[str]:
+    """target 為選填欄位：若未提供或為空字串，視為不過濾目標。"""
+    if target_raw is None:
+        return None
+    target_str = str(target_raw).strip()
+    return target_str or None
+
+
+# ───────────────────────────────────────────────
+# 輔助函式區塊：解析 conf 欄位並檢查範圍
+# ───────────────────────────────────────────────
+def parse_conf(conf_raw: Any) -> float:
+    """將 conf 轉為 0~1 之間的浮點數。"""
+    try:
+        conf_value = float(conf_raw)
+    except (TypeError, ValueError) as exc:
+        raise RunnerError("INVALID_INPUT", f"conf 不是有效數值: {exc}") from exc
+
+    if conf_value < 0.0 or conf_value > 1.0:
+        raise RunnerError("INVALID_INPUT", "conf 必須介於 0 到 1 之間")
+    return conf_value
+
+
+# ───────────────────────────────────────────────
+# 輔助函式區塊：解析 backend 欄位
+# ───────────────────────────────────────────────
+def parse_backend(backend_raw: Any) -> Optional[str]:
+    """backend 為選填欄位：未提供時交由 infer 依副檔名或 YOLO_BACKEND 決定。"""
+    if backend_raw is None or not str(backend_raw).strip():
+        return None
+    backend = str(backend_raw).strip().lower()
+    if backend not in SUPPORTED_BACKENDS:
+        raise RunnerError("INVALID_INPUT", f"backend 必須為 {'/'.join(SUPPORTED_BACKENDS)} 之一")
+    return backend
+
+
+# ───────────────────────────────────────────────
+# 輔助函式區塊：解析 roi 欄位（上一次目標位置）
+# ───────────────────────────────────────────────
+def parse_roi_field(roi_raw: Any) -> Optional[Dict[str, Any]]:
+    """roi 為選填欄位：提供時需含上一次的 bbox 或 center。"""
+    if roi_raw is None:
+        return None
+    try:
+        return parse_roi(roi_raw)
+    except RoiError as exc:
+        raise RunnerError("INVALID_INPUT", str(exc)) from exc
+
+
+# ───────────────────────────────────────────────
+# 輔助函式區塊：解析 motion_gate 欄位（畫面無變動時沿用上一次結果）
+# ───────────────────────────────────────────────
+def parse_motion_gate_field(gate_raw: Any) -> Optional[Dict[str, Any]]:
+    """motion_gate 為選填欄位：true 使用預設門檻，物件可覆蓋 threshold/max_age_ms/key。"""
+    try:
+        return parse_motion_gate(gate_raw)
+    except MotionGateError as exc:
+        raise RunnerError("INVALID_INPUT", str(exc)) from exc
+
+
+# ───────────────────────────────────────────────
+# 輔助函式區塊：解析多目標模式的 targets / top_k 欄位
+# ───────────────────────────────────────────────
+def parse_targets_field(targets_raw: Any) -> Optional[List[str]]:
+    """targets 為選填的類別名稱陣列；提供時改為多目標模式，重複名稱只保留第一個。"""
+    if targets_raw is None:
+        return None
+    if not isinstance(targets_raw, list) or not targets_raw:
+        raise RunnerError("INVALID_INPUT", "targets 必須為非空陣列")
+    if len(targets_raw) > MAX_TARGETS:
+        raise RunnerError("INVALID_INPUT", f"targets 數量超過上限 {MAX_TARGETS}")
+    targets: List[str] = []
+    for index, item in enumerate(targets_raw):
+        target = parse_target(item)
+        if target is None:
+            raise RunnerError("INVALID_INPUT", f"targets[{index}] 不可為空字串")
+        if target not in targets:
+            targets.append(target)
+    return targets
+
+
+def parse_top_k_field(top_k_raw: Any) -> Optional[int]:
+    """top_k 為選填正整數，限制每個類別回傳的框數；未提供時回傳全部。"""
+    if top_k_raw is None:
+        return None
+    if isinstance(top_k_raw, bool):
+        raise RunnerError("INVALID_INPUT", "top_k 必須為正整數")
+    try:
+        top_k = int(top_k_raw)
+    except (TypeError, ValueError) as exc:
+        raise RunnerError("INVALID_INPUT", f"top_k 不是有效整數: {exc}") from exc
+    if top_k <= 0:
+        raise RunnerError("INVALID_INPUT", "top_k 必須為正整數")
+    return top_k
+
+
+# ───────────────────────────────────────────────
+# 輔助函式區塊：檢查多目標模式與單目標專用欄位的組合
+# ───────────────────────────────────────────────
+def validate_multi_target_options(normalized: Dict[str, Any]) -> None:
+    """roi 與 motion_gate 依附於單一目標的追蹤狀態，不可與 targets 同時使用。"""
+    if normalized["targets"] is None:
+        if normalized["top_k"] is not None:
+            raise RunnerError("INVALID_INPUT", "top_k 需搭配 targets 使用")
+        return
+    for field in ("roi", "motion_gate"):
+        if normalized[field] is not None:
+            raise RunnerError("INVALID_INPUT", f"targets 不可與 {field} 同時使用")
+
+
+# ───────────────────────────────────────────────
+# 輔助函式區塊：解析 result_cache 欄位
+# ───────────────────────────────────────────────
+def parse_result_cache_field(cache_raw: Any) -> bool:
+    """result_cache 為選填布林值：快取啟用時預設查詢，false 時強制重新推論。"""
+    if cache_raw is None:
+        return True
+    if not isinstance(cache_raw, bool):
+        raise RunnerError("INVALID_INPUT", "result_cache 必須為布林值")
+    return cache_raw
+
+
+# ───────────────────────────────────────────────
+# 輔助函式區塊：查詢偵測結果快取
+# ───────────────────────────────────────────────
+def lookup_cached_result(
+    normalized: Dict[str, Any],
+    content_digest: Callable[[], str],
+) -> Tuple[Optional[Tuple[Any, ...]], Optional[Dict[str, Any]]]:
+    """回傳 (快取鍵, 命中的回應)；停用快取、權重無法解析或讀檔失敗時鍵為 None。"""
+    if not normalized["result_cache"] or not RESULT_CACHE.enabled:
+        return None, None
+    started = time.perf_counter()
+    try:
+        # 目標鍵區塊用途：多目標模式以 (targets, top_k) 取代單一 target
+        target_key = normalized["target"]
+        if normalized["targets"] is not None:
+            target_key = (tuple(normalized["targets"]), normalized["top_k"])
+        cache_key = build_result_key(
+            content_digest(),
+            normalized["weights_path"],
+            normalized["backend"],
+            target_key,
+            normalized["conf"],
+            normalized["roi"],
+        )
+    except OSError:
+        return None, None
+    if cache_key is None:
+        return None, None
+    cached, age_ms = RESULT_CACHE.lookup(cache_key)
+    if cached is None:
+        return cache_key, None
+    # 命中標記區塊用途：與變動閘門相同以 cached=true 標示，濾波器不會把它當成新量測
+    cached.update({
+        "cached": True,
+        "cache_source": "result",
+        "cache_age_ms": round(age_ms, 3),
+        "timing_ms": {"cache_lookup": elapsed_ms(started)},
+    })
+    return cache_key, cached
+
+
 # ───────────────────────────────────────────────
 # 輔助函式區塊：驗證推論請求內容
 # ───────────────────────────────────────────────
@@ -143,39 +341,591 @@ def validate_infer_request(parameters: Dict[str, Any]) -> Dict[str, Any]:
 
     image_path = str(parameters.get("image_path", "")).strip()
     weights_path = str(parameters.get("weights_path", "")).strip()
-    target_raw = parameters.get("target")
-    conf_raw = parameters.get("conf")
 
     if not image_path or not weights_path:
         raise RunnerError("INVALID_INPUT", "image_path/weights_path 不可為空字串")
-    
-    # target 為選填欄位：若未提供或為空字串，視為不過濾目標
-    target = None
-    if target_raw is not None:
-        target_str = str(target_raw).strip()
-        if target_str:
-            target = target_str
-
-    try:
-        conf_value = float(conf_raw)
-    except (TypeError, ValueError) as exc:
-        raise RunnerError("INVALID_INPUT", f"conf 不是有效數值: {exc}") from exc
 
-    if conf_value < 0.0 or conf_value > 1.0:
-        raise RunnerError("INVALID_INPUT", "conf 必須介於 0 到 1 之間")
+    target = parse_target(parameters.get("target"))
+    conf_value = parse_conf(parameters.get("conf"))
 
     if not os.path.isfile(image_path):
         raise RunnerError("FILE_NOT_FOUND", f"找不到影像檔案: {image_path}")
 
-    if not os.path.isfile(weights_path):
+    if not weights_exist(weights_path):
         raise RunnerError("FILE_NOT_FOUND", f"找不到權重檔案: {weights_path}")
 
-    return {
+    normalized = {
         "image_path": image_path,
         "weights_path": weights_path,
         "target": target,
         "conf": conf_value,
+        "backend": parse_backend(parameters.get("backend")),
+        "roi": parse_roi_field(parameters.get("roi")),
+        "motion_gate": parse_motion_gate_field(parameters.get("motion_gate")),
+        "result_cache": parse_result_cache_field(parameters.get("result_cache")),
+        "targets": parse_targets_field(parameters.get("targets")),
+        "top_k": parse_top_k_field(parameters.get("top_k")),
     }
+    validate_multi_target_options(normalized)
+    return normalized
+
+
+# ───────────────────────────────────────────────
+# 輔助函式區塊：驗證批次推論請求內容
+# ───────────────────────────────────────────────
+def validate_infer_batch_request(parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """驗證批次推論參數；每張影像可覆蓋頂層的 target/conf。"""
+    missing = [field for field in BATCH_REQUIRED_FIELDS if field not in parameters]
+    if missing:
+        raise RunnerError("MISSING_FIELD", f"缺少必填欄位: {', '.join(missing)}")
+
+    weights_path = str(parameters.get("weights_path", "")).strip()
+    if not weights_path:
+        raise RunnerError("INVALID_INPUT", "weights_path 不可為空字串")
+    if not weights_exist(weights_path):
+        raise RunnerError("FILE_NOT_FOUND", f"找不到權重檔案: {weights_path}")
+
+    images_raw = parameters.get("images")
+    if not isinstance(images_raw, list) or not images_raw:
+        raise RunnerError("INVALID_INPUT", "images 必須為非空陣列")
+    if len(images_raw) > MAX_BATCH_SIZE:
+        raise RunnerError("INVALID_INPUT", f"images 數量超過上限 {MAX_BATCH_SIZE}")
+
+    default_target = parse_target(parameters.get("target"))
+    default_conf = parameters.get("conf")
+
+    images = []
+    for index, entry in enumerate(images_raw):
+        # 輸入格式區塊用途：允許直接給路徑字串，或含 image_path/target/conf 的物件
+        item = {"image_path": entry} if isinstance(entry, str) else entry
+        if not isinstance(item, dict):
+            raise RunnerError("INVALID_INPUT", f"images[{index}] 必須為字串或物件")
+        image_path = str(item.get("image_path", "")).strip()
+        if not image_path:
+            raise RunnerError("INVALID_INPUT", f"images[{index}].image_path 不可為空字串")
+        conf_raw = item.get("conf", default_conf)
+        if conf_raw is None:
+            raise RunnerError("MISSING_FIELD", f"images[{index}] 缺少 conf 且未提供預設值")
+        target = parse_target(item["target"]) if "target" in item else default_target
+        images.append({
+            "image_path": image_path,
+            "target": target,
+            "conf": parse_conf(conf_raw),
+        })
+
+    return {
+        "images": images,
+        "weights_path": weights_path,
+        "backend": parse_backend(parameters.get("backend")),
+    }
+
+
+# ───────────────────────────────────────────────
+# 輔助函式區塊：執行批次推論請求
+# ───────────────────────────────────────────────
+def run_infer_batch(parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """驗證參數並執行批次推論，失敗時拋出 RunnerError；單張影像錯誤保留在 results 內。"""
+    normalized = validate_infer_batch_request(parameters)
+
+    try:
+        batch_result = infer_batch(
+            images=normalized["images"],
+            weights_path=normalized["weights_path"],
+            backend=normalized["backend"],
+        )
+    except Exception as exc:
+        raise RunnerError("INFER_FAILED", f"批次推論執行失敗: {exc}") from exc
+
+    if not isinstance(batch_result, dict) or not batch_result.get("ok"):
+        raise RunnerError("INFER_FAILED", "批次推論回傳格式異常或未標示 ok=true")
+
+    return batch_result
+
+
+# ───────────────────────────────────────────────
+# 輔助函式區塊：驗證串流追蹤請求內容
+# ───────────────────────────────────────────────
+def validate_track_request(parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """驗證追蹤參數；來源為 source（影片/攝影機/影格資料夾）或 frames（影格路徑陣列）。"""
+    missing = [field for field in TRACK_REQUIRED_FIELDS if field not in parameters]
+    if missing:
+        raise RunnerError("MISSING_FIELD", f"缺少必填欄位: {', '.join(missing)}")
+
+    weights_path = str(parameters.get("weights_path", "")).strip()
+    if not weights_path:
+        raise RunnerError("INVALID_INPUT", "weights_path 不可為空字串")
+    if not weights_exist(weights_path):
+        raise RunnerError("FILE_NOT_FOUND", f"找不到權重檔案: {weights_path}")
+
+    target = parse_target(parameters.get("target"))
+    if target is None:
+        raise RunnerError("INVALID_INPUT", "追蹤模式必須指定 target")
+
+    frames = parameters.get("frames")
+    source_raw = parameters.get("source")
+    if frames is not None:
+        if not isinstance(frames, list) or not frames or not all(isinstance(item, str) for item in frames):
+            raise RunnerError("INVALID_INPUT", "frames 必須為非空的路徑字串陣列")
+        source: Any = [item.strip() for item in frames]
+    elif source_raw is not None and str(source_raw).strip():
+        source = str(source_raw).strip()
+        if not source.isdigit() and not os.path.exists(source):
+            raise RunnerError("FILE_NOT_FOUND", f"找不到影片來源: {source}")
+    else:
+        raise RunnerError("MISSING_FIELD", "缺少必填欄位: source 或 frames")
+
+    max_frames = parameters.get("max_frames")
+    if max_frames is not None:
+        try:
+            max_frames = int(max_frames)
+        except (TypeError, ValueError) as exc:
+            raise RunnerError("INVALID_INPUT", f"max_frames 不是有效整數: {exc}") from exc
+        if max_frames <= 0:
+            raise RunnerError("INVALID_INPUT", "max_frames 必須大於 0")
+
+    return {
+        "source": source,
+        "weights_path": weights_path,
+        "target": target,
+        "conf": parse_conf(parameters.get("conf")),
+        "tracker": str(parameters.get("tracker") or DEFAULT_TRACKER),
+        "max_frames": max_frames,
+        "backend": parse_backend(parameters.get("backend")),
+    }
+
+
+# ───────────────────────────────────────────────
+# 輔助函式區塊：執行串流追蹤請求（每格輸出一行，最後回傳摘要）
+# ───────────────────────────────────────────────
+def run_track(parameters: Dict[str, Any], emit: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+    """驗證參數並逐格追蹤，失敗時拋出 RunnerError。"""
+    normalized = validate_track_request(parameters)
+
+    try:
+        summary = track_stream(emit=emit, **normalized)
+    except Exception as exc:
+        raise RunnerError("INFER_FAILED", f"追蹤執行失敗: {exc}") from exc
+
+    if not isinstance(summary, dict) or not summary.get("ok"):
+        detail = summary.get("detail") if isinstance(summary, dict) else None
+        code = summary.get("error") if isinstance(summary, dict) else None
+        raise RunnerError(code or "INFER_FAILED", detail or "追蹤回傳格式異常或未標示 ok=true")
+
+    return summary
+
+
+# ───────────────────────────────────────────────
+# 輔助函式區塊：驗證原始影格推論請求內容
+# ───────────────────────────────────────────────
+def validate_frame_request(parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """驗證原始影格推論參數（frame 取代 image_path）。"""
+    missing = [field for field in FRAME_REQUIRED_FIELDS if field not in parameters]
+    if missing:
+        raise RunnerError("MISSING_FIELD", f"缺少必填欄位: {', '.join(missing)}")
+
+    weights_path = str(parameters.get("weights_path", "")).strip()
+    if not weights_path:
+        raise RunnerError("INVALID_INPUT", "weights_path 不可為空字串")
+    if not weights_exist(weights_path):
+        raise RunnerError("FILE_NOT_FOUND", f"找不到權重檔案: {weights_path}")
+
+    normalized = {
+        "frame": parameters.get("frame"),
+        "weights_path": weights_path,
+        "target": parse_target(parameters.get("target")),
+        "conf": parse_conf(parameters.get("conf")),
+        "backend": parse_backend(parameters.get("backend")),
+        "roi": parse_roi_field(parameters.get("roi")),
+        "motion_gate": parse_motion_gate_field(parameters.get("motion_gate")),
+        "targets": parse_targets_field(parameters.get("targets")),
+        "top_k": parse_top_k_field(parameters.get("top_k")),
+    }
+    validate_multi_target_options(normalized)
+    return normalized
+
+
+# ───────────────────────────────────────────────
+# 輔助函式區塊：執行原始影格推論（stdin payload 或 shared memory，不經檔案）
+# ───────────────────────────────────────────────
+def run_infer_frame(parameters: Dict[str, Any], frame_payload: Optional[Any]) -> Dict[str, Any]:
+    """驗證參數並以 ndarray 直接推論，失敗時拋出 RunnerError。
+
+    連續影格幾乎不會逐位元相同，不走結果快取（避免零複製路徑上每格都雜湊整張影像）；重複畫面由 motion_gate 處理。
+    """
+    normalized = validate_frame_request(parameters)
+
+    try:
+        with open_frame(normalized["frame"], frame_payload) as image:
+            if normalized["targets"] is not None:
+                infer_result = infer_image_multi(
+                    image,
+                    weights_path=normalized["weights_path"],
+                    targets=normalized["targets"],
+                    conf=normalized["conf"],
+                    top_k=normalized["top_k"],
+                    backend=normalized["backend"],
+                )
+            else:
+                infer_result = infer_image(
+                    image,
+                    weights_path=normalized["weights_path"],
+                    target=normalized["target"],
+                    conf=normalized["conf"],
+                    backend=normalized["backend"],
+                    roi=normalized["roi"],
+                    motion_gate=normalized["motion_gate"],
+                )
+            del image
+    except FrameInputError as exc:
+        raise RunnerError("INVALID_INPUT", f"影格資料無效: {exc}") from exc
+    except Exception as exc:
+        raise RunnerError("INFER_FAILED", f"推論執行失敗: {exc}") from exc
+
+    if not isinstance(infer_result, dict) or not infer_result.get("ok"):
+        raise RunnerError("INFER_FAILED", "推論回傳格式異常或未標示 ok=true")
+
+    return infer_result
+
+
+# ───────────────────────────────────────────────
+# 輔助函式區塊：執行單筆推論請求
+# ───────────────────────────────────────────────
+def run_infer(
+    parameters: Dict[str, Any],
+    frame_payload: Optional[Any] = None,
+    decoded_image: Optional[Tuple[Any, float]] = None,
+) -> Dict[str, Any]:
+    """驗證參數並執行推論，失敗時拋出 RunnerError；帶 frame 欄位時改走原始影格路徑。
+
+    decoded_image 為常駐管線預先解碼的 (影像, 解碼毫秒)，提供時不再重新讀檔解碼。
+    """
+    if "frame" in parameters or frame_payload is not None:
+        return run_infer_frame(parameters, frame_payload)
+
+    normalized = validate_infer_request(parameters)
+    cache_key, cached = lookup_cached_result(normalized, lambda: hash_file(normalized["image_path"]))
+    if cached is not None:
+        return cached
+
+    try:
+        infer_result = infer(
+            image_path=normalized["image_path"],
+            weights_path=normalized["weights_path"],
+            target=normalized["target"],
+            conf=normalized["conf"],
+            backend=normalized["backend"],
+            roi=normalized["roi"],
+            motion_gate=normalized["motion_gate"],
+            targets=normalized["targets"],
+            top_k=normalized["top_k"],
+            decoded=decoded_image,
+        )
+    except Exception as exc:
+        raise RunnerError("INFER_FAILED", f"推論執行失敗: {exc}") from exc
+
+    if not isinstance(infer_result, dict) or not infer_result.get("ok"):
+        raise RunnerError("INFER_FAILED", "推論回傳格式異常或未標示 ok=true")
+
+    if cache_key is not None:
+        RESULT_CACHE.store(cache_key, infer_result)
+    return infer_result
+
+
+# ───────────────────────────────────────────────
+# 輔助函式區塊：解析 timestamp_ms 欄位
+# ───────────────────────────────────────────────
+def parse_timestamp(timestamp_raw: Any) -> float:
+    """timestamp_ms 為選填欄位（wall clock 毫秒），未提供時使用目前時間。"""
+    if timestamp_raw is None:
+        return now_ms()
+    try:
+        return float(timestamp_raw)
+    except (TypeError, ValueError) as exc:
+        raise RunnerError("INVALID_INPUT", f"timestamp_ms 不是有效數值: {exc}") from exc
+
+
+# ───────────────────────────────────────────────
+# 輔助函式區塊：解析 filter 欄位（Kalman 平滑）
+# ───────────────────────────────────────────────
+def parse_filter_field(filter_raw: Any) -> Optional[Dict[str, Any]]:
+    """filter 為選填欄位：true 使用預設雜訊參數，物件可覆蓋 key 與雜訊設定。"""
+    try:
+        return parse_filter_options(filter_raw)
+    except FilterError as exc:
+        raise RunnerError("INVALID_INPUT", str(exc)) from exc
+
+
+# ───────────────────────────────────────────────
+# 輔助函式區塊：執行推論並以 Kalman 濾波平滑目標中心
+# ───────────────────────────────────────────────
+def run_infer_filtered(
+    parameters: Dict[str, Any],
+    frame_payload: Optional[Any] = None,
+    decoded_image: Optional[Tuple[Any, float]] = None,
+) -> Dict[str, Any]:
+    """未帶 filter 時與 run_infer 相同；帶 filter 時附上 filtered（平滑位置與速度）。"""
+    filter_options = parse_filter_field(parameters.get("filter"))
+    if filter_options is not None and parameters.get("targets") is not None:
+        raise RunnerError("INVALID_INPUT", "targets 不可與 filter 同時使用")
+    timestamp_ms = parse_timestamp(parameters.get("timestamp_ms"))
+    infer_result = run_infer(parameters, frame_payload, decoded_image)
+    if filter_options is None:
+        return infer_result
+
+    # 濾波更新區塊用途：只有實際推論命中才算新量測；變動閘門沿用的結果只做外插
+    if infer_result.get("found") and not infer_result.get("cached"):
+        infer_result["filtered"] = TRACK_FILTERS.update(filter_options, infer_result["center"], timestamp_ms)
+    else:
+        infer_result["filtered"] = TRACK_FILTERS.predict(filter_options["key"], timestamp_ms)
+    return infer_result
+
+
+# ───────────────────────────────────────────────
+# 輔助函式區塊：不執行模型，外插指定時間的目標位置
+# ───────────────────────────────────────────────
+def run_predict(parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """依 key 取出濾波器並外插到 timestamp_ms；尚無量測時拋出 NO_TRACK。"""
+    key = str(parameters.get("key") or "default")
+    prediction = TRACK_FILTERS.predict(key, parse_timestamp(parameters.get("timestamp_ms")))
+    if prediction is None:
+        raise RunnerError("NO_TRACK", f"尚無目標量測可供預測: {key}")
+    return {"ok": True, "key": key, **prediction}
+
+
+# ───────────────────────────────────────────────
+# 輔助函式區塊：依 op 分派請求（單次與常駐模式共用）
+# ───────────────────────────────────────────────
+def dispatch_request(
+    payload: Dict[str, Any],
+    emit: Callable[[Dict[str, Any]], None] = emit_stdout,
+    frame_payload: Optional[Any] = None,
+    decoded_image: Optional[Tuple[Any, float]] = None,
+) -> Dict[str, Any]:
+    """正規化請求並依 op 執行對應操作；串流型操作透過 emit 輸出中間結果。"""
+    op, parameters = normalize_request(payload)
+    if op == "infer":
+        return run_infer_filtered(parameters, frame_payload, decoded_image)
+    if op == "infer_batch":
+        return run_infer_batch(parameters)
+    if op == "track":
+        return run_track(parameters, emit)
+    if op == "predict":
+        return run_predict(parameters)
+    if op == "reset_filter":
+        TRACK_FILTERS.reset(str(parameters["key"]) if parameters.get("key") else None)
+        return {"ok": True}
+    if op == "cache_stats":
+        return {"ok": True, **RESULT_CACHE.stats()}
+    if op == "clear_cache":
+        RESULT_CACHE.clear()
+        return {"ok": True}
+    if op == "ping":
+        return {"ok": True, "pong": True}
+    raise RunnerError("UNSUPPORTED_OP", f"不支援的操作: {op}")
+
+
+# ───────────────────────────────────────────────
+# 常駐模式區塊：處理單一請求並輸出帶 id 的回應（JSON 行與二進位模式共用）
+# ───────────────────────────────────────────────
+def handle_serve_request(
+    payload: Any,
+    frame_payload: Optional[Any] = None,
+    decoded_image: Optional[Tuple[Any, float]] = None,
+    emit: Callable[[Dict[str, Any]], None] = emit_stdout,
+) -> bool:
+    """處理一筆常駐模式請求並透過 emit 輸出回應；回傳 False 代表收到 shutdown。"""
+    started = time.perf_counter()
+    request_id: Optional[Any] = None
+    try:
+        if not isinstance(payload, dict):
+            raise RunnerError("INVALID_INPUT", "請求必須為 JSON 物件")
+        request_id = payload.pop("id", None)
+        if is_shutdown_request(payload):
+            emit({"id": request_id, "ok": True, "elapsed_ms": elapsed_ms(started)})
+            return False
+
+        # 串流輸出區塊用途：追蹤等逐格輸出的結果同樣帶回請求 id
+        def emit_with_id(record: Dict[str, Any]) -> None:
+            emit({**record, "id": request_id})
+
+        response = dict(dispatch_request(payload, emit_with_id, frame_payload, decoded_image))
+    except RunnerError as exc:
+        response = build_error_response(exc.code, exc.detail)
+        emit_stderr(f"[iotVisionTurret] {exc.code}: {exc.detail}")
+    except Exception as exc:
+        response = build_error_response("UNEXPECTED_ERROR", f"未預期錯誤: {exc}")
+        emit_stderr("[iotVisionTurret] 未預期例外發生，以下為 traceback:")
+        emit_stderr(traceback.format_exc())
+    response["id"] = request_id
+    response["elapsed_ms"] = elapsed_ms(started)
+    emit(response)
+    return True
+
+
+# ───────────────────────────────────────────────
+# 常駐模式區塊：判斷是否為 shutdown 請求
+# ───────────────────────────────────────────────
+def is_shutdown_request(payload: Any) -> bool:
+    """op 或 action 為 shutdown。"""
+    return isinstance(payload, dict) and (payload.get("op") or payload.get("action")) == "shutdown"
+
+
+# ───────────────────────────────────────────────
+# 常駐管線區塊：解碼階段（在執行緒池中預先解碼 image_path）
+# ───────────────────────────────────────────────
+def prepare_serve_request(request: Tuple[Any, Optional[Any]]) -> Optional[Tuple[Any, float]]:
+    """只對帶 image_path 的 infer 請求預先解碼；其他請求或解碼失敗時回傳 None，由推論階段照原流程處理並回報錯誤。"""
+    payload, frame_payload = request
+    if not isinstance(payload, dict) or frame_payload is not None:
+        return None
+    try:
+        op, parameters = normalize_request(payload)
+    except RunnerError:
+        return None
+    image_path = str(parameters.get("image_path") or "").strip()
+    if op != "infer" or "frame" in parameters or not image_path or not os.path.isfile(image_path):
+        return None
+    try:
+        started = time.perf_counter()
+        image = load_image(image_path)
+    except Exception:
+        return None
+    return image, elapsed_ms(started)
+
+
+# ───────────────────────────────────────────────
+# 常駐管線區塊：推論階段（單一執行緒依序處理，模型與濾波狀態不需加鎖）
+# ───────────────────────────────────────────────
+def process_serve_request(
+    request: Tuple[Any, Optional[Any]],
+    decoded_image: Optional[Tuple[Any, float]],
+    emit: Callable[[Dict[str, Any]], None],
+) -> None:
+    """將預先解碼的影像交給 handle_serve_request，回應交由輸出階段序列化。"""
+    payload, frame_payload = request
+    handle_serve_request(payload, frame_payload, decoded_image, emit)
+
+
+# ───────────────────────────────────────────────
+# 常駐管線區塊：建立管線（depth 為 0 時回傳 None，維持逐筆處理）
+# ───────────────────────────────────────────────
+def start_serve_pipeline(depth: int, workers: int) -> Optional[OrderedPipeline]:
+    """解碼、推論與輸出分屬不同執行緒，以有界佇列串接並依請求順序輸出。"""
+    if depth <= 0:
+        return None
+    return OrderedPipeline(prepare_serve_request, process_serve_request, emit_stdout, depth, workers)
+
+
+# ───────────────────────────────────────────────
+# 常駐管線區塊：提交一筆請求
+# ───────────────────────────────────────────────
+def submit_serve_request(pipeline: Optional[OrderedPipeline], payload: Any, frame_payload: Optional[Any] = None) -> bool:
+    """未啟用管線時直接處理；回傳 False 代表收到 shutdown，讀取端應停止讀取。"""
+    if pipeline is None:
+        return handle_serve_request(payload, frame_payload)
+    pipeline.submit((payload, frame_payload))
+    return not is_shutdown_request(payload)
+
+
+# ───────────────────────────────────────────────
+# 常駐模式區塊：逐行讀取 stdin JSON 請求，依 id 逐行回應
+# ───────────────────────────────────────────────
+def serve(pipeline_depth: int = 0, decode_workers: int = 1) -> None:
+    """常駐模式入口：每行一個請求，模型快取跨請求共用，stdin EOF 或 op=shutdown 時結束。"""
+    sys.stdout = sys.stderr
+    pipeline = start_serve_pipeline(pipeline_depth, decode_workers)
+    # 協議錯誤輸出區塊用途：管線啟用時同樣依序輸出，不插隊到先前請求之前
+    respond = pipeline.emit if pipeline is not None else emit_stdout
+    try:
+        for line in sys.stdin:
+            raw = line.strip()
+            if not raw:
+                continue
+            try:
+                payload = json.loads(raw)
+            except json.JSONDecodeError as exc:
+                emit_stderr(f"[iotVisionTurret] INVALID_INPUT: JSON 解析失敗: {exc}")
+                respond(build_error_response("INVALID_INPUT", f"JSON 解析失敗: {exc}") | {"id": None})
+                continue
+            if not submit_serve_request(pipeline, payload):
+                break
+    finally:
+        if pipeline is not None:
+            pipeline.close()
+        close_shared_frames()
+
+
+# ───────────────────────────────────────────────
+# 輔助函式區塊：從二進位串流讀取固定長度資料
+# ───────────────────────────────────────────────
+def read_exact(stream: Any, size: int) -> Optional[bytearray]:
+    """讀滿 size bytes，EOF 時回傳 None。使用 readinto 直接寫入預先配置的 buffer。"""
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    filled = 0
+    while filled < size:
+        count = stream.readinto(view[filled:])
+        if not count:
+            return None
+        filled += count
+    return buffer
+
+
+# ───────────────────────────────────────────────
+# 常駐模式區塊：二進位 frame 協議（長度前綴 + JSON header + 原始影格 payload）
+# ───────────────────────────────────────────────
+def serve_binary(pipeline_depth: int = 0, decode_workers: int = 1) -> None:
+    """二進位常駐模式：每筆請求為 4-byte big-endian header 長度 + JSON header + payload_bytes 的原始影格。"""
+    stream = sys.stdin.buffer
+    sys.stdout = sys.stderr
+    pipeline = start_serve_pipeline(pipeline_depth, decode_workers)
+    try:
+        serve_binary_stream(stream, pipeline)
+    finally:
+        if pipeline is not None:
+            pipeline.close()
+        close_shared_frames()
+
+
+# ───────────────────────────────────────────────
+# 常駐模式區塊：逐筆讀取二進位請求並提交處理
+# ───────────────────────────────────────────────
+def serve_binary_stream(stream: Any, pipeline: Optional[OrderedPipeline]) -> None:
+    """讀取直到 EOF、shutdown 或協議錯誤；協議錯誤同樣經由管線依序輸出。"""
+    respond = pipeline.emit if pipeline is not None else emit_stdout
+    while True:
+        prefix = read_exact(stream, 4)
+        if prefix is None:
+            break
+        (header_len,) = struct.unpack(">I", prefix)
+        if header_len <= 0 or header_len > MAX_BINARY_HEADER_BYTES:
+            # 協議錯誤區塊用途：長度前綴錯誤時無法重新對齊，直接結束讓呼叫端重啟
+            emit_stderr(f"[iotVisionTurret] INVALID_INPUT: header 長度異常 ({header_len})")
+            respond(build_error_response("INVALID_INPUT", f"header 長度異常 ({header_len})") | {"id": None})
+            break
+        header_raw = read_exact(stream, header_len)
+        if header_raw is None:
+            break
+        try:
+            payload = json.loads(header_raw.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+            emit_stderr(f"[iotVisionTurret] INVALID_INPUT: header JSON 解析失敗: {exc}")
+            respond(build_error_response("INVALID_INPUT", f"header JSON 解析失敗: {exc}") | {"id": None})
+            continue
+
+        # payload 讀取區塊用途：即使 header 內容有誤也要讀完 payload，維持串流對齊
+        payload_bytes = payload.get("payload_bytes", 0) if isinstance(payload, dict) else 0
+        if not isinstance(payload_bytes, int) or payload_bytes < 0 or payload_bytes > MAX_BINARY_PAYLOAD_BYTES:
+            emit_stderr(f"[iotVisionTurret] INVALID_INPUT: payload_bytes 異常 ({payload_bytes})")
+            respond(build_error_response("INVALID_INPUT", f"payload_bytes 異常 ({payload_bytes})") | {"id": None})
+            break
+        frame_payload = read_exact(stream, payload_bytes) if payload_bytes else None
+        if payload_bytes and frame_payload is None:
+            break
+        if isinstance(payload, dict):
+            payload.pop("payload_bytes", None)
+        if not submit_serve_request(pipeline, payload, frame_payload):
+            break
 
 
 # ───────────────────────────────────────────────
@@ -188,26 +938,7 @@ def main() -> None:
 
     try:
         payload = read_stdin_payload()
-        op, parameters = normalize_request(payload)
-        if op != "infer":
-            raise RunnerError("UNSUPPORTED_OP", f"不支援的操作: {op}")
-
-        normalized = validate_infer_request(parameters)
-
-        try:
-            infer_result = infer(
-                image_path=normalized["image_path"],
-                weights_path=normalized["weights_path"],
-                target=normalized["target"],
-                conf=normalized["conf"],
-            )
-        except Exception as exc:
-            raise RunnerError("INFER_FAILED", f"推論執行失敗: {exc}") from exc
-
-        if not isinstance(infer_result, dict) or not infer_result.get("ok"):
-            raise RunnerError("INFER_FAILED", "推論回傳格式異常或未標示 ok=true")
-
-        response = infer_result
+        response = dispatch_request(payload)
     except RunnerError as exc:
         response = build_error_response(exc.code, exc.detail)
         emit_stderr(f"[iotVisionTurret] {exc.code}: {exc.detail}")
@@ -222,6 +953,29 @@ def main() -> None:
     sys.exit(exit_code)
 
 
+# ───────────────────────────────────────────────
+# 函式區塊用途：解析命令列參數
+# ───────────────────────────────────────────────
+def parse_args() -> argparse.Namespace:
+    """解析 runner 參數。"""
+    parser = argparse.ArgumentParser(description="iotVisionTurret Python runner")
+    # 參數說明區塊：啟用常駐模式（stdin 每行一個 JSON 請求）
+    parser.add_argument("--serve", action="store_true", help="常駐模式，逐行處理帶 id 的 JSON 請求")
+    # 參數說明區塊：常駐模式改用二進位 frame 協議（可附帶原始影格 payload）
+    parser.add_argument("--binary", action="store_true", help="搭配 --serve，stdin 改為長度前綴的二進位 frame 協議")
+    # 參數說明區塊：常駐管線深度（0 停用，逐筆處理）與解碼執行緒數
+    parser.add_argument("--pipeline-depth", type=int, default=None, help="常駐模式管線深度，0 代表逐筆處理（預設 YOLO_PIPELINE_DEPTH 或 0，建議啟用時設為 2）")
+    parser.add_argument("--decode-workers", type=int, default=None, help="常駐管線的解碼執行緒數（預設 YOLO_DECODE_WORKERS 或 2）")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
     # 函式區塊用途：提供可直接執行的 runner 入口
-    main()
+    cli_args = parse_args()
+    depth, workers = resolve_pipeline_options(cli_args.pipeline_depth, cli_args.decode_workers)
+    if cli_args.serve and cli_args.binary:
+        serve_binary(depth, workers)
+    elif cli_args.serve:
+        serve(depth, workers)
+    else:
+        main()
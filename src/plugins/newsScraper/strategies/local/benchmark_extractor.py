@@ -0,0 +1,80 @@
+# src/plugins/newsScraper/strategies/local/benchmark_extractor.py
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+try:
+    from .extractor import extract_article_text, extract_article_text_bs4
+except ImportError:
+    # 直接以腳本執行時改用同目錄匯入
+    from extractor import extract_article_text, extract_article_text_bs4
+
+
+def collect_pages(paths: List[str]) -> List[Path]:
+    """
+    展開輸入路徑：目錄取其中的 .html / .htm 檔案。
+    """
+    pages: List[Path] = []
+    for raw_path in paths:
+        path = Path(raw_path)
+        if path.is_dir():
+            pages.extend(sorted(p for p in path.iterdir() if p.suffix.lower() in (".html", ".htm")))
+        elif path.is_file():
+            pages.append(path)
+    return pages
+
+
+def time_extractor(extract: Callable[[str], str], html_text: str, repeat: int) -> float:
+    """
+    回傳 repeat 次中位數耗時（毫秒）。
+    """
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        extract(html_text)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比較 BeautifulSoup 與 lxml 文章擷取的耗時與輸出")
+    parser.add_argument("paths", nargs="+", help="已儲存的 HTML 檔案或目錄")
+    parser.add_argument("--repeat", type=int, default=5, help="每頁重複次數，取中位數")
+    args = parser.parse_args()
+
+    pages = collect_pages(args.paths)
+    if not pages:
+        print("No HTML pages found.", file=sys.stderr)
+        sys.exit(1)
+
+    repeat = max(1, args.repeat)
+    total_bs4 = 0.0
+    total_lxml = 0.0
+    mismatches = []
+    print(f"{'page':<40} {'size_kb':>8} {'bs4_ms':>9} {'lxml_ms':>9} {'speedup':>8}  same")
+    for page in pages:
+        html_text = page.read_text(encoding="utf-8", errors="replace")
+        same = extract_article_text_bs4(html_text) == extract_article_text(html_text)
+        if not same:
+            mismatches.append(page.name)
+        bs4_ms = time_extractor(extract_article_text_bs4, html_text, repeat)
+        lxml_ms = time_extractor(extract_article_text, html_text, repeat)
+        total_bs4 += bs4_ms
+        total_lxml += lxml_ms
+        speedup = bs4_ms / lxml_ms if lxml_ms > 0 else float("inf")
+        print(
+            f"{page.name[:40]:<40} {len(html_text) / 1024:>8.1f} {bs4_ms:>9.2f} {lxml_ms:>9.2f} {speedup:>7.1f}x  {'yes' if same else 'NO'}"
+        )
+
+    overall = total_bs4 / total_lxml if total_lxml > 0 else float("inf")
+    print(f"total: bs4={total_bs4:.2f}ms lxml={total_lxml:.2f}ms speedup={overall:.1f}x pages={len(pages)}")
+    if mismatches:
+        print(f"mismatched: {', '.join(mismatches)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# src/plugins/newsScraper/strategies/local/extractor.py
+from typing import Iterator
+
+import lxml.html
+from bs4 import BeautifulSoup
+from lxml import etree
+
+# 這些元素內的文字不屬於正文（與 BeautifulSoup get_text 的預設行為一致）
+SKIPPED_TEXT_TAGS = frozenset({"script", "style", "template"})
+
+
+def extract_article_text_bs4(html_text: str) -> str:
+    """
+    原始實作：建立完整的 BeautifulSoup 樹，優先提取 article 標籤內的段落。
+    """
+    soup = BeautifulSoup(html_text, 'lxml')
+    article_body = soup.find('article')
+    if not article_body:
+        article_body = soup
+    paragraphs = article_body.find_all('p')
+    cleaned_text = '\n'.join([p.get_text(strip=True) for p in paragraphs])
+    return cleaned_text
+
+
+def extract_article_text(html_text: str) -> str:
+    """
+    直接以 lxml 解析並走訪 article / p 節點，不建立 BeautifulSoup 物件樹；輸出與 extract_article_text_bs4 相同。
+    """
+    root = _parse_html(html_text)
+    if root is None:
+        return ""
+    article_body = next(root.iter('article'), root)
+    return '\n'.join(_paragraph_text(p) for p in article_body.iter('p'))
+
+
+def _parse_html(html_text: str):
+    """
+    以 UTF-8 位元組餵給 parser，避免含 encoding 宣告的字串被 lxml 拒絕；空白文件回傳 None。
+    """
+    if not html_text or not html_text.strip():
+        return None
+    parser = lxml.html.HTMLParser(encoding='utf-8')
+    try:
+        return lxml.html.document_fromstring(html_text.encode('utf-8', errors='replace'), parser=parser)
+    except etree.ParserError:
+        return None
+
+
+def _paragraph_text(paragraph) -> str:
+    """
+    等同 get_text(strip=True)：逐段文字 strip 後去掉空字串再串接。
+    位於 template 等子樹內的段落在 BeautifulSoup 中沒有可見文字，同樣回傳空字串以維持行數一致。
+    """
+    if next(paragraph.iterancestors(*SKIPPED_TEXT_TAGS), None) is not None:
+        return ''
+    return ''.join(fragment for fragment in (part.strip() for part in _iter_text(paragraph, root=True)) if fragment)
+
+
+def _iter_text(element, root: bool = False) -> Iterator[str]:
+    """
+    依文件順序產生元素內的文字；跳過 script/style 子樹與註解內容，但保留其後的 tail 文字。
+    """
+    if isinstance(element.tag, str) and element.tag not in SKIPPED_TEXT_TAGS:
+        if element.text:
+            yield element.text
+        for child in element:
+            yield from _iter_text(child)
+    if not root and element.tail:
+        yield element.tail
+
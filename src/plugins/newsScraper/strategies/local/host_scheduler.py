@@ -0,0 +1,208 @@
+# src/plugins/newsScraper/strategies/local/host_scheduler.py
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_HOST_RATE = float(os.environ.get("NEWS_SCRAPER_HOST_RATE", "2"))
+DEFAULT_HOST_BURST = float(os.environ.get("NEWS_SCRAPER_HOST_BURST", "4"))
+DEFAULT_HOST_CONCURRENCY = int(os.environ.get("NEWS_SCRAPER_HOST_CONCURRENCY", "2"))
+
+
+class SchedulerTimeout(requests.exceptions.Timeout):
+    """
+    等待主機連線名額或權杖的時間超過請求的 timeout。
+    """
+
+
+def parse_retry_after(retry_after: Optional[str]) -> Optional[float]:
+    """
+    解析 Retry-After（秒數或 HTTP 日期），回傳需等待的秒數；無法解析時回傳 None。
+    """
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        try:
+            retry_time = parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            return None
+        if retry_time.tzinfo is None:
+            retry_time = retry_time.replace(tzinfo=timezone.utc)
+        return max(0.0, retry_time.timestamp() - time.time())
+
+
+class TokenBucket:
+    """
+    單一主機的權杖桶：每秒補充 rate 個權杖，最多累積 capacity 個；blocked_until 之前不發放權杖。
+    呼叫端需自行加鎖。
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = max(rate, 1e-6)
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def try_acquire(self, now: float) -> float:
+        """
+        取得一個權杖時回傳 0；否則回傳建議等待秒數（不扣權杖）。
+        """
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+    def block(self, now: float, seconds: float) -> None:
+        """
+        暫停發放權杖，恢復後從空桶開始補充，避免冷卻結束瞬間一次送出整批請求。
+        """
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = 0.0
+        self.updated = self.blocked_until
+
+
+class HostScheduler:
+    """
+    進程內的每主機禮貌排程器。
+    - 每個主機各有一個權杖桶（rate/burst）與同時連線上限，不同主機互不影響。
+    - 429/503 回應（含 Retry-After）只暫停該主機的權杖桶；暫停秒數上限為 penalty_seconds × MAX_PENALTY_FACTOR，
+      避免異常的 Retry-After 讓持有連線名額的工作執行緒長時間停住。
+    - externally_penalized_hosts 的冷卻由呼叫端自行處理（例如搜尋 API 的 BionicDispatcher），observe 不再重複懲罰。
+    """
+
+    PENALTY_STATUS_CODES = (429, 503)
+    DEFAULT_PENALTY_SECONDS = 30.0
+    MAX_PENALTY_FACTOR = 4.0
+
+    def __init__(
+        self,
+        rate_per_host: float = DEFAULT_HOST_RATE,
+        burst: float = DEFAULT_HOST_BURST,
+        max_per_host: int = DEFAULT_HOST_CONCURRENCY,
+        penalty_seconds: float = DEFAULT_PENALTY_SECONDS,
+        externally_penalized_hosts: Iterable[str] = (),
+    ):
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.max_per_host = max(1, max_per_host)
+        self.penalty_seconds = penalty_seconds
+        self.max_penalty_seconds = penalty_seconds * self.MAX_PENALTY_FACTOR
+        self.externally_penalized_hosts = {host.lower() for host in externally_penalized_hosts if host}
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+
+    @contextmanager
+    def slot(self, url: str, timeout: Optional[float] = None) -> Iterator[None]:
+        """
+        取得該主機的連線名額與權杖後才執行區塊內的請求。
+        提供 timeout 時，等待超過 timeout 秒（或預估等待已超過剩餘時間）即拋出 SchedulerTimeout。
+        """
+        host = self._host(url)
+        deadline = None if timeout is None else time.monotonic() + max(0.0, timeout)
+        semaphore = self._host_state(host)[1]
+        if not semaphore.acquire(timeout=self._remaining(deadline)):
+            raise SchedulerTimeout(f"Timed out after {timeout}s waiting for a connection slot to {host}")
+        try:
+            self._wait_for_token(host, deadline, timeout)
+            yield
+        finally:
+            semaphore.release()
+
+    def penalize(self, url: str, seconds: Optional[float] = None) -> None:
+        bucket = self._host_state(self._host(url))[0]
+        penalty = self.penalty_seconds if seconds is None else min(seconds, self.max_penalty_seconds)
+        with self._lock:
+            bucket.block(time.monotonic(), penalty)
+
+    def observe(self, url: str, status_code: int, retry_after: Optional[str] = None) -> None:
+        """
+        依回應調整該主機的權杖桶；Retry-After 優先於預設懲罰秒數。
+        """
+        if status_code in self.PENALTY_STATUS_CODES and self._host(url) not in self.externally_penalized_hosts:
+            self.penalize(url, parse_retry_after(retry_after))
+
+    def _wait_for_token(self, host: str, deadline: Optional[float], timeout: Optional[float]) -> None:
+        bucket = self._host_state(host)[0]
+        while True:
+            with self._lock:
+                wait_seconds = bucket.try_acquire(time.monotonic())
+            if wait_seconds <= 0:
+                return
+            remaining = self._remaining(deadline)
+            if remaining is not None and wait_seconds > remaining:
+                # 預估等待已超過剩餘時間時立即放棄，不佔著連線名額空等
+                raise SchedulerTimeout(f"Timed out after {timeout}s waiting for a request token to {host}")
+            # 分段睡眠：等待期間若收到懲罰，下一輪會改用新的恢復時間
+            time.sleep(min(wait_seconds, 1.0))
+
+    @staticmethod
+    def _remaining(deadline: Optional[float]) -> Optional[float]:
+        return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+    def _host_state(self, host: str):
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.rate_per_host, self.burst)
+                self._buckets[host] = bucket
+                self._slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return bucket, self._slots[host]
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return (urlparse(url).hostname or "").lower()
+
+
+class ScheduledAdapter(HTTPAdapter):
+    """
+    每次實際送出請求前經過 HostScheduler（重新導向的每一跳同樣排程），並以回應狀態回饋該主機的權杖桶。
+    排隊等待計入請求的 timeout：等待超過 timeout（tuple 時為連線 timeout）拋出 SchedulerTimeout，
+    實際送出時只給剩餘的時間。
+    """
+
+    def __init__(self, scheduler: HostScheduler, **kwargs):
+        self.scheduler = scheduler
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        timeout = kwargs.get("timeout")
+        wait_budget = self._wait_budget(timeout)
+        started = time.monotonic()
+        with self.scheduler.slot(request.url, wait_budget):
+            if isinstance(timeout, (int, float)):
+                kwargs["timeout"] = max(timeout - (time.monotonic() - started), 0.001)
+            response = super().send(request, **kwargs)
+        self.scheduler.observe(request.url, response.status_code, response.headers.get("Retry-After"))
+        return response
+
+    @staticmethod
+    def _wait_budget(timeout: Union[None, float, Tuple[Optional[float], Optional[float]]]) -> Optional[float]:
+        if isinstance(timeout, tuple):
+            timeout = timeout[0]
+        return float(timeout) if isinstance(timeout, (int, float)) else None
+
+
+def build_scheduled_session(scheduler: HostScheduler, pool_size: int = 10) -> requests.Session:
+    """
+    建立所有請求都經過 scheduler 的 Session；連線池大小與呼叫端的並行上限一致。
+    """
+    session = requests.Session()
+    adapter = ScheduledAdapter(scheduler, pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
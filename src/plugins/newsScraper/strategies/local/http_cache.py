@@ -0,0 +1,259 @@
+# src/plugins/newsScraper/strategies/local/http_cache.py
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+import requests
+from filelock import FileLock
+
+
+@dataclass
+class CachedResponse:
+    """
+    快取層回傳的回應；cache_status 為 fresh / revalidated / miss / bypass。
+    """
+    url: str
+    content: bytes
+    encoding: Optional[str]
+    cache_status: str
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+class HttpCache:
+    """
+    跨進程共用的 HTTP 快取。
+    - 內文以 SHA-256 命名並以 zlib 壓縮保存，相同內容（例如轉載文章）只存一份。
+    - TTL 內直接回傳；過期後帶 If-None-Match / If-Modified-Since 重新驗證，304 時沿用本地內文。
+    - 壓縮後總大小超過上限時，依最後存取時間淘汰最舊的項目。
+    - 索引保留在記憶體，只有檔案被其他進程改寫時才重新解析；命中時的最後存取時間先暫存，
+      於下一次寫入索引或 flush() 時一併寫回，命中不必整份改寫索引。
+    """
+
+    INDEX_FILE = "index.json"
+    BODY_DIR = "bodies"
+    COMPRESSION_LEVEL = 6
+    DEFAULT_TTL_SECONDS = 300.0
+    DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.body_dir = self.cache_dir / self.BODY_DIR
+        self.body_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.cache_dir / self.INDEX_FILE
+        self.ttl_seconds = max(0.0, ttl_seconds)
+        self.max_bytes = max(0, max_bytes)
+        # FileLock 保護跨進程的索引讀寫；threading.Lock 保護同進程內的並行抓取
+        self._file_lock = FileLock(str(self.cache_dir / ".lock"))
+        self._thread_lock = threading.Lock()
+        self._index: Optional[Dict[str, Dict]] = None
+        self._index_signature: Optional[Tuple[int, int, int]] = None
+        self._pending_access: Dict[str, float] = {}
+
+    def fetch(self, session: requests.Session, url: str, timeout: float) -> CachedResponse:
+        entry = self._read_index().get(url)
+        body = self._read_body(entry["digest"]) if entry else None
+        if entry is not None and body is not None:
+            if time.time() - entry.get("fetched_at", 0.0) < self.ttl_seconds:
+                self._record_access(url)
+                return CachedResponse(url, body, entry.get("encoding"), "fresh")
+
+        conditional_headers = self._conditional_headers(entry) if body is not None else {}
+        response = session.get(url, headers=conditional_headers, timeout=timeout)
+        if response.status_code == 304 and body is not None:
+            self._update_index(lambda index: self._mark_revalidated(index, url, response))
+            return CachedResponse(url, body, entry.get("encoding"), "revalidated")
+
+        response.raise_for_status()
+        content = response.content
+        encoding = response.encoding or response.apparent_encoding
+        if self._is_storable(response):
+            self._store(url, response, content, encoding)
+        return CachedResponse(url, content, encoding, "miss")
+
+    def _store(self, url: str, response: requests.Response, content: bytes, encoding: Optional[str]) -> None:
+        digest = hashlib.sha256(content).hexdigest()
+        stored_size = self._write_body(digest, content)
+        now = time.time()
+        entry = {
+            "digest": digest,
+            "size": stored_size,
+            "encoding": encoding,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": now,
+            "last_access": now,
+        }
+
+        def apply(index: Dict[str, Dict]) -> None:
+            previous = index.get(url)
+            index[url] = entry
+            # 取代舊項目時，舊內文若已無其他項目引用就刪除，否則不會被淘汰也不計入容量
+            if previous is not None:
+                self._unlink_unreferenced(index, previous["digest"])
+            self._evict(index)
+
+        self._update_index(apply)
+
+    def _evict(self, index: Dict[str, Dict]) -> None:
+        """
+        依 last_access 由舊到新淘汰，直到壓縮後總大小低於上限；不再被引用的內文一併刪除。
+        """
+        sizes = {entry["digest"]: entry.get("size", 0) for entry in index.values()}
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+        for url in sorted(index, key=lambda key: index[key].get("last_access", 0.0)):
+            if total <= self.max_bytes:
+                break
+            digest = index.pop(url)["digest"]
+            if self._unlink_unreferenced(index, digest):
+                total -= sizes[digest]
+
+    def _unlink_unreferenced(self, index: Dict[str, Dict], digest: str) -> bool:
+        """
+        內文已無任何項目引用時刪除檔案，回傳是否已刪除。
+        """
+        if any(entry["digest"] == digest for entry in index.values()):
+            return False
+        self._body_path(digest).unlink(missing_ok=True)
+        return True
+
+    def flush(self) -> None:
+        """
+        寫回暫存的最後存取時間；抓取結束時呼叫一次。
+        """
+        with self._thread_lock:
+            if not self._pending_access:
+                return
+        self._update_index(lambda index: None)
+
+    def _record_access(self, url: str) -> None:
+        with self._thread_lock:
+            self._pending_access[url] = time.time()
+
+    def _apply_pending_access(self, index: Dict[str, Dict]) -> None:
+        """
+        呼叫端需持有 _thread_lock。
+        """
+        for url, accessed_at in self._pending_access.items():
+            if url in index:
+                index[url]["last_access"] = max(index[url].get("last_access", 0.0), accessed_at)
+        self._pending_access.clear()
+
+    @staticmethod
+    def _mark_revalidated(index: Dict[str, Dict], url: str, response: requests.Response) -> None:
+        entry = index.get(url)
+        if entry is None:
+            return
+        now = time.time()
+        entry["fetched_at"] = now
+        entry["last_access"] = now
+        # 304 可能帶新的驗證器，有的話更新
+        entry["etag"] = response.headers.get("ETag") or entry.get("etag")
+        entry["last_modified"] = response.headers.get("Last-Modified") or entry.get("last_modified")
+
+    @staticmethod
+    def _conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if not entry:
+            return headers
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    @staticmethod
+    def _is_storable(response: requests.Response) -> bool:
+        cache_control = response.headers.get("Cache-Control", "").lower()
+        return response.status_code == 200 and "no-store" not in cache_control
+
+    def _body_path(self, digest: str) -> Path:
+        return self.body_dir / digest[:2] / f"{digest}.zz"
+
+    def _read_body(self, digest: str) -> Optional[bytes]:
+        try:
+            return zlib.decompress(self._body_path(digest).read_bytes())
+        except (OSError, zlib.error):
+            return None
+
+    def _write_body(self, digest: str, content: bytes) -> int:
+        path = self._body_path(digest)
+        if path.exists():
+            return path.stat().st_size
+        path.parent.mkdir(parents=True, exist_ok=True)
+        compressed = zlib.compress(content, self.COMPRESSION_LEVEL)
+        temp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        temp_path.write_bytes(compressed)
+        os.replace(temp_path, path)
+        return len(compressed)
+
+    def _read_index(self) -> Dict[str, Dict]:
+        """
+        回傳記憶體中的索引（唯讀）；索引檔未被改寫時不重新解析。
+        """
+        with self._thread_lock:
+            if self._index is None or self._index_file_signature() != self._index_signature:
+                with self._file_lock:
+                    self._index = self._load_index()
+                    self._index_signature = self._index_file_signature()
+            return self._index
+
+    def _update_index(self, mutate: Callable[[Dict[str, Dict]], None]) -> None:
+        """
+        在副本上套用變更後整份寫回；不就地修改 _read_index 已交出的索引，其他執行緒可安全讀取。
+        """
+        with self._thread_lock, self._file_lock:
+            if self._index is not None and self._index_file_signature() == self._index_signature:
+                index = {url: dict(entry) for url, entry in self._index.items()}
+            else:
+                index = self._load_index()
+            self._apply_pending_access(index)
+            mutate(index)
+            temp_path = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+            temp_path.write_text(json.dumps(index, ensure_ascii=False), encoding="utf-8")
+            os.replace(temp_path, self.index_path)
+            self._index = index
+            self._index_signature = self._index_file_signature()
+
+    def _index_file_signature(self) -> Optional[Tuple[int, int, int]]:
+        """
+        索引以 os.replace 整份替換，inode、修改時間與大小任一改變即代表已被改寫。
+        """
+        try:
+            stat = self.index_path.stat()
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _load_index(self) -> Dict[str, Dict]:
+        if not self.index_path.exists():
+            return {}
+        try:
+            index = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return index if isinstance(index, dict) else {}
+
+
+def fetch_uncached(session: requests.Session, url: str, timeout: float) -> CachedResponse:
+    """
+    停用快取時的抓取路徑，回傳格式與 HttpCache.fetch 相同。
+    """
+    response = session.get(url, timeout=timeout)
+    response.raise_for_status()
+    return CachedResponse(url, response.content, response.encoding or response.apparent_encoding, "bypass")
@@ -7,8 +7,6 @@ import random
 import sys
 import tempfile
 import time
-from datetime import timezone
-from email.utils import parsedate_to_datetime
 from abc import ABC, abstractmethod
 from collections import Counter
 from enum import Enum
@@ -26,6 +24,7 @@ from tavily import TavilyClient
 
 from .data_models import ResearcherOutput, ResearcherResult, SearchItem
 from .evaluator import ContentEvaluator, EvaluationResultExtended
+from .host_scheduler import HostScheduler, build_scheduled_session, parse_retry_after
 from .refiner import QueryRefiner
 
 
@@ -34,10 +33,18 @@ class SearchProvider(ABC):
 
     RATE_LIMIT_PENALTY_SECONDS = 30.0
 
-    def __init__(self, settings: Dict[str, str], dispatcher: "BionicDispatcher", user_agent: UserAgent):
+    def __init__(
+        self,
+        settings: Dict[str, str],
+        dispatcher: "BionicDispatcher",
+        user_agent: UserAgent,
+        session: Optional[requests.Session] = None,
+    ):
         self.settings = settings
         self.dispatcher = dispatcher
         self.user_agent = user_agent
+        # 共用 Session 經過 HostScheduler，429/Retry-After 只影響回應的主機
+        self.session = session or requests.Session()
 
     @abstractmethod
     def search(self, query: str, num_results: int) -> List[SearchItem]:
@@ -60,7 +67,7 @@ class GoogleSearchProvider(SearchProvider):
             "num": max(1, min(num_results, 10)),
         }
         headers = {"User-Agent": self.user_agent.random}
-        response = requests.get(self.api_url, params=params, headers=headers, timeout=15)
+        response = self.session.get(self.api_url, params=params, headers=headers, timeout=15)
         self._raise_for_status(response)
         data = response.json()
         items = data.get("items", [])
@@ -138,13 +145,16 @@ class TavilySearchProvider(SearchProvider):
 class SearXNGSearchProvider(SearchProvider):
     RATE_LIMIT_HINTS = ("rate limit", "too many requests", "429", "forbidden", "blocked")
 
+    @staticmethod
+    def base_url(settings: Dict[str, str]) -> str:
+        return settings.get("searxng_base_url", "http://localhost:8080").rstrip("/")
+
     def search(self, query: str, num_results: int) -> List[SearchItem]:
-        base_url = self.settings.get("searxng_base_url", "http://localhost:8080").rstrip("/")
-        search_url = f"{base_url}/search"
+        search_url = f"{self.base_url(self.settings)}/search"
         params = {"q": f"{query} news", "format": "json"}
         try:
             headers = {"User-Agent": self.user_agent.random}
-            response = requests.get(search_url, params=params, headers=headers, timeout=15)
+            response = self.session.get(search_url, params=params, headers=headers, timeout=15)
         except requests.ConnectionError as exc:
             logger.warning("SearXNG 連線失敗，請確認 Docker 是否啟動: {}", exc)
             return []
@@ -196,20 +206,7 @@ class SearXNGSearchProvider(SearchProvider):
             self.dispatcher.apply_penalty(penalty)
 
     def _parse_retry_after(self, response: requests.Response) -> Optional[float]:
-        retry_after = response.headers.get("Retry-After")
-        if not retry_after:
-            return None
-        try:
-            return float(retry_after)
-        except ValueError:
-            try:
-                retry_time = parsedate_to_datetime(retry_after)
-            except (TypeError, ValueError):
-                return None
-            now = time.time()
-            if retry_time.tzinfo is None:
-                retry_time = retry_time.replace(tzinfo=timezone.utc)
-            return max(0.0, retry_time.timestamp() - now)
+        return parse_retry_after(response.headers.get("Retry-After"))
 
     def _has_rate_limit_signal(self, payload: Dict[str, object]) -> bool:
         errors = payload.get("errors")
@@ -308,12 +305,20 @@ class SearchAggregator:
             penalty_seconds=self.RATE_LIMIT_PENALTY_SECONDS,
         )
         self.user_agent = UserAgent()
+        # 搜尋 API 的 403/429 由 BionicDispatcher 冷卻，排程器對這些主機只限速、不再重複懲罰
+        self.session = build_scheduled_session(
+            HostScheduler(externally_penalized_hosts=self._search_api_hosts())
+        )
         self.providers = {
             "tavily": TavilySearchProvider,
             "google": GoogleSearchProvider,
             "searxng": SearXNGSearchProvider,
         }
 
+    def _search_api_hosts(self) -> List[str]:
+        api_urls = [GoogleSearchProvider.api_url, SearXNGSearchProvider.base_url(self.settings)]
+        return [urlparse(api_url).hostname or "" for api_url in api_urls]
+
     def _resolve_settings_path(self, settings_path: Path) -> Path:
         local_path = settings_path.with_name("setting.local.json")
         if local_path.exists():
@@ -353,7 +358,7 @@ class SearchAggregator:
                 logger.info("跳過 %s，因為缺少必要的 API 金鑰設定。", source)
                 continue
 
-            provider = provider_class(self.settings, self.dispatcher, self.user_agent)
+            provider = provider_class(self.settings, self.dispatcher, self.user_agent, self.session)
             try:
                 logger.info(f"嘗試使用 {source} 進行搜尋...")
                 self.dispatcher.wait_for_cooldown(self._get_cooldown_for_source(source.lower()))
@@ -1,23 +1,60 @@
 # src/plugins/newsScraper/strategies/local/scraper.py
 import sys
 import json
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, List, Literal, Optional, Set, Tuple
 import requests
-from bs4 import BeautifulSoup
 import xml.etree.ElementTree as ET
 import asyncio
-from pydantic import BaseModel, ValidationError, field_validator, ConfigDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from loguru import logger
+from pydantic import BaseModel, ValidationError, field_validator, model_validator, ConfigDict
+
+try:
+    from .data_models import SearchItem
+    from .extractor import extract_article_text
+    from .host_scheduler import HostScheduler, build_scheduled_session
+    from .http_cache import CachedResponse, HttpCache, fetch_uncached
+    from .seen_store import SeenItemStore
+except ImportError:
+    # 直接以腳本執行時改用同目錄匯入
+    from data_models import SearchItem
+    from extractor import extract_article_text
+    from host_scheduler import HostScheduler, build_scheduled_session
+    from http_cache import CachedResponse, HttpCache, fetch_uncached
+    from seen_store import SeenItemStore
+
+SEEN_STORE_DIR = Path(os.environ.get("NEWS_SCRAPER_SEEN_DIR") or Path(__file__).parent / "cache" / "seen")
+HTTP_CACHE_DIR = Path(os.environ.get("NEWS_SCRAPER_HTTP_CACHE_DIR") or Path(__file__).parent / "cache" / "http")
+HTTP_CACHE_MAX_BYTES = int(float(os.environ.get("NEWS_SCRAPER_HTTP_CACHE_MB", "200")) * 1024 * 1024)
 
 
 class ScraperInput(BaseModel):
     model_config = ConfigDict(extra="ignore")
-    url: str
+    url: Optional[str] = None
+    urls: List[str] = []
     article_count: int = 3
+    article_scope: Literal["per_feed", "global"] = "per_feed"
+    max_concurrency: int = 4
+    timeout: float = 10.0
+    use_cache: bool = True
+    cache_ttl: float = HttpCache.DEFAULT_TTL_SECONDS
+    only_new: bool = False
+    include_seen: bool = False
+    # 每主機限速；未提供時使用 NEWS_SCRAPER_HOST_* 環境變數的預設值
+    max_per_host: Optional[int] = None
+    host_rate: Optional[float] = None
+    host_burst: Optional[float] = None
 
     @field_validator("url", mode="before")
     @classmethod
     def validate_url(cls, value):
         if value is None:
-            raise ValueError("URL cannot be empty")
+            return None
         if isinstance(value, str):
             stripped = value.strip()
             if not stripped:
@@ -25,11 +62,99 @@ class ScraperInput(BaseModel):
             return stripped
         return value
 
+    @field_validator("urls", mode="before")
+    @classmethod
+    def normalize_urls(cls, value):
+        if value is None:
+            return []
+        if isinstance(value, str):
+            value = [value]
+        if isinstance(value, list):
+            return [item.strip() for item in value if isinstance(item, str) and item.strip()]
+        return value
+
+    @field_validator("article_scope", mode="before")
+    @classmethod
+    def normalize_article_scope(cls, value):
+        if isinstance(value, str) and value.strip().lower() == "global":
+            return "global"
+        return "per_feed"
+
+    @model_validator(mode="after")
+    def require_feed(self):
+        if not self.feed_urls:
+            raise ValueError("URL cannot be empty")
+        return self
+
+    @property
+    def feed_urls(self) -> List[str]:
+        """
+        合併 url 與 urls，保留順序並去除重複。
+        """
+        candidates = ([self.url] if self.url else []) + self.urls
+        return list(dict.fromkeys(candidates))
+
     @field_validator("article_count", mode="before")
     @classmethod
     def sanitize_article_count(cls, value):
         return _sanitize_article_limit(value, fallback=3)
 
+    @field_validator("max_concurrency", mode="before")
+    @classmethod
+    def sanitize_max_concurrency(cls, value):
+        return min(_sanitize_article_limit(value, fallback=4), ForagerStrategy.MAX_CONCURRENCY)
+
+    @field_validator("timeout", mode="before")
+    @classmethod
+    def sanitize_timeout(cls, value):
+        return _sanitize_timeout(value, fallback=10.0)
+
+    @field_validator("max_per_host", mode="before")
+    @classmethod
+    def sanitize_max_per_host(cls, value):
+        if value is None:
+            return None
+        parsed = _sanitize_article_limit(value, fallback=None)
+        return None if parsed is None else min(parsed, ForagerStrategy.MAX_CONCURRENCY)
+
+    @field_validator("host_rate", "host_burst", mode="before")
+    @classmethod
+    def sanitize_host_limits(cls, value):
+        return None if value is None else _sanitize_timeout(value, fallback=None)
+
+    @field_validator("cache_ttl", mode="before")
+    @classmethod
+    def sanitize_cache_ttl(cls, value):
+        try:
+            return max(0.0, float(value))
+        except (TypeError, ValueError):
+            return HttpCache.DEFAULT_TTL_SECONDS
+
+@dataclass
+class FeedItem:
+    """
+    RSS 中的一篇文章；key 優先使用 guid，沒有時使用正規化後的連結。
+    """
+    link: str
+    guid: Optional[str] = None
+    published: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        return self.guid or ForagerStrategy._normalize_link(self.link) or self.link
+
+
+@dataclass
+class ItemSelection:
+    """
+    _select_items 的結果：挑選出的 (feed_url, item) 與各種原因略過的統計。
+    """
+    selected: List[Tuple[str, FeedItem]]
+    url_duplicates: int = 0
+    seen_excluded: int = 0
+    invalid_links: List[str] = field(default_factory=list)
+
+
 class ForagerStrategy:
     """
     遠端策略：負責從外部網路來源獲取並清理新聞內容。
@@ -37,8 +162,34 @@ class ForagerStrategy:
     - 主要爬取目標為 RSS Feed，更穩定、更結構化。
     - 使用標準的 <link> 標籤解析 RSS。
     - 針對新聞文章頁面進行了 HTML 清理優化。
+    - 文章頁面以共用連線池的 Session 並行抓取，輸出仍維持 RSS 順序。
+    - 可選用 HttpCache：TTL 內直接使用本地內文，過期後以條件請求重新驗證。
+    - 可一次處理多個 RSS（fetch_feeds），以正規化 URL 與內文雜湊去除轉載重複的文章。
+    - 搭配 SeenItemStore 可增量輪詢：只抓取尚未處理過的文章，已處理的文章可由儲存的正文取回。
+    - 所有請求經過 HostScheduler：同一主機依權杖桶限速並限制同時連線數，不同主機可全速並行。
+      文章多半來自同一主機時，耗時取決於 max_per_host / host_rate 而非 max_concurrency，可依每次請求調整。
     """
-    def __init__(self):
+
+    MAX_CONCURRENCY = 16
+    FEED_TIMEOUT_SECONDS = 15.0
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        article_timeout: float = 10.0,
+        http_cache: Optional[HttpCache] = None,
+        scheduler: Optional[HostScheduler] = None,
+        max_per_host: Optional[int] = None,
+        host_rate: Optional[float] = None,
+        host_burst: Optional[float] = None,
+    ):
+        self.max_concurrency = max(1, min(max_concurrency, self.MAX_CONCURRENCY))
+        self.article_timeout = article_timeout
+        self.http_cache = http_cache
+        host_limits = {"max_per_host": max_per_host, "rate_per_host": host_rate, "burst": host_burst}
+        self.scheduler = scheduler or HostScheduler(
+            **{name: value for name, value in host_limits.items() if value is not None}
+        )
         self.headers = {
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
             'Accept-Encoding': 'gzip, deflate, br, zstd',
@@ -46,54 +197,264 @@ class ForagerStrategy:
             'Cache-Control': 'max-age=0',
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36',
         }
+        self.session = self._build_session()
+
+    def _build_session(self) -> requests.Session:
+        """
+        建立共用 Session：同一主機的連線可重複使用，連線池大小與並行上限一致，每次請求先經過 HostScheduler。
+        """
+        session = build_scheduled_session(self.scheduler, pool_size=self.max_concurrency)
+        session.headers.update(self.headers)
+        return session
+
+    def close(self) -> None:
+        if self.http_cache is not None:
+            self.http_cache.flush()
+        self.session.close()
 
     def _clean_html_content(self, html_text: str) -> str:
         """
         通用 HTML 清理器，優先提取 article 標籤。
+        直接以 lxml 走訪節點，不建立 BeautifulSoup 樹（原實作保留為 extractor.extract_article_text_bs4）。
+        """
+        return extract_article_text(html_text)
+
+    def _get(self, url: str, timeout: float) -> CachedResponse:
+        """
+        經由 HttpCache（若啟用）抓取；非 2xx/304 回應會拋出 HTTPError。
         """
-        soup = BeautifulSoup(html_text, 'lxml')
-        article_body = soup.find('article')
-        if not article_body:
-            article_body = soup
-        paragraphs = article_body.find_all('p')
-        cleaned_text = '\n'.join([p.get_text(strip=True) for p in paragraphs])
-        return cleaned_text
+        if self.http_cache is None:
+            return fetch_uncached(self.session, url, timeout)
+        return self.http_cache.fetch(self.session, url, timeout)
+
+    def _fetch_article(self, link: str) -> CachedResponse:
+        """
+        抓取單篇文章（於執行緒池中執行）。
+        """
+        return self._get(link, self.article_timeout)
+
+    @staticmethod
+    def _parse_feed_items(feed_content: bytes) -> List[FeedItem]:
+        """
+        解析 RSS 中各 item 的 link / guid / pubDate，維持 RSS 順序。
+        """
+        root = ET.fromstring(feed_content)
+        items: List[FeedItem] = []
+        for item in root.findall('.//item'):
+            # [Copilot 審查修正] 確保 link 標籤存在且其 text 內容不為空
+            link = (item.findtext('link') or '').strip()
+            if not link:
+                continue
+            guid = (item.findtext('guid') or '').strip() or None
+            items.append(FeedItem(link=link, guid=guid, published=_parse_published(item.findtext('pubDate'))))
+        return items
+
+    @staticmethod
+    def _normalize_link(link: str) -> Optional[str]:
+        """
+        沿用 SearchItem 的 URL 正規化（去除 utm_* 等追蹤參數與 fragment）；無效 URL 回傳 None。
+        """
+        try:
+            return SearchItem(url=link).url
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _content_digest(cleaned_text: str) -> str:
+        return hashlib.sha256(' '.join(cleaned_text.split()).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _select_items(
+        feed_items: List[Tuple[str, List[FeedItem]]],
+        article_limit: int,
+        article_scope: str,
+        excluded_keys: Optional[Dict[str, Set[str]]] = None,
+    ) -> ItemSelection:
+        """
+        以正規化 URL 去重、略過 excluded_keys（各 RSS 已處理過的文章鍵）後挑選文章。
+        略過在截取篇數之前進行，only_new 時仍可取滿 article_limit 篇新文章。
+        per_feed：每個 RSS 各取 article_limit 篇；global：各 RSS 輪流取一篇，總數 article_limit 篇。
+        無法正規化的連結記錄警告並列入 invalid_links，不會默默消失。
+        """
+        seen_urls = set()
+        duplicate_count = 0
+        excluded_count = 0
+        invalid_links: List[str] = []
+        deduped: List[Tuple[str, List[FeedItem]]] = []
+        for feed_url, items in feed_items:
+            feed_excluded = (excluded_keys or {}).get(feed_url, set())
+            unique_items = []
+            for item in items:
+                normalized = ForagerStrategy._normalize_link(item.link)
+                if normalized is None:
+                    logger.warning("略過無效的文章連結: {} (RSS: {})", item.link, feed_url)
+                    invalid_links.append(item.link)
+                    continue
+                if normalized in seen_urls:
+                    duplicate_count += 1
+                    continue
+                seen_urls.add(normalized)
+                if item.key in feed_excluded:
+                    excluded_count += 1
+                    continue
+                unique_items.append(item)
+            deduped.append((feed_url, unique_items))
+
+        selected: List[Tuple[str, FeedItem]] = []
+        if article_scope == "global":
+            depth = 0
+            while len(selected) < article_limit and any(depth < len(items) for _, items in deduped):
+                for feed_url, items in deduped:
+                    if depth < len(items) and len(selected) < article_limit:
+                        selected.append((feed_url, items[depth]))
+                depth += 1
+        else:
+            selected = [(feed_url, item) for feed_url, items in deduped for item in items[:article_limit]]
+        return ItemSelection(selected, duplicate_count, excluded_count, invalid_links)
 
     async def fetch_news(self, rss_url: str, article_limit: int = 3) -> dict:
         """
-        非同步執行新聞獲取的主函式。
+        非同步執行新聞獲取的主函式（單一 RSS）。
+        """
+        return await self.fetch_feeds([rss_url], article_limit)
+
+    async def fetch_feeds(
+        self,
+        feed_urls: List[str],
+        article_limit: int = 3,
+        article_scope: str = "per_feed",
+        seen_store: Optional[SeenItemStore] = None,
+        only_new: bool = False,
+        include_seen: bool = False,
+    ) -> dict:
+        """
+        並行抓取多個 RSS 與其文章，輸出依 RSS 順序排列。
+        單一 RSS 或文章失敗時記錄於 errors 並略過，result.status 標示為 partial（無效連結列於 invalid_links 時亦同）；
+        所有 RSS 皆失敗或所有文章皆失敗時回傳 success=False。
+        提供 seen_store 時記錄本次抓取的文章（main 只在 only_new 時建立）；only_new 只抓取未處理過的文章，
+        include_seen 則以儲存的正文帶回已處理的文章。
         """
         all_cleaned_text = ""
         try:
-            response = requests.get(rss_url, headers=self.headers, timeout=15)
-            response.raise_for_status()
-            
-            root = ET.fromstring(response.content)
-            
-            # [Copilot 審查修正] 確保 link 標籤存在且其 text 內容不為空
-            article_links = [
-                item.find('link').text
-                for item in root.findall('.//item')
-                if item.find('link') is not None and item.find('link').text
-            ]
-
-            for link in article_links[:article_limit]:
-                if not link: continue
-                
-                article_response = requests.get(link, headers=self.headers, timeout=10)
-                article_response.raise_for_status()
-                
-                cleaned_article = self._clean_html_content(article_response.text)
-                all_cleaned_text += f"--- News Source: {link} ---\n\n{cleaned_article}\n\n"
-            
+            loop = asyncio.get_running_loop()
+            # 並行抓取：執行緒數即並行上限，gather 依傳入順序回傳，輸出維持 RSS 順序
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                feed_responses = await asyncio.gather(
+                    *(loop.run_in_executor(executor, self._get, feed_url, self.FEED_TIMEOUT_SECONDS) for feed_url in feed_urls),
+                    return_exceptions=True,
+                )
+
+                errors: List[str] = []
+                fetched: List[CachedResponse] = []
+                feed_items: List[Tuple[str, List[FeedItem]]] = []
+                for feed_url, feed_response in zip(feed_urls, feed_responses):
+                    try:
+                        if isinstance(feed_response, BaseException):
+                            raise feed_response
+                        feed_items.append((feed_url, self._parse_feed_items(feed_response.content)))
+                        fetched.append(feed_response)
+                    except Exception as exc:
+                        errors.append(f"{feed_url}: {exc}")
+                if not feed_items:
+                    return { "success": False, "error": f"ForagerStrategy failed: {'; '.join(errors)}" }
+
+                # 增量輪詢：已處理過的文章不再抓取；include_seen 時仍參與挑選並改用儲存的正文，
+                # 否則在截取篇數前就排除，名額留給新文章
+                seen_items: Dict[str, Dict[str, Dict]] = {}
+                if seen_store is not None and only_new:
+                    seen_items = {feed_url: seen_store.load(feed_url) for feed_url, _ in feed_items}
+                excluded_keys = None if include_seen else {feed_url: set(items) for feed_url, items in seen_items.items()}
+                selection = self._select_items(feed_items, article_limit, article_scope, excluded_keys)
+                selected_items = selection.selected
+
+                stored_texts: Dict[int, str] = {}
+                to_fetch: List[int] = []
+                for index, (feed_url, item) in enumerate(selected_items):
+                    stored = seen_items.get(feed_url, {}).get(item.key)
+                    if stored is not None and stored.get("text") is not None:
+                        stored_texts[index] = stored["text"]
+                    else:
+                        to_fetch.append(index)
+
+                fetch_results = await asyncio.gather(
+                    *(loop.run_in_executor(executor, self._fetch_article, selected_items[index][1].link) for index in to_fetch),
+                    return_exceptions=True,
+                )
+            article_responses = dict(zip(to_fetch, fetch_results))
+
+            seen_digests = set()
+            content_duplicates = 0
+            article_count = 0
+            new_count = 0
+            new_entries: Dict[str, Dict[str, Dict]] = {}
+            for index, (feed_url, item) in enumerate(selected_items):
+                if index in stored_texts:
+                    cleaned_article = stored_texts[index]
+                else:
+                    article_response = article_responses[index]
+                    if isinstance(article_response, BaseException):
+                        errors.append(f"{item.link}: {article_response}")
+                        continue
+                    fetched.append(article_response)
+                    cleaned_article = self._clean_html_content(article_response.text)
+                    new_count += 1
+                    new_entries.setdefault(feed_url, {})[item.key] = {
+                        "link": item.link,
+                        "published": item.published,
+                        "text": cleaned_article,
+                    }
+                # 內文去重：不同網址的轉載文章內容相同時只保留第一篇
+                digest = self._content_digest(cleaned_article)
+                if cleaned_article.strip() and digest in seen_digests:
+                    content_duplicates += 1
+                    continue
+                seen_digests.add(digest)
+                article_count += 1
+                all_cleaned_text += f"--- News Source: {item.link} ---\n\n{cleaned_article}\n\n"
+
+            if to_fetch and new_count == 0 and not stored_texts:
+                return { "success": False, "error": f"ForagerStrategy failed: {'; '.join(errors)}" }
+
+            if seen_store is not None:
+                for feed_url, entries in new_entries.items():
+                    seen_store.record(feed_url, entries)
+
+            cache_stats = {"fresh": 0, "revalidated": 0, "miss": 0, "bypass": 0}
+            for cached in fetched:
+                cache_stats[cached.cache_status] += 1
+
             return {
                 "success": True,
-                "result": { "source_url": rss_url, "article_text": all_cleaned_text.strip() },
+                "result": {
+                    "source_url": feed_urls[0],
+                    "source_urls": feed_urls,
+                    "article_text": all_cleaned_text.strip(),
+                    "article_count": article_count,
+                    "new_count": new_count,
+                    "seen_skipped": selection.seen_excluded + len(stored_texts),
+                    "duplicates": {"url": selection.url_duplicates, "content": content_duplicates},
+                    "status": "partial" if errors or selection.invalid_links else "complete",
+                    "errors": errors,
+                    "invalid_links": selection.invalid_links,
+                    "cache": cache_stats,
+                },
                 "resultType": "object"
             }
         except Exception as e:
             return { "success": False, "error": f"ForagerStrategy failed: {str(e)}" }
 
+def _parse_published(raw_date: Optional[str]) -> Optional[str]:
+    """
+    將 RSS pubDate 轉為 ISO 8601；無法解析時保留原字串。
+    """
+    if not raw_date or not raw_date.strip():
+        return None
+    try:
+        return parsedate_to_datetime(raw_date.strip()).isoformat()
+    except (TypeError, ValueError):
+        return raw_date.strip()
+
+
 def _sanitize_article_limit(raw_limit, fallback=3):
     try:
         parsed = int(raw_limit)
@@ -105,16 +466,46 @@ def _sanitize_article_limit(raw_limit, fallback=3):
     return fallback
 
 
+def _sanitize_timeout(raw_timeout, fallback=10.0):
+    try:
+        parsed = float(raw_timeout)
+        if parsed > 0:
+            return parsed
+    except (TypeError, ValueError):
+        pass
+    return fallback
+
+
 async def main():
     if len(sys.argv) == 2:
         try:
             payload = json.loads(sys.argv[1])
             input_model = ScraperInput.model_validate(payload)
-            forager = ForagerStrategy()
-            result = await forager.fetch_news(
-                rss_url=input_model.url,
-                article_limit=input_model.article_count,
+            http_cache = (
+                HttpCache(HTTP_CACHE_DIR, ttl_seconds=input_model.cache_ttl, max_bytes=HTTP_CACHE_MAX_BYTES)
+                if input_model.use_cache
+                else None
+            )
+            forager = ForagerStrategy(
+                max_concurrency=input_model.max_concurrency,
+                article_timeout=input_model.timeout,
+                http_cache=http_cache,
+                max_per_host=input_model.max_per_host,
+                host_rate=input_model.host_rate,
+                host_burst=input_model.host_burst,
             )
+            try:
+                result = await forager.fetch_feeds(
+                    feed_urls=input_model.feed_urls,
+                    article_limit=input_model.article_count,
+                    article_scope=input_model.article_scope,
+                    # 只有增量輪詢才讀寫已處理記錄，一般請求不落地保存正文
+                    seen_store=SeenItemStore(SEEN_STORE_DIR) if input_model.only_new else None,
+                    only_new=input_model.only_new,
+                    include_seen=input_model.include_seen,
+                )
+            finally:
+                forager.close()
             # 強制以 UTF-8 編碼輸出 JSON，確保 Node.js 能正確解析
             sys.stdout.buffer.write(json.dumps(result, ensure_ascii=False).encode("utf-8"))
         except (json.JSONDecodeError, ValidationError) as exc:
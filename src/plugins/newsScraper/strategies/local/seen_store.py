@@ -0,0 +1,68 @@
+# src/plugins/newsScraper/strategies/local/seen_store.py
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+
+from filelock import FileLock
+
+
+class SeenItemStore:
+    """
+    記錄各 RSS 已處理過的文章（以 GUID 或正規化連結為鍵），供增量輪詢略過未變動的文章。
+    - 每個 RSS 一個 JSON 檔，FileLock 保護跨進程寫入。
+    - 同時保存清理後的正文，呼叫端可直接取回，不必重新抓取。
+    - 每個 RSS 最多保留 MAX_ITEMS_PER_FEED 筆，超過時淘汰最早記錄的項目。
+    """
+
+    MAX_ITEMS_PER_FEED = 500
+
+    def __init__(self, store_dir: Path, max_items_per_feed: int = MAX_ITEMS_PER_FEED):
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.max_items_per_feed = max(1, max_items_per_feed)
+        self._thread_lock = threading.Lock()
+
+    def load(self, feed_url: str) -> Dict[str, Dict]:
+        with self._thread_lock, self._file_lock(feed_url):
+            return self._read(feed_url)
+
+    def record(self, feed_url: str, entries: Dict[str, Dict]) -> None:
+        """
+        合併新項目；已存在的項目保留 first_seen，其餘欄位以新值覆寫。
+        """
+        if not entries:
+            return
+        now = time.time()
+        with self._thread_lock, self._file_lock(feed_url):
+            items = self._read(feed_url)
+            for key, entry in entries.items():
+                previous = items.get(key, {})
+                items[key] = {**previous, **entry, "first_seen": previous.get("first_seen", now), "last_seen": now}
+            if len(items) > self.max_items_per_feed:
+                newest = sorted(items, key=lambda item_key: items[item_key].get("first_seen", 0.0), reverse=True)
+                items = {item_key: items[item_key] for item_key in newest[: self.max_items_per_feed]}
+            path = self._feed_path(feed_url)
+            temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            temp_path.write_text(json.dumps({"feed_url": feed_url, "items": items}, ensure_ascii=False), encoding="utf-8")
+            os.replace(temp_path, path)
+
+    def _feed_path(self, feed_url: str) -> Path:
+        return self.store_dir / f"{hashlib.sha256(feed_url.encode('utf-8')).hexdigest()[:32]}.json"
+
+    def _file_lock(self, feed_url: str) -> FileLock:
+        return FileLock(str(self._feed_path(feed_url).with_suffix(".lock")))
+
+    def _read(self, feed_url: str) -> Dict[str, Dict]:
+        path = self._feed_path(feed_url)
+        if not path.exists():
+            return {}
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        items = data.get("items") if isinstance(data, dict) else None
+        return items if isinstance(items, dict) else {}
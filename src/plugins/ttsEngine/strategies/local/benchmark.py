@@ -0,0 +1,330 @@
+import argparse
+import json
+import os
+import shutil
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+
+# 離線 ttsEngine 吞吐量基準測試：以 stub 模型取代 F5，量測協議與 DSP 開銷
+# 作法：在暫存目錄複製 index.py，並放入假的 f5_tts 套件（infer_process / load_model / load_vocoder），
+# 再以真實的 stdin JSONL → stdout frame 協議驅動多個引擎進程。
+
+ENGINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "index.py")
+
+# stub 版 f5_tts.infer.utils_infer：依設定的 real-time factor 產生可重現的合成音訊
+STUB_UTILS_INFER = textwrap.dedent('''
+    import json
+    import os
+    import sys
+    import time
+
+    import numpy as np
+
+    mel_spec_type = "vocos"
+    target_rms = 0.1
+    cross_fade_duration = 0.15
+    nfe_step = 32
+    cfg_strength = 2.0
+    sway_sampling_coef = -1.0
+    speed = 1.0
+    fix_duration = None
+
+    BENCH_RTF = float(os.environ.get("TTS_BENCH_RTF", "0.1"))
+    BENCH_SAMPLE_RATE = int(os.environ.get("TTS_BENCH_SAMPLE_RATE", "24000"))
+    BENCH_SECONDS_PER_CHAR = float(os.environ.get("TTS_BENCH_SECONDS_PER_CHAR", "0.15"))
+
+
+    def _mark(event, **fields):
+        # 以 stderr 回報時間點，供 benchmark 端計算 DSP 時間
+        sys.stderr.write(json.dumps({"bench": event, "t": time.time(), **fields}) + "\\n")
+        sys.stderr.flush()
+
+
+    def load_vocoder(**kwargs):
+        return object()
+
+
+    def load_model(*args, **kwargs):
+        _mark("ready")
+        return object()
+
+
+    def preprocess_ref_audio_text(ref_audio, ref_text):
+        return ref_audio, ref_text
+
+
+    def infer_process(ref_audio, ref_text, gen_text, model, vocoder, **kwargs):
+        duration = max(len(gen_text) * BENCH_SECONDS_PER_CHAR, 0.1)
+        time.sleep(duration * BENCH_RTF)
+        samples = int(duration * BENCH_SAMPLE_RATE)
+        t = np.arange(samples) / BENCH_SAMPLE_RATE
+        # 固定頻率組合與包絡，確保每次輸出相同
+        audio = 0.3 * np.sin(2 * np.pi * 220 * t) + 0.1 * np.sin(2 * np.pi * 1760 * t)
+        audio *= 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t) ** 2
+        _mark("infer_done", samples=samples)
+        return audio, BENCH_SAMPLE_RATE, None
+''')
+
+STUB_MODEL = textwrap.dedent('''
+    class DiT:
+        pass
+
+
+    class UNetT:
+        pass
+''')
+
+
+# 建立暫存的引擎目錄：index.py 副本 + stub f5_tts 套件 + 設定檔
+def build_stub_engine(root):
+    package_dir = os.path.join(root, "f5_tts")
+    files = {
+        os.path.join(package_dir, "__init__.py"): "",
+        os.path.join(package_dir, "infer", "__init__.py"): "",
+        os.path.join(package_dir, "infer", "utils_infer.py"): STUB_UTILS_INFER,
+        os.path.join(package_dir, "model", "__init__.py"): STUB_MODEL,
+        os.path.join(package_dir, "configs", "F5TTS_v1_Base.yaml"): "model:\n  backbone: DiT\n  arch: {}\n",
+        os.path.join(package_dir, "infer", "setting", "setting.toml"): 'ref_audio = "stub.wav"\nref_text = "stub"\n',
+    }
+    for path, content in files.items():
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+    engine_copy = os.path.join(root, "index.py")
+    shutil.copyfile(ENGINE_PATH, engine_copy)
+    return engine_copy
+
+
+# 讀取固定長度資料，EOF 時回傳 None
+def read_exact(stream, size):
+    data = b""
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+# 讀取單一 frame（長度前綴 + JSON header + audio payload）
+def read_frame(stream):
+    header = read_exact(stream, 4)
+    if header is None:
+        return None, b""
+    (frame_len,) = struct.unpack(">I", header)
+    frame = json.loads(read_exact(stream, frame_len).decode("utf-8"))
+    payload = b""
+    if frame.get("type") == "audio":
+        payload = read_exact(stream, frame.get("payload_bytes", 0))
+    return frame, payload
+
+
+class EngineWorker:
+    """單一 stub 引擎進程；引擎限制單 session in-flight，故每個 worker 依序送出 session。"""
+
+    def __init__(self, index, engine_path, log_path, args):
+        self.index = index
+        self.args = args
+        self.markers = []
+        self.marker_cond = threading.Condition()
+        self.results = []
+        self.error = None
+        env = {
+            **os.environ,
+            "PYTHONIOENCODING": "utf-8",
+            "TTS_BENCH_RTF": str(args.rtf),
+            "TTS_BENCH_SAMPLE_RATE": str(args.native_sample_rate),
+            "TTS_BENCH_SECONDS_PER_CHAR": str(args.seconds_per_char),
+        }
+        self.started_at = time.time()
+        self.process = subprocess.Popen(
+            [args.python, engine_path, "--log-path", log_path],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+        )
+        threading.Thread(target=self._read_stderr, daemon=True).start()
+
+    def _read_stderr(self):
+        for raw in self.process.stderr:
+            line = raw.decode("utf-8", errors="replace").strip()
+            if not line.startswith('{"bench"'):
+                continue
+            with self.marker_cond:
+                self.markers.append(json.loads(line))
+                self.marker_cond.notify_all()
+
+    def _wait_marker(self, event, after, timeout=60.0):
+        deadline = time.time() + timeout
+        with self.marker_cond:
+            while True:
+                for marker in self.markers:
+                    if marker["bench"] == event and marker["t"] >= after:
+                        return marker
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise TimeoutError(f"等待 {event} 逾時")
+                self.marker_cond.wait(remaining)
+
+    def _send(self, event):
+        self.process.stdin.write((json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8"))
+        self.process.stdin.flush()
+
+    def run(self):
+        try:
+            ready = self._wait_marker("ready", 0.0)
+            self.startup_seconds = ready["t"] - self.started_at
+            for n in range(self.args.sessions):
+                self.results.append(self._run_session(f"bench-{self.index}-{n}"))
+        except Exception as exc:
+            self.error = str(exc)
+
+    def _run_session(self, session_id):
+        text_event = {"type": "text", "session_id": session_id, "text": self.args.text}
+        if self.args.output_sample_rate:
+            text_event["sample_rate"] = self.args.output_sample_rate
+        if self.args.format:
+            text_event["format"] = self.args.format
+        self._send(text_event)
+        sent_at = time.time()
+        self._send({"type": "end", "session_id": session_id})
+
+        start_frame = None
+        start_at = first_audio_at = None
+        frames = payload_bytes = 0
+        while True:
+            frame, payload = read_frame(self.process.stdout)
+            now = time.time()
+            if frame is None:
+                raise RuntimeError("引擎 stdout 提前結束")
+            if frame["type"] == "error":
+                raise RuntimeError(f"{frame.get('code')}: {frame.get('message')}")
+            if frame["type"] == "start":
+                start_frame, start_at = frame, now
+            elif frame["type"] == "audio":
+                if first_audio_at is None:
+                    first_audio_at = now
+                frames += 1
+                payload_bytes += len(payload)
+            elif frame["type"] == "done":
+                done_at = now
+                break
+
+        infer_done = self._wait_marker("infer_done", sent_at)
+        audio_seconds = infer_done["samples"] / self.args.native_sample_rate
+        # DSP 時間：stub 推論結束到 start frame 抵達（後處理 + 重新取樣 + 編碼）
+        dsp_seconds = max(0.0, start_at - infer_done["t"])
+        stream_seconds = max(done_at - first_audio_at, 1e-9)
+        return {
+            "session_id": session_id,
+            "format": start_frame.get("format"),
+            "sample_rate": start_frame.get("sample_rate"),
+            "audio_seconds": audio_seconds,
+            "ttff_ms": (first_audio_at - sent_at) * 1000,
+            "total_ms": (done_at - sent_at) * 1000,
+            "frames": frames,
+            "bytes": payload_bytes,
+            "frames_per_s": frames / stream_seconds,
+            "bytes_per_s": payload_bytes / stream_seconds,
+            "dsp_ms_per_audio_s": dsp_seconds * 1000 / audio_seconds,
+        }
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=10)
+        except Exception:
+            self.process.kill()
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+# 彙整所有 session 結果，輸出 p50/p95 與整體吞吐量
+def summarize(results, wall_seconds):
+    summary = {"sessions": len(results), "wall_s": wall_seconds}
+    for key in ("ttff_ms", "total_ms", "frames_per_s", "bytes_per_s", "dsp_ms_per_audio_s"):
+        values = [item[key] for item in results]
+        summary[key] = {
+            "mean": statistics.fmean(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+        }
+    summary["aggregate_frames_per_s"] = sum(item["frames"] for item in results) / wall_seconds
+    summary["aggregate_bytes_per_s"] = sum(item["bytes"] for item in results) / wall_seconds
+    summary["audio_seconds_per_s"] = sum(item["audio_seconds"] for item in results) / wall_seconds
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ttsEngine 離線吞吐量基準測試（stub 模型）")
+    parser.add_argument("--python", type=str, default=sys.executable, help="執行引擎的 Python 路徑")
+    parser.add_argument("--concurrency", type=int, default=1, help="同時執行的引擎進程數")
+    parser.add_argument("--sessions", type=int, default=5, help="每個引擎進程依序執行的 session 數")
+    parser.add_argument("--text", type=str, default="今天的天氣很適合散步，我們一起去公園走走吧。", help="合成文字")
+    parser.add_argument("--rtf", type=float, default=0.1, help="stub 模型 real-time factor（合成耗時 / 音訊長度）")
+    parser.add_argument("--seconds-per-char", type=float, default=0.15, help="每個字對應的音訊秒數")
+    parser.add_argument("--native-sample-rate", type=int, default=24000, help="stub 模型原生取樣率")
+    parser.add_argument("--output-sample-rate", type=int, default=None, help="要求引擎輸出的取樣率")
+    parser.add_argument("--format", type=str, default=None, help="要求引擎輸出的編碼 (pcm_s16le/pcm_mulaw)")
+    parser.add_argument("--json", action="store_true", help="以 JSON 輸出完整結果")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="ttsEngine-bench-")
+    try:
+        engine_path = build_stub_engine(root)
+        workers = [
+            EngineWorker(i, engine_path, os.path.join(root, f"engine-{i}.log"), args)
+            for i in range(max(1, args.concurrency))
+        ]
+        threads = [threading.Thread(target=worker.run) for worker in workers]
+        for worker, thread in zip(workers, threads):
+            worker._wait_marker("ready", 0.0)
+        wall_start = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall_seconds = time.time() - wall_start
+        for worker in workers:
+            worker.close()
+
+        errors = [f"worker {w.index}: {w.error}" for w in workers if w.error]
+        results = [item for w in workers for item in w.results]
+        if not results:
+            raise RuntimeError("沒有任何成功的 session: " + "; ".join(errors))
+        report = {
+            "config": {k: v for k, v in vars(args).items() if k != "python"},
+            "startup_s": [w.startup_seconds for w in workers if hasattr(w, "startup_seconds")],
+            "summary": summarize(results, wall_seconds),
+            "errors": errors,
+            "sessions": results,
+        }
+        if args.json:
+            print(json.dumps(report, ensure_ascii=False, indent=2))
+            return
+        summary = report["summary"]
+        print(f"sessions={summary['sessions']} concurrency={args.concurrency} wall={wall_seconds:.2f}s")
+        for key in ("ttff_ms", "frames_per_s", "bytes_per_s", "dsp_ms_per_audio_s"):
+            stats = summary[key]
+            print(f"{key:>20}: mean={stats['mean']:.2f} p50={stats['p50']:.2f} p95={stats['p95']:.2f}")
+        print(f"{'aggregate bytes/s':>20}: {summary['aggregate_bytes_per_s']:.0f}")
+        print(f"{'audio s per wall s':>20}: {summary['audio_seconds_per_s']:.2f}")
+        for error in errors:
+            print(f"error: {error}", file=sys.stderr)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -55,8 +55,20 @@ function writeInputEvent(event) {
   processRef.stdin.write(line, "utf8");
 }
 
+// 整理 session 輸出設定（目標取樣率與編碼），未指定時沿用引擎預設
+function buildOutputOptions(options = {}) {
+  const output = {};
+  if (options.sample_rate !== undefined && options.sample_rate !== null) {
+    output.sample_rate = options.sample_rate;
+  }
+  if (options.format !== undefined && options.format !== null) {
+    output.format = options.format;
+  }
+  return output;
+}
+
 // 建立新的 session 物件，供外部取得 stream 與控制流程
-function buildSession() {
+function buildSession(options = {}) {
   if (activeSessionId) {
     throw new Error("ttsEngine 正在處理其他 session");
   }
@@ -82,7 +94,8 @@ function buildSession() {
     metadataResolve,
     metadataReject,
     metadataResolved: false,
-    textSent: false
+    textSent: false,
+    output: buildOutputOptions(options)
   };
   sessions.set(sessionId, sessionData);
 
@@ -94,7 +107,11 @@ function buildSession() {
       if (!text) {
         throw new Error("sendText 缺少 text");
       }
-      writeInputEvent({ type: "text", session_id: sessionId, text });
+      // 輸出設定隨第一次 text 事件送出，Python 端於收集階段保存
+      const event = sessionData.textSent
+        ? { type: "text", session_id: sessionId, text }
+        : { type: "text", session_id: sessionId, text, ...sessionData.output };
+      writeInputEvent(event);
       // Mark that text has been sent
       sessionData.textSent = true;
     },
@@ -389,7 +406,8 @@ module.exports = {
   },
 
   // 建立可持續輸入的 session（提供 stream 與控制介面）
-  async createSession() {
+  // options.sample_rate / options.format 可指定輸出取樣率與編碼（pcm_s16le | pcm_mulaw）
+  async createSession(options = {}) {
     if (!processRef || processRef.killed || !processRef.stdin) {
       Logger.warn("[ttsEngine] createSession 失敗，進程未啟動或已終止");
       throw new Error("ttsEngine 進程未啟動");
@@ -401,7 +419,7 @@ module.exports = {
       throw new Error("ttsEngine 目前已有 session 處理中");
     }
 
-    const session = buildSession();
+    const session = buildSession(options);
     Logger.info(`[ttsEngine] 已建立 session: ${session.sessionId}`);
     return session;
   },
@@ -420,7 +438,7 @@ module.exports = {
       throw new Error("ttsEngine send 缺少 text");
     }
 
-    const session = buildSession();
+    const session = buildSession(typeof data === "string" ? {} : data);
     try {
       session.sendText(text);
       session.end();
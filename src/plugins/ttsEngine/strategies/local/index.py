@@ -7,12 +7,13 @@ import time
 import logging
 import json
 import struct
+from math import gcd
 
 PROTOCOL_STDOUT = sys.__stdout__ if sys.__stdout__ else sys.stdout
 # 將非協議輸出的 stdout 轉到 stderr，避免污染 frame 通道
 sys.stdout = sys.stderr
 
-from scipy.signal import butter, sosfilt
+from scipy.signal import butter, resample_poly, sosfilt
 import numpy as np
 import tomli
 
@@ -32,6 +33,12 @@ logger.addHandler(file_handler)
 TTS_THREAD_POOL = False
 TTS_POOL_SIZE = 4
 
+# 輸出格式設定：session 可指定目標取樣率與編碼，預設維持模型原生取樣率的 pcm_s16le
+DEFAULT_OUTPUT_FORMAT = "pcm_s16le"
+SUPPORTED_OUTPUT_FORMATS = {"pcm_s16le", "pcm_mulaw"}
+MIN_OUTPUT_SAMPLE_RATE = 8000
+MAX_OUTPUT_SAMPLE_RATE = 192000
+
 # 加入模型路徑，確保可載入 f5_tts
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 'f5_tts')))
 from f5_tts.infer.utils_infer import (
@@ -144,6 +151,59 @@ def advanced_soften_audio(audio, sr):
     return audio
 
 
+# 以 polyphase 濾波重新取樣，up/down 以最大公因數約分，避免逐點內插
+def resample_audio(audio, source_rate, target_rate):
+    if not target_rate or target_rate == source_rate:
+        return audio
+    factor = gcd(int(source_rate), int(target_rate))
+    up = int(target_rate) // factor
+    down = int(source_rate) // factor
+    return resample_poly(audio, up, down)
+
+
+# G.711 μ-law 編碼（向量化），輸入為 int16 PCM，輸出為 8-bit bytes
+MULAW_BIAS = 0x84
+MULAW_CLIP = 32635
+
+
+def encode_mulaw(pcm16):
+    samples = pcm16.astype(np.int32)
+    sign = np.where(samples < 0, 0x80, 0x00)
+    magnitude = np.minimum(np.abs(samples), MULAW_CLIP) + MULAW_BIAS
+    # frexp 回傳的指數即為 bit 長度，減 8 得到 μ-law 區段 (0~7)
+    exponent = np.frexp(magnitude)[1] - 8
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    encoded = ~(sign | (exponent << 4) | mantissa) & 0xFF
+    return encoded.astype(np.uint8).tobytes()
+
+
+# 將 [-1, 1] 浮點音訊轉為指定編碼的 bytes
+def encode_audio(audio, output_format):
+    pcm16 = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+    if output_format == "pcm_mulaw":
+        return encode_mulaw(pcm16)
+    return pcm16.tobytes()
+
+
+# 解析 session 指定的輸出設定（sample_rate / format），格式錯誤時拋出 ValueError
+def parse_output_options(payload):
+    options = {}
+    if payload.get("sample_rate") is not None:
+        try:
+            sample_rate = int(payload.get("sample_rate"))
+        except (TypeError, ValueError):
+            raise ValueError(f"sample_rate 不是有效整數: {payload.get('sample_rate')}")
+        if sample_rate < MIN_OUTPUT_SAMPLE_RATE or sample_rate > MAX_OUTPUT_SAMPLE_RATE:
+            raise ValueError(f"sample_rate 必須介於 {MIN_OUTPUT_SAMPLE_RATE} 到 {MAX_OUTPUT_SAMPLE_RATE} 之間")
+        options["sample_rate"] = sample_rate
+    if payload.get("format") is not None:
+        output_format = str(payload.get("format"))
+        if output_format not in SUPPORTED_OUTPUT_FORMATS:
+            raise ValueError(f"不支援的輸出格式: {output_format}")
+        options["format"] = output_format
+    return options
+
+
 # 使用佇列處理輸入，避免主線程阻塞
 input_queue = queue.Queue()
 output_lock = threading.Lock()
@@ -153,7 +213,8 @@ session_state_lock = threading.Lock()
 session_state = {
     "session_id": None,
     "status": "idle",  # idle | collecting | processing
-    "text_parts": []
+    "text_parts": [],
+    "output": {}
 }
 
 # 將 frame 封包寫入 stdout（長度前綴 + JSON header + PCM payload）
@@ -182,6 +243,18 @@ def emit_error_frame(session_id, message, code="UNKNOWN_ERROR"):
     write_frame(frame)
 
 
+# 重設 session 狀態，允許下一個 session 開始收集輸入
+# 只釋放指定的 session，避免誤清已在收集中的下一個 session
+def release_session(session_id):
+    with session_state_lock:
+        if session_state["session_id"] != session_id:
+            return
+        session_state["session_id"] = None
+        session_state["status"] = "idle"
+        session_state["text_parts"] = []
+        session_state["output"] = {}
+
+
 # 進行語音合成並把結果輸出到 stdout
 def tts_worker():
     while True:
@@ -191,6 +264,7 @@ def tts_worker():
             break
         session_id = item.get("session_id")
         text = item.get("text")
+        output = item.get("output") or {}
         try:
             # 進行模型推論，取得 PCM audio
             ref_audio_, ref_text_ = preprocess_ref_audio_text(ref_audio, ref_text)
@@ -211,15 +285,21 @@ def tts_worker():
                 logger.warning("音訊過小，將放大")
                 audio = audio / (peak + 1e-6)
             safe_audio = np.clip(audio, -1.0, 1.0)
-            pcm = (safe_audio * 32767).astype(np.int16).tobytes()
+
+            # 依 session 要求重新取樣與編碼，省去 Node 端的二次處理
+            output_rate = output.get("sample_rate") or final_sample_rate
+            output_format = output.get("format") or DEFAULT_OUTPUT_FORMAT
+            safe_audio = resample_audio(safe_audio, final_sample_rate, output_rate)
+            pcm = encode_audio(safe_audio, output_format)
 
             # 輸出 start frame，描述音訊格式
             start_frame = {
                 "type": "start",
                 "session_id": session_id,
-                "format": "pcm_s16le",
-                "sample_rate": final_sample_rate,
-                "channels": 1
+                "format": output_format,
+                "sample_rate": output_rate,
+                "channels": 1,
+                "source_sample_rate": final_sample_rate
             }
             write_frame(start_frame)
 
@@ -237,7 +317,8 @@ def tts_worker():
                 write_frame(audio_frame, payload=chunk)
                 seq += 1
 
-            # 輸出 done frame，通知 Node 端結束
+            # 先釋放 session 再輸出 done frame，Node 端收到 done 後即可開始下一個 session
+            release_session(session_id)
             done_frame = {
                 "type": "done",
                 "session_id": session_id
@@ -246,13 +327,11 @@ def tts_worker():
         except Exception as exc:
             # 合成過程發生錯誤時，回傳 error frame 並記錄 log
             logger.exception(f"ttsEngine 合成失敗: {exc}")
+            release_session(session_id)
             emit_error_frame(session_id, f"ttsEngine 合成失敗: {exc}", code="SYNTH_FAIL")
         finally:
             # 無論成功或失敗，都釋放 session，允許下一次合成
-            with session_state_lock:
-                session_state["session_id"] = None
-                session_state["status"] = "idle"
-                session_state["text_parts"] = []
+            release_session(session_id)
             input_queue.task_done()
 
 
@@ -290,6 +369,12 @@ def stdin_listener():
                         logger.error("text 事件缺少 text 欄位")
                         emit_error_frame(session_id, "text 事件缺少 text 欄位", code="INVALID_INPUT")
                         continue
+                    try:
+                        output_options = parse_output_options(payload)
+                    except ValueError as exc:
+                        logger.error(f"輸出設定無效: {exc}")
+                        emit_error_frame(session_id, str(exc), code="INVALID_INPUT")
+                        continue
                     # 設定或延續收集狀態，允許同 session 多次輸入
                     if status == "idle":
                         session_state["session_id"] = session_id
@@ -299,6 +384,7 @@ def stdin_listener():
                         emit_error_frame(session_id, "session 已結束輸入，無法再追加 text", code="SESSION_CLOSED")
                         continue
                     session_state["text_parts"].append(input_text)
+                    session_state["output"].update(output_options)
                     continue
 
                 if event_type == "end":
@@ -318,10 +404,15 @@ def stdin_listener():
                         session_state["session_id"] = None
                         session_state["status"] = "idle"
                         session_state["text_parts"] = []
+                        session_state["output"] = {}
                         continue
                     session_state["status"] = "processing"
                     # 在鎖外加入佇列，避免阻塞其他輸入
-                    input_queue.put({"session_id": session_id, "text": combined_text})
+                    input_queue.put({
+                        "session_id": session_id,
+                        "text": combined_text,
+                        "output": dict(session_state["output"])
+                    })
         except Exception as exc:
             # JSON 解析或流程錯誤時，記錄 log 並回傳錯誤 frame
             logger.exception(f"解析 stdin 失敗: {exc}")